@@ -1,33 +1,37 @@
-from copy import deepcopy
 from datetime import timedelta
+from functools import partial
+import json
+import os
+import threading
+import time
 
-from dmcontent.errors import ContentNotFoundError
 from flask import Flask, request, redirect, session
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
-from werkzeug.local import Local, LocalProxy
+from werkzeug.local import LocalProxy
 
-import dmapiclient
+from dmapiclient import APIError
 from dmcontent.content_loader import ContentLoader
 from dmutils import init_app, formats
-from dmutils.timing import logged_duration
 from dmutils.user import User
 from govuk_frontend_jinja.flask_ext import init_govuk_frontend
 
 from config import configs
+from .api_client import RequestMemoisingDataAPIClient
+from .shared_content_loader import SharedContentLoader
 
 
 csrf = CSRFProtect()
-data_api_client = dmapiclient.DataAPIClient()
+data_api_client = RequestMemoisingDataAPIClient()
 login_manager = LoginManager()
 
-# we use our own Local for objects we explicitly want to be able to retain between requests but shouldn't
-# share a common object between concurrent threads/contexts
-_local = Local()
-
 # These frameworks pre-date the introduction of the edit_service_as_admin and declaration manifests.
 OLD_FRAMEWORKS_WITH_MISSING_MANIFESTS = ['g-cloud-4', 'g-cloud-5', 'g-cloud-6']
 
+# Content for frameworks in these statuses is loaded in the background on startup, other frameworks' content is only
+# loaded if and when it is needed
+WARM_UP_FRAMEWORK_STATUSES = ('open', 'pending', 'standstill', 'live')
+
 
 def _log_missing_manifest(application, manifest_name, framework_slug):
     if framework_slug in OLD_FRAMEWORKS_WITH_MISSING_MANIFESTS:
@@ -40,22 +44,98 @@ def _log_missing_manifest(application, manifest_name, framework_slug):
     )
 
 
+def _read_frameworks_snapshot(application):
+    snapshot_path = application.config['DM_FRAMEWORKS_SNAPSHOT_PATH']
+    if not snapshot_path:
+        return []
+
+    try:
+        with open(snapshot_path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        application.logger.warning(f"Could not read frameworks snapshot {snapshot_path}: {e}")
+        return []
+
+
+def _write_frameworks_snapshot(application, frameworks):
+    snapshot_path = application.config['DM_FRAMEWORKS_SNAPSHOT_PATH']
+    if not snapshot_path:
+        return
+
+    try:
+        # write to a temporary file first so a starting worker never sees a partially written snapshot
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                [{'slug': framework['slug'], 'status': framework['status']} for framework in frameworks],
+                f,
+            )
+        os.replace(tmp_path, snapshot_path)
+    except OSError as e:
+        application.logger.warning(f"Could not write frameworks snapshot {snapshot_path}: {e}")
+
+
+def _get_warm_up_framework_slugs(frameworks):
+    return [
+        framework_data['slug'] for framework_data in frameworks
+        if framework_data['status'] in WARM_UP_FRAMEWORK_STATUSES
+    ]
+
+
+def _warm_up_content_loader(application, content_loader, frameworks):
+    start = time.perf_counter()
+
+    # start with the frameworks we knew about last time, so we don't have to wait for the API
+    warmed_up_slugs = _get_warm_up_framework_slugs(frameworks)
+    content_loader.warm_up(warmed_up_slugs)
+
+    try:
+        frameworks = data_api_client.find_frameworks()['frameworks']
+    except APIError as e:
+        application.logger.warning(f"Could not fetch frameworks to warm up content loader: {e}")
+    else:
+        new_slugs = [slug for slug in _get_warm_up_framework_slugs(frameworks) if slug not in warmed_up_slugs]
+        content_loader.warm_up(new_slugs)
+        warmed_up_slugs = warmed_up_slugs + new_slugs
+
+        _write_frameworks_snapshot(application, frameworks)
+
+    application.logger.info(
+        f"Warmed up content loader for {len(warmed_up_slugs)} frameworks in {time.perf_counter() - start:.3f}s"
+    )
+
+
 def _make_content_loader_factory(application, frameworks, initial_instance=None):
     # for testing purposes we allow an initial_instance to be provided
-    master_cl = initial_instance if initial_instance is not None else ContentLoader('app/content')
-    for framework_data in frameworks:
-        try:
-            master_cl.load_manifest(framework_data['slug'], 'services', 'edit_service_as_admin')
-        except ContentNotFoundError:
-            _log_missing_manifest(application, "edit_service_as_admin", framework_data['slug'])
-        try:
-            master_cl.load_manifest(framework_data['slug'], 'declaration', 'declaration')
-        except ContentNotFoundError:
-            _log_missing_manifest(application, "declaration", framework_data['slug'])
-
-    # seal master_cl in a closure by returning a function which will only ever return an independent copy of it.
-    # this is of course only guaranteed when the initial_instance argument wasn't used.
-    return lambda: deepcopy(master_cl)
+    master_cl = SharedContentLoader(
+        initial_instance if initial_instance is not None else ContentLoader('app/content'),
+        on_missing_manifest=partial(_log_missing_manifest, application),
+    )
+
+    # a precompiled snapshot of the manifests saves us having to parse their YAML, if one was built for this content
+    snapshot_path = application.config['DM_CONTENT_SNAPSHOT_PATH']
+    if snapshot_path:
+        if master_cl.load_snapshot(snapshot_path):
+            application.logger.info(f"Using content snapshot {snapshot_path}")
+        else:
+            application.logger.warning(f"Content snapshot {snapshot_path} missing or out of date, ignoring it")
+
+    # manifests are loaded as they are first asked for, so we don't need to wait for them (or even know which frameworks
+    # exist) before we can start serving requests. rather than leave the first users of each framework to pay for
+    # loading it, we load the frameworks admins are most likely to be working on in the background - starting with
+    # those we knew about when we last started, then any others we find out about from the API.
+    if application.config['DM_CONTENT_LOADER_WARM_UP']:
+        threading.Thread(
+            target=_warm_up_content_loader,
+            args=(application, master_cl, frameworks),
+            name="content-loader-warm-up",
+            daemon=True,
+        ).start()
+
+    # rather than handing each thread its own deep copy of master_cl, we share the one instance between all threads:
+    # its loaded content is made read-only and get_manifest builds a fresh manifest object from this content on each
+    # call, so callers are still free to .filter(...)/.summary(...) what they get back with inplace_allowed=True.
+    return lambda: master_cl
 
 
 def _content_loader_factory():
@@ -65,11 +145,8 @@ def _content_loader_factory():
     raise LookupError("content loader not ready yet: must be initialized & populated by create_app")
 
 
-@logged_duration(message="Spent {duration_real}s in get_content_loader")
 def get_content_loader():
-    if not hasattr(_local, "content_loader"):
-        _local.content_loader = _content_loader_factory()
-    return _local.content_loader
+    return _content_loader_factory()
 
 
 content_loader = LocalProxy(get_content_loader)
@@ -92,13 +169,32 @@ def create_app(config_name):
         login_manager=login_manager,
     )
 
-    # replace placeholder _content_loader_factory with properly initialized one
+    # replace placeholder _content_loader_factory with properly initialized one. we don't want to hold up startup (or
+    # fail to start at all) waiting for the API, so this is given the frameworks we last knew about - the current list
+    # is fetched in the background
     global _content_loader_factory
     _content_loader_factory = _make_content_loader_factory(
         application,
-        data_api_client.find_frameworks().get('frameworks'),
+        _read_frameworks_snapshot(application),
     )
 
+    from .main.helpers.frameworks import FrameworkRegistry
+    FrameworkRegistry.init_app(application)
+    from .main.helpers import bulk_service_status
+    bulk_service_status.init_app(application)
+    from .main.helpers.archived_services import ArchivedServiceCache
+    ArchivedServiceCache.init_app(application)
+    from .main.helpers.agreements import AgreementIndexCache
+    AgreementIndexCache.init_app(application)
+    from .main.helpers.service_diffs import ServiceDiffCache
+    ServiceDiffCache.init_app(application)
+    from .main.helpers.audit_events import AuditEventPageCache
+    AuditEventPageCache.init_app(application)
+    from .main.helpers.communications import CommunicationsCache
+    CommunicationsCache.init_app(application)
+    from . import commands
+    commands.init_app(application)
+
     from .metrics import metrics as metrics_blueprint, gds_metrics
     from .main import main as main_blueprint
     from .main import public as public_blueprint
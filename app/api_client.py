@@ -0,0 +1,43 @@
+"""
+A ``DataAPIClient`` which only makes each of a handful of idempotent reads once per request, however many times a view
+(or the helpers and templates it uses) asks for the same thing. Any write made through the client forgets everything
+read so far, so a read following a write always sees the write's effect.
+"""
+from copy import deepcopy
+from functools import wraps
+
+from dmapiclient import DataAPIClient
+from flask import g, has_request_context
+
+
+def _memoised_for_request(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not has_request_context():
+            return method(self, *args, **kwargs)
+
+        memo = g.setdefault("_data_api_client_memo", {})
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        if key not in memo:
+            memo[key] = method(self, *args, **kwargs)
+
+        # views are free to modify what they get back, so each caller gets its own copy
+        return deepcopy(memo[key])
+
+    return wrapper
+
+
+class RequestMemoisingDataAPIClient(DataAPIClient):
+    get_framework = _memoised_for_request(DataAPIClient.get_framework)
+    get_service = _memoised_for_request(DataAPIClient.get_service)
+    get_supplier = _memoised_for_request(DataAPIClient.get_supplier)
+    get_supplier_framework_info = _memoised_for_request(DataAPIClient.get_supplier_framework_info)
+
+    def _request(self, method, *args, **kwargs):
+        try:
+            return super()._request(method, *args, **kwargs)
+        finally:
+            # we can't easily tell which of the memoised reads a write could affect, but writes are rare enough that
+            # we can afford to just forget them all
+            if method != "GET" and has_request_context():
+                g.pop("_data_api_client_memo", None)
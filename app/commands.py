@@ -0,0 +1,12 @@
+import click
+
+from . import data_api_client
+from .main.helpers.buyer_reports import generate_buyer_reports
+
+
+def init_app(application):
+    @application.cli.command("generate-buyer-reports")
+    def generate_buyer_reports_command():
+        """Save csvs of all buyers, and of those who've opted in to user research, to the reports bucket."""
+        for path in generate_buyer_reports(data_api_client):
+            click.echo(f"Saved {path}")
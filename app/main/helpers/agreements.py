@@ -0,0 +1,135 @@
+"""
+Sourcing admins work through a framework's agreements one after another, so rather than fetching every supplier on the
+framework again for each "next agreement" we keep an index of the order of the suppliers and their agreement statuses
+for ``DM_AGREEMENT_INDEX_CACHE_TTL`` seconds, keeping it up to date with any agreement status changes made here.
+"""
+import threading
+import time
+
+from flask import current_app
+
+
+class AgreementIndex:
+    """
+    The suppliers which have returned an agreement for a framework, in order, and the status of each of their
+    agreements. Immutable, so it can be shared between threads.
+    """
+    def __init__(self, supplier_ids, agreement_statuses):
+        self._supplier_ids = tuple(supplier_ids)
+        self._agreement_statuses = tuple(agreement_statuses)
+
+        self._positions = {}
+        for position, supplier_id in enumerate(self._supplier_ids):
+            self._positions.setdefault(supplier_id, position)
+
+        # agreement status: for each position, the position of the next supplier after it with that status (or None)
+        self._next_positions = {}
+        for agreement_status in set(self._agreement_statuses):
+            next_positions = [None] * len(self._supplier_ids)
+            next_position = None
+            for position in reversed(range(len(self._supplier_ids))):
+                next_positions[position] = next_position
+                if self._agreement_statuses[position] == agreement_status:
+                    next_position = position
+            self._next_positions[agreement_status] = next_positions
+
+    @classmethod
+    def from_supplier_frameworks(cls, supplier_frameworks):
+        return cls(
+            (supplier_framework.get("supplierId") for supplier_framework in supplier_frameworks),
+            (supplier_framework.get("agreementStatus") for supplier_framework in supplier_frameworks),
+        )
+
+    def next_supplier_id(self, supplier_id, agreement_statuses=None):
+        """
+        :param agreement_statuses: if given, only suppliers whose agreement has one of these statuses are considered
+        :return: the id of the supplier after ``supplier_id``, or None if there isn't one
+        :raises KeyError: if ``supplier_id`` isn't in the index
+        """
+        position = self._positions[supplier_id]
+        if agreement_statuses is None:
+            next_positions = (position + 1,) if position + 1 < len(self._supplier_ids) else ()
+        else:
+            next_positions = tuple(
+                self._next_positions[agreement_status][position]
+                for agreement_status in agreement_statuses
+                if agreement_status in self._next_positions
+                and self._next_positions[agreement_status][position] is not None
+            )
+
+        return self._supplier_ids[min(next_positions)] if next_positions else None
+
+    def with_agreement_status(self, supplier_id, agreement_status):
+        """:return: a copy of this index with the agreement status of ``supplier_id`` changed"""
+        if supplier_id not in self._positions:
+            return self
+
+        agreement_statuses = list(self._agreement_statuses)
+        agreement_statuses[self._positions[supplier_id]] = agreement_status
+        return type(self)(self._supplier_ids, agreement_statuses)
+
+
+class AgreementIndexCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # framework slug: (AgreementIndex, expiry time)
+        self._cached = {}
+
+    def _get_unexpired(self, framework_slug):
+        cached = self._cached.get(framework_slug)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+
+    def get_index(self, framework_slug, fetch_supplier_frameworks):
+        """
+        :param fetch_supplier_frameworks: a function returning the suppliers which have returned an agreement for the
+                                          framework, used if we have no unexpired index for it
+        """
+        index = self._get_unexpired(framework_slug)
+        if index is not None:
+            return index
+
+        # built while holding the lock, so that only one thread builds an index at once and any changes to agreement
+        # statuses made in the meantime are made to the new index rather than lost when it's stored
+        with self._lock:
+            # another thread may have built the index while we were waiting for the lock
+            index = self._get_unexpired(framework_slug)
+            if index is not None:
+                return index
+
+            index = AgreementIndex.from_supplier_frameworks(fetch_supplier_frameworks())
+            self._cached[framework_slug] = (
+                index,
+                time.monotonic() + current_app.config["DM_AGREEMENT_INDEX_CACHE_TTL"],
+            )
+            return index
+
+    def update_agreement_status(self, framework_slug, supplier_id, agreement_status):
+        with self._lock:
+            cached = self._cached.get(framework_slug)
+            if cached is not None:
+                index, expires_at = cached
+                self._cached[framework_slug] = (index.with_agreement_status(supplier_id, agreement_status), expires_at)
+
+    def invalidate(self, framework_slug):
+        with self._lock:
+            self._cached.pop(framework_slug, None)
+
+    @classmethod
+    def init_app(cls, application):
+        application.extensions["agreement_index_cache"] = cls()
+
+
+def get_agreement_index(framework_slug, fetch_supplier_frameworks):
+    return current_app.extensions["agreement_index_cache"].get_index(framework_slug, fetch_supplier_frameworks)
+
+
+def update_agreement_status(framework_slug, supplier_id, agreement_status):
+    """Record a change made to an agreement's status in any index we have for its framework"""
+    current_app.extensions["agreement_index_cache"].update_agreement_status(
+        framework_slug, supplier_id, agreement_status,
+    )
+
+
+def invalidate_agreement_index(framework_slug):
+    current_app.extensions["agreement_index_cache"].invalidate(framework_slug)
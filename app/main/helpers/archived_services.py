@@ -0,0 +1,85 @@
+"""
+An archived service is a snapshot of a service as it was at a particular moment, so never changes once it exists.
+That means we can keep hold of any we've fetched for as long as we have room for them - though to make that room go
+further we only keep the handful of fields we actually use.
+
+The API has no way of fetching more than one archived service at once, so any we don't already have are fetched
+concurrently, on a thread pool of their own so that a big export can't hold up other requests' API calls.
+"""
+from collections import OrderedDict
+import threading
+
+from flask import current_app
+
+from .concurrency import get_thread_pool
+
+
+ARCHIVED_SERVICE_SUMMARY_FIELDS = ('serviceName', 'supplierId', 'supplierName', 'frameworkName')
+
+
+class ArchivedServiceCache:
+    """A thread-safe cache of archived service summaries, dropping the least recently used once it is full"""
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._summaries = OrderedDict()
+
+    def get(self, archived_service_id):
+        with self._lock:
+            summary = self._summaries.get(archived_service_id)
+            if summary is not None:
+                self._summaries.move_to_end(archived_service_id)
+            return summary
+
+    def set(self, archived_service_id, summary):
+        with self._lock:
+            self._summaries[archived_service_id] = summary
+            self._summaries.move_to_end(archived_service_id)
+            while len(self._summaries) > self._max_size:
+                self._summaries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._summaries)
+
+    @classmethod
+    def init_app(cls, application):
+        application.extensions['archived_service_cache'] = cls(application.config['DM_ARCHIVED_SERVICE_CACHE_SIZE'])
+
+
+def _get_archived_service_summary(client, archived_service_id):
+    archived_service = client.get_archived_service(archived_service_id=archived_service_id)['services']
+    return {field: archived_service[field] for field in ARCHIVED_SERVICE_SUMMARY_FIELDS}
+
+
+def get_archived_service_summaries(client, archived_service_ids):
+    """
+    :return: a dict of archived service id: a dict of the ``ARCHIVED_SERVICE_SUMMARY_FIELDS`` of that archived service,
+             for each of ``archived_service_ids``. Any we haven't already got are fetched, concurrently, using
+             ``client``.
+    """
+    cache = current_app.extensions['archived_service_cache']
+
+    summaries = {}
+    missing_ids = []
+    # (ignoring any duplicates)
+    for archived_service_id in OrderedDict.fromkeys(archived_service_ids):
+        summary = cache.get(archived_service_id)
+        if summary is None:
+            missing_ids.append(archived_service_id)
+        else:
+            summaries[archived_service_id] = summary
+
+    if missing_ids:
+        thread_pool = get_thread_pool(
+            "archived-service-fetch",
+            current_app.config['DM_ARCHIVED_SERVICE_FETCH_CONCURRENCY'],
+        )
+        fetched_summaries = thread_pool.map(
+            lambda archived_service_id: _get_archived_service_summary(client, archived_service_id),
+            missing_ids,
+        )
+        for archived_service_id, summary in zip(missing_ids, fetched_summaries):
+            cache.set(archived_service_id, summary)
+            summaries[archived_service_id] = summary
+
+    return summaries
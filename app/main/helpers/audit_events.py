@@ -0,0 +1,117 @@
+"""
+Going through every page of a set of audit events one page after another means waiting for each page to be fetched
+after dealing with the one before, so instead we fetch the next page in the background while the current one is being
+dealt with - and only ever hold those two pages, however many there are.
+
+Likewise when someone is paging through audit events a page at a time, we start fetching the next page while they look
+at the current one, keeping it for ``DM_AUDIT_EVENT_PAGE_CACHE_TTL`` seconds in case they ask for it. Each process keeps
+its own pages, and can only forget them when it is the one changing the events (such as by approving edits, which moves
+the events after them onto earlier pages), so that is kept to a few seconds: enough to go on to the next page, but not
+to show a page much out of date after someone else's changes.
+"""
+from concurrent.futures import wait
+from functools import partial
+import threading
+import time
+
+from flask import current_app
+
+from .concurrency import get_thread_pool, submit_with_context
+
+
+def iter_audit_events(client, **kwargs):
+    """
+    :param kwargs: passed on to ``client.find_audit_events`` for each page
+    :return: an iterator of all the audit events on every page, in order - stopping at an empty page, or after
+             ``DM_AUDIT_EVENT_MAX_PAGES`` pages, whatever the links say
+    """
+    thread_pool = get_thread_pool(
+        "audit-event-prefetch",
+        current_app.config['DM_AUDIT_EVENT_PREFETCH_CONCURRENCY'],
+    )
+    max_pages = current_app.config["DM_AUDIT_EVENT_MAX_PAGES"]
+
+    page = 1
+    response = client.find_audit_events(page=page, **kwargs)
+    while True:
+        next_response = None
+        if response["links"].get("next") and response["auditEvents"] and page < max_pages:
+            next_response = submit_with_context(thread_pool, partial(client.find_audit_events, page=page + 1, **kwargs))
+
+        try:
+            yield from response["auditEvents"]
+        except GeneratorExit:
+            # we're not going to need the next page after all, but mustn't leave it being fetched in our request context
+            if next_response is not None and not next_response.cancel():
+                wait((next_response,))
+            raise
+
+        if next_response is None:
+            if page == max_pages and response["links"].get("next"):
+                current_app.logger.warning(f"Stopped going through audit events after {max_pages} pages")
+            return
+        response = next_response.result()
+        page += 1
+
+
+class AuditEventPageCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (page, find_audit_events kwargs): (Future of the find_audit_events response, expiry time)
+        self._pages = {}
+
+    def get(self, key):
+        cached = self._pages.get(key)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+
+    def set(self, key, response_future):
+        with self._lock:
+            now = time.monotonic()
+            self._pages = {
+                cached_key: cached for cached_key, cached in self._pages.items() if now < cached[1]
+            }
+            self._pages[key] = (response_future, now + current_app.config["DM_AUDIT_EVENT_PAGE_CACHE_TTL"])
+
+    def clear(self):
+        self._pages = {}
+
+    @classmethod
+    def init_app(cls, application):
+        application.extensions["audit_event_page_cache"] = cls()
+
+
+def _page_cache_key(page, kwargs):
+    return page, tuple(sorted(kwargs.items()))
+
+
+def find_audit_events_page(client, page, **kwargs):
+    """
+    :return: ``client.find_audit_events(page=page, **kwargs)``, which may have been fetched already by
+             ``prefetch_audit_events_page`` (or may still be being)
+    """
+    response_future = current_app.extensions["audit_event_page_cache"].get(_page_cache_key(page, kwargs))
+    if response_future is not None and response_future.exception() is None:
+        return response_future.result()
+
+    return client.find_audit_events(page=page, **kwargs)
+
+
+def prefetch_audit_events_page(client, page, **kwargs):
+    """Start fetching ``client.find_audit_events(page=page, **kwargs)`` in the background, unless we already are"""
+    cache = current_app.extensions["audit_event_page_cache"]
+    key = _page_cache_key(page, kwargs)
+    if cache.get(key) is not None:
+        return
+
+    thread_pool = get_thread_pool(
+        "audit-event-prefetch",
+        current_app.config['DM_AUDIT_EVENT_PREFETCH_CONCURRENCY'],
+    )
+    # (this can outlive the request, so isn't given its context - it doesn't need it)
+    cache.set(key, thread_pool.submit(partial(client.find_audit_events, page=page, **kwargs)))
+
+
+def clear_audit_event_page_cache():
+    """Forget any pages we've fetched ahead, such as after approving edits, which moves the ones after them"""
+    current_app.extensions["audit_event_page_cache"].clear()
@@ -0,0 +1,153 @@
+"""
+Changing the status of all of a supplier's services on a framework means one API call per service, which for a large
+supplier takes longer than we can keep a request waiting. Instead the updates are made in the background, a limited
+number at a time, with the outcome for each service recorded as it happens so that progress (and any failures) can be
+shown on a page the admin can keep checking.
+
+The record of each set of updates is kept in the Redis instance we use for sessions, so it can be seen whichever worker
+process the admin's next request lands on. Without Redis (e.g. when testing) it is kept in memory instead, which only
+works with a single worker process.
+"""
+import json
+import threading
+import time
+from uuid import uuid4
+
+from dmapiclient import APIError
+from flask import current_app
+
+from .concurrency import get_thread_pool
+
+
+# how long to keep the record of a set of updates for
+BULK_SERVICE_STATUS_UPDATE_TTL = 24 * 60 * 60
+# how long a set of updates can go on for before we take it that the rest of them have been lost (such as with the
+# worker process making them) and stop waiting for them
+BULK_SERVICE_STATUS_UPDATE_TIMEOUT = 60 * 60
+
+
+class RedisBulkServiceStatusUpdateStore:
+    KEY_PREFIX = "bulk-service-status-update"
+
+    def __init__(self, redis):
+        self._redis = redis
+
+    def create(self, update_id, update):
+        self._redis.set(f"{self.KEY_PREFIX}:{update_id}", json.dumps(update), ex=BULK_SERVICE_STATUS_UPDATE_TTL)
+
+    def record_result(self, update_id, service_id, error):
+        results_key = f"{self.KEY_PREFIX}:{update_id}:results"
+        pipeline = self._redis.pipeline()
+        pipeline.hset(results_key, service_id, json.dumps(error))
+        pipeline.expire(results_key, BULK_SERVICE_STATUS_UPDATE_TTL)
+        pipeline.execute()
+
+    def get(self, update_id):
+        update = self._redis.get(f"{self.KEY_PREFIX}:{update_id}")
+        if update is None:
+            return None
+
+        update = json.loads(update)
+        update["results"] = {
+            service_id.decode(): json.loads(error)
+            for service_id, error in self._redis.hgetall(f"{self.KEY_PREFIX}:{update_id}:results").items()
+        }
+        return update
+
+
+class InMemoryBulkServiceStatusUpdateStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._updates = {}
+
+    def create(self, update_id, update):
+        with self._lock:
+            self._updates[update_id] = {**update, "results": {}}
+
+    def record_result(self, update_id, service_id, error):
+        with self._lock:
+            self._updates[update_id]["results"][service_id] = error
+
+    def get(self, update_id):
+        with self._lock:
+            update = self._updates.get(update_id)
+            return None if update is None else {**update, "results": dict(update["results"])}
+
+
+def init_app(application):
+    redis = application.config.get("SESSION_REDIS")
+    application.extensions["bulk_service_status_update_store"] = (
+        RedisBulkServiceStatusUpdateStore(redis) if redis else InMemoryBulkServiceStatusUpdateStore()
+    )
+
+
+def _update_service_status(store, logger, client, update_id, service_id, new_status, updated_by):
+    try:
+        client.update_service_status(service_id, new_status, updated_by, wait_for_index=False)
+    except APIError as e:
+        logger.warning(f"Failed to set status of service {service_id} to {new_status}: {e}")
+        store.record_result(update_id, service_id, e.message)
+    except Exception:
+        # whatever went wrong, we still need to record *something* for the service or the update will never finish
+        logger.exception(f"Failed to set status of service {service_id} to {new_status}")
+        store.record_result(update_id, service_id, "Unexpected error")
+    else:
+        store.record_result(update_id, service_id, None)
+
+
+def start_bulk_service_status_update(client, services, new_status, updated_by, **details):
+    """
+    Start setting the status of each of ``services`` to ``new_status`` in the background.
+
+    :param details: anything else to be kept with the record of the update, e.g. for displaying progress
+    :return: the id of the update, for use with ``get_bulk_service_status_update``
+    """
+    store = current_app.extensions["bulk_service_status_update_store"]
+    update_id = uuid4().hex
+    store.create(update_id, {
+        **details,
+        "newStatus": new_status,
+        "services": {service["id"]: service["serviceName"] for service in services},
+        "startedAt": time.time(),
+    })
+
+    # the pool is shared by all updates in this process, so it also limits how hard we can hit the API between them
+    thread_pool = get_thread_pool(
+        "bulk-service-status-update",
+        current_app.config["DM_BULK_SERVICE_STATUS_UPDATE_CONCURRENCY"],
+    )
+    for service in services:
+        thread_pool.submit(
+            _update_service_status,
+            store,
+            current_app.logger,
+            client,
+            update_id,
+            service["id"],
+            new_status,
+            updated_by,
+        )
+
+    return update_id
+
+
+def get_bulk_service_status_update(update_id):
+    """
+    :return: the record of the update with ``update_id``, or None if there isn't one. Along with any details it was
+             started with, this has ``services`` (service id: name), ``results`` (service id: None if its status was
+             updated successfully, otherwise an error message) for the services which have been dealt with so far,
+             ``complete`` and ``failures`` (service id: error message) summarising these, and ``stalled`` if it has
+             gone on for longer than ``BULK_SERVICE_STATUS_UPDATE_TIMEOUT`` seconds without being completed.
+    """
+    update = current_app.extensions["bulk_service_status_update_store"].get(update_id)
+    if update is None:
+        return None
+
+    update["complete"] = len(update["results"]) == len(update["services"])
+    update["stalled"] = (
+        not update["complete"] and time.time() - update["startedAt"] > BULK_SERVICE_STATUS_UPDATE_TIMEOUT
+    )
+    update["failures"] = {
+        service_id: error for service_id, error in update["results"].items() if error is not None
+    }
+    return update
@@ -0,0 +1,111 @@
+"""
+Building a csv of every buyer means fetching every buyer from the API, so rather than doing that whenever someone
+wants to download one, the ``generate-buyer-reports`` command saves them to the reports bucket, from which they can be
+served (if they're recent enough) the same way as the supplier reports.
+"""
+from collections import namedtuple
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+import json
+from tempfile import TemporaryFile
+
+from dmutils import s3
+from dmutils.documents import get_signed_url
+from dmutils.formats import DATETIME_FORMAT
+from flask import current_app
+
+from .user_downloads import generate_user_csv
+
+
+BuyerReport = namedtuple("BuyerReport", ("path", "download_filename_prefix", "include_user"))
+
+BUYER_REPORTS = {
+    "all": BuyerReport(
+        "buyers/reports/all-buyers.csv",
+        "all-buyers",
+        lambda user: True,
+    ),
+    "user-research": BuyerReport(
+        "buyers/reports/user-research-buyers.csv",
+        "user-research-buyers",
+        lambda user: user["userResearchOptedIn"],
+    ),
+}
+
+# the only fields of each buyer used by ``generate_user_csv``
+BUYER_REPORT_FIELDS = ("emailAddress", "name")
+
+
+def _iter_spooled_users(spool_file):
+    spool_file.seek(0)
+    for line in spool_file:
+        yield json.loads(line)
+
+
+def generate_buyer_reports(client):
+    """
+    Save a csv of the buyers for each of the ``BUYER_REPORTS`` to the reports bucket.
+
+    :return: the paths of the saved reports
+    """
+    reports_bucket = s3.S3(current_app.config["DM_REPORTS_BUCKET"])
+    generated_at = datetime.utcnow()
+
+    with ExitStack() as exit_stack:
+        # fetch the buyers just once, spooling the ones each report needs to a temporary file for it
+        spool_files = {
+            report_type: exit_stack.enter_context(TemporaryFile("w+", encoding="utf-8"))
+            for report_type in BUYER_REPORTS
+        }
+        for user in client.find_users_iter(role="buyer"):
+            spooled_user = None
+            for report_type, report in BUYER_REPORTS.items():
+                if report.include_user(user):
+                    if spooled_user is None:
+                        spooled_user = json.dumps(
+                            {field: user[field] for field in BUYER_REPORT_FIELDS if field in user}
+                        ) + "\n"
+                    spool_files[report_type].write(spooled_user)
+
+        for report_type, report in BUYER_REPORTS.items():
+            _save_buyer_report(reports_bucket, report, _iter_spooled_users(spool_files[report_type]), generated_at)
+
+    return [report.path for report in BUYER_REPORTS.values()]
+
+
+def _save_buyer_report(reports_bucket, report, users, generated_at):
+    with TemporaryFile() as report_file:
+        report_file.writelines(generate_user_csv(users))
+        report_file.seek(0)
+        reports_bucket.save(
+            report.path,
+            report_file,
+            acl="bucket-owner-full-control",
+            timestamp=generated_at,
+            download_filename="{}-on-{}.csv".format(
+                report.download_filename_prefix,
+                generated_at.strftime("%Y-%m-%d-at-%H-%M-%S"),
+            ),
+        )
+
+
+def get_fresh_buyer_report_url(report_type):
+    """
+    :return: a signed url for the saved ``report_type`` buyer report, or None if there isn't one or it's older than
+             ``DM_BUYER_REPORT_MAX_AGE`` seconds
+    """
+    if not current_app.config["DM_REPORTS_BUCKET"]:
+        return None
+
+    reports_bucket = s3.S3(current_app.config["DM_REPORTS_BUCKET"])
+    path = BUYER_REPORTS[report_type].path
+
+    key = reports_bucket.get_key(path)
+    if key is None:
+        return None
+
+    generated_at = datetime.strptime(key["last_modified"], DATETIME_FORMAT)
+    if datetime.utcnow() - generated_at > timedelta(seconds=current_app.config["DM_BUYER_REPORT_MAX_AGE"]):
+        return None
+
+    return get_signed_url(reports_bucket, path, current_app.config["DM_ASSETS_URL"])
@@ -0,0 +1,55 @@
+"""
+Listing a framework's communications and clarifications means listing two prefixes of the communications bucket, with
+an extra request to S3 for each file's timestamp, and files are only rarely uploaded or deleted. So the listings are
+kept for ``DM_COMMUNICATIONS_CACHE_TTL`` seconds, and forgotten whenever a file is uploaded or deleted here (though only
+by the worker process which does this - others can show the old listing until it expires).
+"""
+import threading
+import time
+
+from flask import current_app
+
+
+class CommunicationsCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # framework slug: (dict of comm type: tuple of s3 object dicts, expiry time)
+        self._cached = {}
+        # incremented by each invalidation, so listings which were being made at the time aren't kept afterwards
+        self._generation = 0
+
+    def get_communications(self, framework_slug, list_communications):
+        """
+        :param list_communications: a function returning the listings for the framework, used if we have no unexpired
+                                    listings for it
+        """
+        cached = self._cached.get(framework_slug)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+
+        generation = self._generation
+        communications = list_communications()
+        with self._lock:
+            if generation == self._generation:
+                self._cached[framework_slug] = (
+                    communications,
+                    time.monotonic() + current_app.config["DM_COMMUNICATIONS_CACHE_TTL"],
+                )
+        return communications
+
+    def invalidate(self, framework_slug):
+        with self._lock:
+            self._generation += 1
+            self._cached.pop(framework_slug, None)
+
+    @classmethod
+    def init_app(cls, application):
+        application.extensions["communications_cache"] = cls()
+
+
+def get_communications(framework_slug, list_communications):
+    return current_app.extensions["communications_cache"].get_communications(framework_slug, list_communications)
+
+
+def invalidate_communications(framework_slug):
+    current_app.extensions["communications_cache"].invalidate(framework_slug)
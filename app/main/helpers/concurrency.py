@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+
+from flask import _app_ctx_stack, _request_ctx_stack, current_app
+
+
+_thread_pools = {}
+_thread_pools_lock = threading.Lock()
+
+
+def get_thread_pool(name, max_workers):
+    """Return the process-wide thread pool called ``name``, creating it with ``max_workers`` threads if need be"""
+    if name not in _thread_pools:
+        with _thread_pools_lock:
+            if name not in _thread_pools:
+                _thread_pools[name] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+    return _thread_pools[name]
+
+
+def _with_context(call):
+    app_ctx = _app_ctx_stack.top
+    request_ctx = _request_ctx_stack.top
+
+    def call_in_context():
+        # rather than pushing copies of the caller's contexts, which would run the app's teardown handlers and close the
+        # caller's request when they were popped, make the caller's own contexts current in this thread for the call
+        if app_ctx is not None:
+            _app_ctx_stack.push(app_ctx)
+        if request_ctx is not None:
+            _request_ctx_stack.push(request_ctx)
+        try:
+            return call()
+        finally:
+            if request_ctx is not None:
+                _request_ctx_stack.pop()
+            if app_ctx is not None:
+                _app_ctx_stack.pop()
+
+    return call_in_context
+
+
+def fan_out(*calls):
+    """
+    Run independent, zero-argument ``calls`` (typically Data API reads, e.g. ``partial(client.get_supplier, 1234)``)
+    concurrently on a process-wide, bounded thread pool, in the current Flask app and request context (so ``g``,
+    ``current_user`` etc. are as the caller sees them).
+
+    Waits for all of them to finish, then returns their results in the same order as ``calls``. If any of them raised,
+    the exception from the first of those (in ``calls`` order) is re-raised, so error handling is as it would have been
+    had the calls been made one after another.
+
+    As the pool is bounded, ``calls`` must not themselves use ``fan_out``.
+    """
+    if len(calls) < 2:
+        return [call() for call in calls]
+
+    executor = get_thread_pool("api-fan-out", current_app.config['DM_API_FAN_OUT_MAX_WORKERS'])
+    futures = [executor.submit(_with_context(call)) for call in calls]
+    wait(futures)
+    return [future.result() for future in futures]
+
+
+def submit_with_context(thread_pool, call):
+    """
+    Start the zero-argument ``call`` on ``thread_pool`` in the current Flask app and request context (as ``fan_out``
+    does), returning its ``Future``. The caller must wait for it to finish (or cancel it) before the request ends.
+    """
+    return thread_pool.submit(_with_context(call))
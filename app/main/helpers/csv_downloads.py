@@ -0,0 +1,45 @@
+import zlib
+
+from flask import Response, request
+
+
+# how much csv to compress before sending what we have so far - big enough to compress well, small enough that the
+# download keeps moving
+GZIP_FLUSH_SIZE = 64 * 1024
+
+
+def gzip_chunks(chunks, flush_size=GZIP_FLUSH_SIZE):
+    """
+    Gzip the byte strings from ``chunks`` as they come, yielding the compressed output whenever another ``flush_size``
+    bytes have gone in (and after the first chunk, so that the start of the download isn't held up).
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    # (starting "full" so that the first chunk is sent straight away)
+    unflushed_size = flush_size
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        unflushed_size += len(chunk)
+        if unflushed_size >= flush_size:
+            compressed += compressor.flush(zlib.Z_SYNC_FLUSH)
+            unflushed_size = 0
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+def csv_download_response(chunks, download_filename):
+    """
+    :param chunks: the csv, as an iterable of byte strings, such as from ``csv_generator.iter_csv``
+    :return: a response streaming the csv, gzipped if the client accepts that
+    """
+    headers = {
+        "Content-Disposition": "attachment;filename={}".format(download_filename),
+        "Content-Type": "text/csv; header=present",
+        "Vary": "Accept-Encoding",
+    }
+    if request.accept_encodings["gzip"]:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(chunks, mimetype='text/csv', headers=headers)
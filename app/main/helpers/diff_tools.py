@@ -1,10 +1,53 @@
+from bisect import bisect_left
+from collections import Counter, deque
 import difflib
-from itertools import chain
+from html import escape
+from itertools import chain, zip_longest
+import re
 
 from dmcontent.questions import Multiquestion
 from flask import Markup, render_template
 from flask._compat import string_types
-from lxml import html
+
+
+# difflib's diffing (which gives the nicest results) compares every removed line with every added line in each block of
+# changed lines, then diffs the most similar pairs character by character, so takes seconds for a long answer that has
+# been rewritten or has very long lines. beyond these limits - the total length of every pair of lines it would compare,
+# across all of the blocks, and the length of any one line - we use a diff of our own with a bounded cost instead
+DIFF_MAX_COMPARED_CHARACTERS = 100000
+DIFF_MAX_LINE_LENGTH = 1000
+# (which still compares replaced lines character by character, pair by pair, until this many characters have been)
+DIFF_MAX_MARKED_UP_CHARACTERS = 20000
+# and beyond this many lines in the two revisions we only show the changed lines, with a few either side of them for
+# context, and at most DIFF_SUMMARY_MAX_CHANGED_LINES of those
+DIFF_SUMMARY_MIN_LINES = 2000
+DIFF_SUMMARY_CONTEXT_LINES = 3
+DIFF_SUMMARY_MAX_CHANGED_LINES = 500
+
+_TAB_SIZE = 8
+
+_CHANGE_START_RE = re.compile("\0[-+^]")
+
+_TRAILING_WHITESPACE_RE = re.compile(r"[^\S ]+\Z")
+
+_NON_EXISTENT_LINE_CELLS = (
+    '<td class="line-number line-non-existent"></td><td class="line-content line-non-existent"></td>'
+)
+
+# what difflib.HtmlDiff showed when neither revision had any lines
+_EMPTY_DIFF_TABLE_ROW = (
+    '            <tr>'
+    '<td class="line-number line-non-existent"></td><td class="line-content line-non-existent"> Empty File </td>'
+    '<td class="line-number line-non-existent"></td><td class="line-content line-non-existent"> Empty File </td>'
+    '</tr>\n'
+)
+
+_SUMMARY_ROW = (
+    '            <tr>'
+    '<td class="line-number"></td><td class="line-content line-summary">{message}</td>'
+    '<td class="line-number"></td><td class="line-content line-summary">{message}</td>'
+    '</tr>\n'
+)
 
 
 def _unpack_question(question):
@@ -31,21 +74,17 @@ def html_diff_tables_from_sections_iter(
         revision_2,
         table_preamble_template=None,
 ):
-    html_diff = difflib.HtmlDiff()
-
     for section in sections:
         for question in chain.from_iterable(_question_iter(question) for question in section['questions']):
             q1, q2 = (r.get(question['id'], []) for r in (revision_1, revision_2,))
             if q1 != q2:
                 q1, q2 = (_get_value_for_difflib(q) for q in (q1, q2,))
-                yield section.slug, question.id, Markup(_clean_difflib_html_table(
-                    html_diff.make_table(q1, q2),
-                    table_preamble_template=table_preamble_template,
-                    table_preamble_context={
-                        "section": section,
-                        "question": question,
-                    },
-                ))
+                table_preamble = render_template(
+                    table_preamble_template,
+                    section=section,
+                    question=question,
+                ) if table_preamble_template else ""
+                yield section.slug, question.id, Markup(_diff_table(q1, q2, table_preamble=table_preamble))
 
 
 def _get_value_for_difflib(thing):
@@ -57,83 +96,258 @@ def _get_value_for_difflib(thing):
         return thing
 
 
-def _strip_nbsp(content):
-    return content.replace(u"\u00a0", u" ")
+def _expand_tabs(line):
+    # as difflib.HtmlDiff does, expand tabs into tab characters rather than spaces so that replacing one with the other
+    # still shows up as a change
+    return line.replace(" ", "\0").expandtabs(_TAB_SIZE).replace(" ", "\t").replace("\0", " ").rstrip("\n")
 
 
-def _strip_element_nbsp(element):
-    element.text = element.text and _strip_nbsp(element.text)
-    element.tail = element.tail and _strip_nbsp(element.tail)
-    for child_element in element:
-        _strip_element_nbsp(child_element)
+def _diff_table(lines_1, lines_2, table_preamble=""):
+    # we used to generate these tables with difflib.HtmlDiff, then parse its output with lxml to strip out the things we
+    # didn't want and restyle the rest. we still pair up the lines and find the changes within them exactly as HtmlDiff
+    # does (with difflib._mdiff, which marks changed text with "\0+", "\0-" or "\0^" before it and "\1" after it), but
+    # render the rows we want directly, which for a long service description is several times quicker. when that would
+    # be too slow we diff the lines ourselves instead (see DIFF_MAX_COMPARED_CHARACTERS), in the same form.
+    lines_1 = [_expand_tabs(line) for line in lines_1]
+    lines_2 = [_expand_tabs(line) for line in lines_2]
+    opcodes = _patience_opcodes(lines_1, lines_2)
 
+    if len(lines_1) + len(lines_2) > DIFF_SUMMARY_MIN_LINES:
+        rows = _summarised_diff_rows(_bounded_diff_lines(lines_1, lines_2, opcodes))
+    else:
+        if _too_costly_for_difflib(lines_1, lines_2, opcodes):
+            diff_lines = _bounded_diff_lines(lines_1, lines_2, opcodes)
+        else:
+            diff_lines = ((line_1, line_2) for line_1, line_2, _ in difflib._mdiff(lines_1, lines_2))
+        rows = "".join(_diff_table_row(line_1, line_2) for line_1, line_2 in diff_lines)
 
-def _clean_difflib_html_table(table_src, table_preamble_template=None, table_preamble_context={}):
-    # difflib doesn't produce html *quite* how we would like, so we do the admittedly slightly strange thing here of
-    # parsing it, modifying the result in-place and re-serializing it for rendering. this is, in my opinion, the least-
-    # worst thing to do, because it allows us to take advantage of the (well tested) logic of difflib.HtmlDiff while
-    # just adding relatively simple style-mangling code of our own.
-    #
-    # another (perhaps more obvious) alternative to this would have been to adapt our stytles to difflib's output,
-    # but... frankly our style scheme for this is more well thought out and, more importantly, already cross-browser
-    # tested.
-    table_element = html.fragment_fromstring(table_src)
+    return "<table>\n        {}<tbody>\n{}        </tbody>\n    </table>".format(
+        table_preamble,
+        rows or _EMPTY_DIFF_TABLE_ROW,
+    )
 
-    # colgroups not wanted
-    for colgroup in table_element.xpath(".//colgroup"):
-        colgroup.getparent().remove(colgroup)
 
-    # column of links not wanted
-    for diff_next in table_element.xpath(".//td[@class='diff_next']"):
-        diff_next.getparent().remove(diff_next)
+def _too_costly_for_difflib(lines_1, lines_2, opcodes):
+    compared_characters = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            continue
+        if any(len(line) > DIFF_MAX_LINE_LENGTH for line in chain(lines_1[i1:i2], lines_2[j1:j2])):
+            return True
+        # each of the removed lines is compared with each of the added lines
+        compared_characters += (
+            (j2 - j1) * sum(len(line) for line in lines_1[i1:i2])
+            + (i2 - i1) * sum(len(line) for line in lines_2[j1:j2])
+        )
+        if compared_characters > DIFF_MAX_COMPARED_CHARACTERS:
+            return True
+    return False
 
-    # this isn't even valid html5 anymore
-    for td_nowrap in table_element.xpath(".//td[@nowrap]"):
-        del td_nowrap.attrib["nowrap"]
 
-    for key in table_element.keys():
-        del table_element.attrib[key]
+def _patience_opcodes(lines_1, lines_2):
+    """
+    Line-by-line differences between ``lines_1`` and ``lines_2`` in the form of ``SequenceMatcher.get_opcodes()``,
+    found by patience diffing: matching up the lines that appear exactly once in each and then doing the same between
+    each pair of those. Any stretch left without such lines (or which it has become too costly to keep looking in) is
+    treated as replaced outright, so this takes roughly linear time however the two differ.
+    """
+    matches = []
+    # the number of lines we're prepared to look through in total
+    budget = 10 * (len(lines_1) + len(lines_2))
+    ranges = [(0, len(lines_1), 0, len(lines_2))]
+    while ranges:
+        lo_1, hi_1, lo_2, hi_2 = ranges.pop()
+        while lo_1 < hi_1 and lo_2 < hi_2 and lines_1[lo_1] == lines_2[lo_2]:
+            matches.append((lo_1, lo_2))
+            lo_1, lo_2 = lo_1 + 1, lo_2 + 1
+        while lo_1 < hi_1 and lo_2 < hi_2 and lines_1[hi_1 - 1] == lines_2[hi_2 - 1]:
+            hi_1, hi_2 = hi_1 - 1, hi_2 - 1
+            matches.append((hi_1, hi_2))
+        if lo_1 == hi_1 or lo_2 == hi_2 or budget <= 0:
+            continue
+        budget -= (hi_1 - lo_1) + (hi_2 - lo_2)
 
-    # we can't really safely use ids (who knows if we're going to use >1 of these in a page?)
-    for element in table_element.xpath(".//*[@id]"):
-        del element.attrib["id"]
+        anchors = _unique_line_anchors(lines_1, lo_1, hi_1, lines_2, lo_2, hi_2)
+        for i, j in anchors:
+            matches.append((i, j))
+            ranges.append((lo_1, i, lo_2, j))
+            lo_1, lo_2 = i + 1, j + 1
+        if anchors:
+            ranges.append((lo_1, hi_1, lo_2, hi_2))
 
-    # difflib very helpfully replaces all our spaces with nbsp, which is not something we want
-    _strip_element_nbsp(table_element.xpath("./tbody")[0])
+    opcodes = []
+    i = j = 0
+    for match_i, match_j in chain(sorted(matches), ((len(lines_1), len(lines_2)),)):
+        if i < match_i or j < match_j:
+            tag = "replace" if i < match_i and j < match_j else "delete" if i < match_i else "insert"
+            opcodes.append((tag, i, match_i, j, match_j))
+        if match_i < len(lines_1):
+            if opcodes and opcodes[-1][0] == "equal" and opcodes[-1][2:5:2] == (match_i, match_j):
+                opcodes[-1] = ("equal", opcodes[-1][1], match_i + 1, opcodes[-1][3], match_j + 1)
+            else:
+                opcodes.append(("equal", match_i, match_i + 1, match_j, match_j + 1))
+        i, j = match_i + 1, match_j + 1
 
-    for line_number_td in table_element.xpath(".//td[@class='diff_header']"):
-        line_number_td.attrib["class"] = "line-number"
+    return opcodes
 
-    for tr in table_element.xpath("./tbody/tr"):
-        tr[0].attrib["class"] = tr[2].attrib["class"] = "line-number"
-        tr[1].attrib["class"] = tr[3].attrib["class"] = "line-content"
 
-        if (tr[0].text or "").strip() or len(tr[0]):  # i.e. left side has what is presumably a line number
-            if len(tr[1]):  # i.e. left side is interesting because the content has (presumably span.diff_*) child elems
-                tr[0].attrib["class"] += " line-number-removal"
-                tr[1].attrib["class"] += " removal"
-                for span in tr[1].xpath("./span[@class='diff_sub' or @class='diff_chg']"):
-                    span.tag = "del"
-                    del span.attrib["class"]
+def _unique_line_anchors(lines_1, lo_1, hi_1, lines_2, lo_2, hi_2):
+    """
+    :return: the longest in-order sequence of (i, j) where ``lines_1[i] == lines_2[j]`` is a line appearing exactly once
+             in each of the two ranges
+    """
+    counts_1 = Counter(lines_1[lo_1:hi_1])
+    counts_2 = Counter(lines_2[lo_2:hi_2])
+    positions_2 = {line: j for j, line in enumerate(lines_2[lo_2:hi_2], lo_2) if counts_2[line] == 1}
+    candidates = [
+        (i, positions_2[line]) for i, line in enumerate(lines_1[lo_1:hi_1], lo_1)
+        if counts_1[line] == 1 and line in positions_2
+    ]
+
+    # longest increasing subsequence of the candidates' j, by patience sorting
+    pile_tops, pile_top_candidates, predecessors = [], [], []
+    for index, (i, j) in enumerate(candidates):
+        pile = bisect_left(pile_tops, j)
+        predecessors.append(pile_top_candidates[pile - 1] if pile else None)
+        if pile == len(pile_tops):
+            pile_tops.append(j)
+            pile_top_candidates.append(index)
         else:
-            tr[0].attrib["class"] += " line-non-existent"
-            tr[1].attrib["class"] += " line-non-existent"
-
-        if (tr[2].text or "").strip() or len(tr[2]):  # i.e. right side has what is presumably a line number
-            if len(tr[3]):  # i.e. right side's interesting because the content has (presumably span.diff_*) child elems
-                tr[2].attrib["class"] += " line-number-addition"
-                tr[3].attrib["class"] += " addition"
-                for span in tr[3].xpath("./span[@class='diff_add' or @class='diff_chg']"):
-                    span.tag = "ins"
-                    del span.attrib["class"]
+            pile_tops[pile] = j
+            pile_top_candidates[pile] = index
+
+    anchors = []
+    index = pile_top_candidates[-1] if pile_top_candidates else None
+    while index is not None:
+        anchors.append(candidates[index])
+        index = predecessors[index]
+    return anchors[::-1]
+
+
+def _bounded_diff_lines(lines_1, lines_2, opcodes):
+    """
+    :return: pairs of lines to show side by side in the same form as ``difflib._mdiff`` gives them, from ``opcodes``.
+             Replaced lines are paired up in order, and those short enough to compare character by character are,
+             until ``DIFF_MAX_MARKED_UP_CHARACTERS`` characters have been.
+    """
+    characters_to_compare = DIFF_MAX_MARKED_UP_CHARACTERS
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                yield (i + 1, lines_1[i]), (j + 1, lines_2[j])
+            continue
+
+        for i, j in zip_longest(range(i1, i2), range(j1, j2)):
+            if i is None:
+                yield ("", "\n"), (j + 1, _marked(lines_2[j], "+"))
+            elif j is None:
+                yield (i + 1, _marked(lines_1[i], "-")), ("", "\n")
+            elif (
+                characters_to_compare > 0
+                and len(lines_1[i]) <= DIFF_MAX_LINE_LENGTH
+                and len(lines_2[j]) <= DIFF_MAX_LINE_LENGTH
+            ):
+                characters_to_compare -= len(lines_1[i]) + len(lines_2[j])
+                yield _compared_lines(i + 1, lines_1[i], j + 1, lines_2[j])
+            else:
+                yield (i + 1, _marked(lines_1[i], "-")), (j + 1, _marked(lines_2[j], "+"))
+
+
+def _compared_lines(line_number_1, line_1, line_number_2, line_2):
+    matcher = difflib.SequenceMatcher(difflib.IS_CHARACTER_JUNK, line_1, line_2)
+    # (the same cutoff ndiff uses to decide whether two lines are similar enough to be worth marking up like this)
+    if matcher.ratio() < 0.75:
+        return (line_number_1, _marked(line_1, "-")), (line_number_2, _marked(line_2, "+"))
+
+    marked_1, marked_2 = [], []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            marked_1.append(line_1[i1:i2])
+            marked_2.append(line_2[j1:j2])
+            continue
+        if i1 < i2:
+            marked_1.append(_marked(line_1[i1:i2], "^" if tag == "replace" else "-"))
+        if j1 < j2:
+            marked_2.append(_marked(line_2[j1:j2], "^" if tag == "replace" else "+"))
+
+    return (line_number_1, "".join(marked_1)), (line_number_2, "".join(marked_2))
+
+
+def _marked(line, change):
+    # (as difflib does, giving an empty line a space so there's something to highlight)
+    return "\0{}{}\1".format(change, line or " ")
+
+
+def _summarised_diff_rows(diff_lines):
+    rows = []
+    # the last few unchanged lines, to show if a change comes next
+    unchanged_lines = deque(maxlen=DIFF_SUMMARY_CONTEXT_LINES)
+    unchanged_lines_not_shown = changed_lines_not_shown = changed_lines_shown = 0
+    lines_since_change = None
+    for line_1, line_2 in diff_lines:
+        if "\1" not in line_1[1] and "\1" not in line_2[1]:
+            if lines_since_change is not None and lines_since_change < DIFF_SUMMARY_CONTEXT_LINES:
+                rows.append(_diff_table_row(line_1, line_2))
+                lines_since_change += 1
+            else:
+                if len(unchanged_lines) == unchanged_lines.maxlen:
+                    unchanged_lines_not_shown += 1
+                unchanged_lines.append((line_1, line_2))
+        elif changed_lines_shown == DIFF_SUMMARY_MAX_CHANGED_LINES:
+            changed_lines_not_shown += 1
         else:
-            tr[2].attrib["class"] += " line-non-existent"
-            tr[3].attrib["class"] += " line-non-existent"
+            if unchanged_lines_not_shown:
+                rows.append(_summary_row("{} unchanged line{} not shown", unchanged_lines_not_shown))
+            rows.extend(_diff_table_row(*lines) for lines in unchanged_lines)
+            rows.append(_diff_table_row(line_1, line_2))
+            unchanged_lines.clear()
+            unchanged_lines_not_shown, lines_since_change = 0, 0
+            changed_lines_shown += 1
+
+    if changed_lines_not_shown:
+        rows.append(_summary_row("{} more changed line{} not shown", changed_lines_not_shown))
+    elif unchanged_lines_not_shown + len(unchanged_lines):
+        rows.append(_summary_row("{} unchanged line{} not shown", unchanged_lines_not_shown + len(unchanged_lines)))
+
+    return "".join(rows)
+
+
+def _summary_row(message, number_of_lines):
+    return _SUMMARY_ROW.format(message=message.format(number_of_lines, "" if number_of_lines == 1 else "s"))
+
+
+def _diff_table_row(line_1, line_2):
+    return "            <tr>{}{}</tr>\n".format(
+        _diff_table_cells(line_1, "removal", "del"),
+        _diff_table_cells(line_2, "addition", "ins"),
+    )
+
+
+def _diff_table_cells(line, change_type, change_tag):
+    line_number, text = line
+    if line_number == "":
+        # the other side has a line here which this side doesn't
+        return _NON_EXISTENT_LINE_CELLS
+
+    # trailing whitespace is dropped, but not trailing spaces (which difflib would have made &nbsp;s by then)
+    text = _TRAILING_WHITESPACE_RE.sub("", escape(text, quote=False))
+    if "\1" not in text:
+        return '<td class="line-number">{}</td><td class="line-content">{}</td>'.format(
+            line_number,
+            _plain_spaces(text),
+        )
+
+    return (
+        '<td class="line-number line-number-{change_type}">{line_number}</td>'
+        '<td class="line-content {change_type}">{text}</td>'
+    ).format(
+        change_type=change_type,
+        line_number=line_number,
+        text=_CHANGE_START_RE.sub("<{}>".format(change_tag), _plain_spaces(text)).replace(
+            "\1", "</{}>".format(change_tag),
+        ),
+    )
 
-    if table_preamble_template:
-        preamble_src = render_template(table_preamble_template, **table_preamble_context)
-        preamble_elements = html.fragments_fromstring(preamble_src)
-        for element in reversed(preamble_elements):
-            table_element.insert(0, element)
 
-    return html.tostring(table_element, encoding="unicode")
+def _plain_spaces(content):
+    return content.replace(u"\t", u" ").replace(u"\u00a0", u" ")
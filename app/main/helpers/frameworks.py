@@ -1,13 +1,161 @@
-from flask import abort
+from collections import defaultdict
+import threading
+import time
+
+from dmapiclient import APIError, HTTPError
+from flask import abort, current_app
+
+from ...metrics import FRAMEWORK_CACHE_LOOKUPS_TOTAL
 
 
 def get_framework_or_404(client, framework_slug, allowed_statuses=None):
     if allowed_statuses is None:
         allowed_statuses = ['open', 'pending', 'standstill', 'live']
 
-    framework = client.get_framework(framework_slug)['frameworks']
+    framework = current_app.extensions['framework_registry'].get_framework(client, framework_slug)
+    if framework is None:
+        abort(404)
 
     if allowed_statuses and framework['status'] not in allowed_statuses:
         abort(404)
 
     return framework
+
+
+class Frameworks:
+    """
+    An immutable, indexed snapshot of the list of frameworks. Iterating over it gives the framework dicts in the order
+    the API returned them. The dicts themselves are shared between requests so must not be modified.
+    """
+    def __init__(self, frameworks):
+        self._frameworks = tuple(frameworks)
+        self._by_slug = {framework['slug']: framework for framework in self._frameworks}
+        self._by_family = defaultdict(list)
+        self._by_status = defaultdict(list)
+        for framework in self._frameworks:
+            self._by_family[framework.get('family')].append(framework)
+            self._by_status[framework.get('status')].append(framework)
+
+    def __iter__(self):
+        return iter(self._frameworks)
+
+    def __len__(self):
+        return len(self._frameworks)
+
+    def get(self, framework_slug):
+        """The framework with ``framework_slug``, or None if there isn't one"""
+        return self._by_slug.get(framework_slug)
+
+    def in_family(self, framework_family):
+        return list(self._by_family.get(framework_family, ()))
+
+    def with_status(self, *statuses):
+        """Frameworks with any of ``statuses``, in the order the API returned them"""
+        if len(statuses) == 1:
+            return list(self._by_status.get(statuses[0], ()))
+        return [framework for framework in self._frameworks if framework.get('status') in statuses]
+
+
+class FrameworkRegistry:
+    """
+    Holds the list of frameworks for ``DM_FRAMEWORKS_CACHE_TTL`` seconds, as it changes only a few times a year but is
+    needed by most pages. When the list has expired only one thread fetches it again, any others that want it in the
+    meantime wait for that fetch rather than making their own. Should the fetch fail we carry on with the expired list
+    (if we have one) and try again next time.
+
+    Individual frameworks are also kept for ``DM_FRAMEWORK_CACHE_TTL`` seconds, including the fact that a framework
+    *doesn't* exist. As any slug in a URL ends up being looked up, at most ``DM_FRAMEWORK_CACHE_SIZE`` of these are
+    kept, and expired ones are dropped whenever another is added.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_by_slug = threading.Lock()
+        # (Frameworks, expiry time), replaced as a whole so readers never see a mismatched pair
+        self._cached = None
+        # framework slug: (framework or None if there's no such framework, expiry time)
+        self._cached_by_slug = {}
+
+    def _get_unexpired(self):
+        cached = self._cached
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+
+    def get_frameworks(self, client):
+        """:return: a ``Frameworks`` index, fetching the list using ``client`` if it has expired"""
+        frameworks = self._get_unexpired()
+        if frameworks is not None:
+            return frameworks
+
+        with self._lock:
+            # another thread may have refreshed the list while we were waiting for the lock
+            frameworks = self._get_unexpired()
+            if frameworks is not None:
+                return frameworks
+
+            try:
+                frameworks = Frameworks(client.find_frameworks()['frameworks'])
+            except APIError as e:
+                if self._cached is None:
+                    raise
+                current_app.logger.warning(f"Failed to refresh frameworks, using expired list: {e}")
+                return self._cached[0]
+
+            self._cached = (frameworks, time.monotonic() + current_app.config['DM_FRAMEWORKS_CACHE_TTL'])
+            return frameworks
+
+    def get_framework(self, client, framework_slug):
+        """:return: the framework with ``framework_slug``, or None if there isn't one"""
+        cached = self._cached_by_slug.get(framework_slug)
+        if cached is not None and time.monotonic() < cached[1]:
+            FRAMEWORK_CACHE_LOOKUPS_TOTAL.labels(result='hit').inc()
+            return cached[0]
+
+        FRAMEWORK_CACHE_LOOKUPS_TOTAL.labels(result='miss').inc()
+        try:
+            framework = client.get_framework(framework_slug)['frameworks']
+        except HTTPError as e:
+            if e.status_code != 404:
+                raise
+            framework = None
+
+        with self._lock_by_slug:
+            now = time.monotonic()
+            cached_by_slug = {
+                cached_slug: cached for cached_slug, cached in self._cached_by_slug.items()
+                if now < cached[1] and cached_slug != framework_slug
+            }
+            # (dicts keep insertion order, so the first is the one which has been kept longest)
+            while cached_by_slug and len(cached_by_slug) >= current_app.config['DM_FRAMEWORK_CACHE_SIZE']:
+                del cached_by_slug[next(iter(cached_by_slug))]
+            cached_by_slug[framework_slug] = (framework, now + current_app.config['DM_FRAMEWORK_CACHE_TTL'])
+            # replaced as a whole so readers never see it part way through being changed
+            self._cached_by_slug = cached_by_slug
+
+        return framework
+
+    def __len__(self):
+        """The number of individual frameworks being kept"""
+        return len(self._cached_by_slug)
+
+    def invalidate(self):
+        """
+        Make the next ``get_frameworks`` fetch the list again, and the next ``get_framework`` fetch the framework again
+        (or look again for one we found didn't exist), e.g. after a change to a framework
+        """
+        with self._lock:
+            self._cached = None
+        with self._lock_by_slug:
+            self._cached_by_slug = {}
+
+    @classmethod
+    def init_app(cls, application):
+        application.extensions['framework_registry'] = cls()
+
+
+def get_frameworks(client):
+    """:return: the current application's cached ``Frameworks`` index"""
+    return current_app.extensions['framework_registry'].get_frameworks(client)
+
+
+def invalidate_frameworks():
+    current_app.extensions['framework_registry'].invalidate()
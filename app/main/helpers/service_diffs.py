@@ -0,0 +1,63 @@
+"""
+The diffs shown when reviewing a service's edits are between an archived service (which never changes) and the current
+version of the service (which only changes along with its ``updatedAt``), so once rendered we can keep hold of them for
+as long as there's room - category admins tend to come back to the same service's edits again and again.
+"""
+from collections import OrderedDict
+import threading
+
+from flask import current_app
+
+
+class ServiceDiffCache:
+    """
+    A thread-safe cache of rendered diff tables by (archived service id, service updatedAt), dropping the least
+    recently used once it is full
+    """
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._diffs = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            diffs = self._diffs.get(key)
+            if diffs is not None:
+                self._diffs.move_to_end(key)
+            return diffs
+
+    def set(self, key, diffs):
+        with self._lock:
+            self._diffs[key] = diffs
+            self._diffs.move_to_end(key)
+            while len(self._diffs) > self._max_size:
+                self._diffs.popitem(last=False)
+
+    def __len__(self):
+        return len(self._diffs)
+
+    @classmethod
+    def init_app(cls, application):
+        application.extensions['service_diff_cache'] = cls(application.config['DM_SERVICE_DIFF_CACHE_SIZE'])
+
+
+def iter_service_diffs(archived_service_id, service_updated_at, render_diffs):
+    """
+    :param render_diffs: a function returning an iterator of (question id, diff table html) for the differences between
+                         the archived service and the service, used if we haven't already got them
+    :return: an iterator of (question id, diff table html), rendering each only as it's needed if they aren't cached
+    """
+    cache = current_app.extensions['service_diff_cache']
+    key = (archived_service_id, service_updated_at)
+
+    diffs = cache.get(key)
+    if diffs is not None:
+        yield from diffs
+        return
+
+    diffs = []
+    for diff in render_diffs():
+        diffs.append(diff)
+        yield diff
+    # (only once we have them all - the client may have gone away part way through)
+    cache.set(key, tuple(diffs))
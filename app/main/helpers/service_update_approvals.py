@@ -0,0 +1,120 @@
+"""
+Approving edits to services one at a time means a round trip to check each edit, another to approve it and a reload of
+the queue of edits in between. Instead admins can choose a number of edits from the queue to approve at once: all of
+the chosen edits are checked together, then approved a limited number at a time, with the outcome for each service
+reported back.
+"""
+from dmapiclient import APIError, HTTPError
+from dmapiclient.audit import AuditTypes
+from flask import current_app
+
+from .audit_events import clear_audit_event_page_cache
+from .concurrency import get_thread_pool
+
+
+NOT_A_SERVICE_EDIT_ERROR = "This is not an edit to a service."
+ALREADY_APPROVED_ERROR = "This edit has already been approved."
+
+
+def _get_audit_event(client, audit_event_id):
+    try:
+        return client.get_audit_event(audit_event_id)["auditEvents"]
+    except HTTPError as e:
+        if e.status_code == 404:
+            return None
+        raise
+
+
+def _get_service_update(client, audit_event_id):
+    """
+    :return: the audit event with ``audit_event_id`` (None if there isn't one) and, if it is an edit to a service, the
+             latest of that service's edits yet to be approved (None if there aren't any)
+    """
+    audit_event = _get_audit_event(client, audit_event_id)
+    if audit_event is None or audit_event["type"] != AuditTypes.update_service.value:
+        return audit_event, None
+
+    # the queue of edits shows each service's earliest edit yet to be approved, but all of them are being approved
+    latest_audit_events = client.find_audit_events(
+        object_type="services",
+        object_id=audit_event["data"]["serviceId"],
+        audit_type=AuditTypes.update_service,
+        acknowledged="false",
+        latest_first="true",
+    )["auditEvents"]
+    return audit_event, latest_audit_events[0] if latest_audit_events else None
+
+
+def _approve_service_update(logger, client, audit_event, approved_by):
+    service_id = audit_event["data"]["serviceId"]
+    try:
+        client.acknowledge_service_update_including_previous(service_id, audit_event["id"], approved_by)
+    except APIError as e:
+        logger.warning(f"Failed to approve edit {audit_event['id']} to service {service_id}: {e}")
+        return e.message
+    except Exception:
+        logger.exception(f"Failed to approve edit {audit_event['id']} to service {service_id}")
+        return "Unexpected error"
+
+
+def approve_service_updates(client, audit_event_ids, approved_by):
+    """
+    Approve the edits to services recorded by each of the ``update_service`` audit events with ``audit_event_ids``,
+    along with any other edits to the same services yet to be approved.
+
+    :return: a list of the outcome for each audit event, in the order given, as a dict of its ``auditEventId``,
+             ``serviceId`` and ``supplierName`` (both None if it isn't an edit to a service) and ``error`` (None if the
+             edit was approved, otherwise a message saying why not)
+    """
+    thread_pool = get_thread_pool(
+        "service-update-approval",
+        current_app.config["DM_SERVICE_UPDATE_APPROVAL_CONCURRENCY"],
+    )
+    # (ignoring any duplicates)
+    audit_event_ids = tuple(dict.fromkeys(audit_event_ids))
+
+    # check all of them before approving any, so that a bad choice doesn't leave only some of them approved
+    service_updates = tuple(thread_pool.map(
+        lambda audit_event_id: _get_service_update(client, audit_event_id),
+        audit_event_ids,
+    ))
+
+    results = []
+    # {the chosen audit event id: the latest audit event of the service's edits}
+    to_approve = {}
+    for audit_event_id, (audit_event, latest_audit_event) in zip(audit_event_ids, service_updates):
+        if audit_event is None or audit_event["type"] != AuditTypes.update_service.value:
+            results.append({
+                "auditEventId": audit_event_id,
+                "serviceId": None,
+                "supplierName": None,
+                "error": NOT_A_SERVICE_EDIT_ERROR,
+            })
+            continue
+
+        results.append({
+            "auditEventId": audit_event_id,
+            "serviceId": audit_event["data"]["serviceId"],
+            "supplierName": audit_event["data"].get("supplierName"),
+            "error": ALREADY_APPROVED_ERROR if latest_audit_event is None else None,
+        })
+        if latest_audit_event is not None:
+            to_approve[audit_event_id] = latest_audit_event
+
+    # (the approvals are made outside of the app context)
+    logger = current_app.logger
+    # (more than one of the chosen edits may be to the same service)
+    latest_audit_events = {audit_event["id"]: audit_event for audit_event in to_approve.values()}
+    errors = thread_pool.map(
+        lambda audit_event: _approve_service_update(logger, client, audit_event, approved_by),
+        latest_audit_events.values(),
+    )
+    errors = dict(zip(latest_audit_events.keys(), errors))
+    for result in results:
+        if result["auditEventId"] in to_approve:
+            result["error"] = errors[to_approve[result["auditEventId"]]["id"]]
+
+    if to_approve:
+        clear_audit_event_page_cache()
+
+    return results
@@ -0,0 +1,37 @@
+from dmutils.flask import SLOW_RENDER_THRESHOLD
+from dmutils.timing import logged_duration
+from flask import Response, current_app, get_flashed_messages, stream_with_context
+from flask_wtf.csrf import generate_csrf
+
+
+def _timed_generate(template, context):
+    # logged just as timed_render_template logs the time rendering other pages takes, though only once the whole page
+    # has been sent
+    with logged_duration(
+        message="Spent {duration_real}s in render_template",
+        condition=lambda log_context: (
+            logged_duration.default_condition(log_context)
+            or log_context["duration_real"] > SLOW_RENDER_THRESHOLD
+        ),
+    ):
+        yield from template.generate(context)
+
+
+def stream_template(template_name, **context):
+    """
+    Like ``render_template``, but returning a response which sends the page as it is rendered, so the top of a slow
+    page reaches the browser before the rest is ready. Any iterators in ``context`` are only consumed as the template
+    gets to them.
+
+    As the status and headers are sent before the template is rendered, an error part way through rendering it can't
+    become a 500 response: the page is just cut short where the error happened (which is still logged).
+    """
+    # the session has to have everything the template will want from it before the response headers are sent, and
+    # lose any flashed messages the template will show. (get_flashed_messages keeps the messages it takes from the
+    # session for the rest of the request, so the template still gets these ones when it asks for them)
+    generate_csrf()
+    get_flashed_messages(with_categories=True)
+
+    current_app.update_template_context(context)
+    template = current_app.jinja_env.get_or_select_template(template_name)
+    return Response(stream_with_context(_timed_generate(template, context)), mimetype="text/html")
@@ -1,14 +1,60 @@
+from heapq import merge
+from itertools import islice
+import json
+from tempfile import TemporaryFile
+
 from dmutils import csv_generator
 
 
-def generate_user_csv(users):
+# how many users to sort in memory at once - any more than this and they're sorted in chunks of this size, spilled to
+# temporary files and merged back together as the csv is written
+USER_CSV_SORT_CHUNK_SIZE = 10000
+
+
+def _iter_spilled_chunk(chunk_file):
+    chunk_file.seek(0)
+    for line in chunk_file:
+        yield tuple(json.loads(line))
+
+
+def _sorted_with_spill(items, key, chunk_size):
+    """
+    Like ``sorted(items, key=key)``, but never holds more than ``chunk_size`` items in memory while doing it. Items
+    must be JSON-serialisable tuples.
+    """
+    items = iter(items)
+    chunk = sorted(islice(items, chunk_size), key=key)
+    if len(chunk) < chunk_size:
+        # it all fitted in memory after all
+        yield from chunk
+        return
+
+    chunk_files = []
+    try:
+        while chunk:
+            chunk_file = TemporaryFile("w+", encoding="utf-8")
+            chunk_files.append(chunk_file)
+            chunk_file.writelines(json.dumps(item) + "\n" for item in chunk)
+            chunk = sorted(islice(items, chunk_size), key=key)
+
+        # heapq.merge favours earlier iterables when keys are equal, so this is stable just like sorted()
+        yield from merge(*(_iter_spilled_chunk(chunk_file) for chunk_file in chunk_files), key=key)
+    finally:
+        for chunk_file in chunk_files:
+            chunk_file.close()
+
+
+def generate_user_csv(users, sort_chunk_size=USER_CSV_SORT_CHUNK_SIZE):
     header_row = ("email address", "name")
     user_attributes = ("emailAddress", "name")
 
     def rows_iter():
-        """Iterator yielding header then rows."""
+        """Iterator yielding header then rows, sorted by name."""
         yield header_row
-        for user in sorted(users, key=lambda user: user["name"]):
-            yield (user.get(field_name, "") for field_name in user_attributes)
+        yield from _sorted_with_spill(
+            (tuple(user.get(field_name, "") for field_name in user_attributes) for user in users),
+            key=lambda row: row[1],
+            chunk_size=sort_chunk_size,
+        )
 
     return csv_generator.iter_csv(rows_iter())
@@ -1,47 +1,71 @@
 from distutils.util import strtobool
+from functools import partial
+from itertools import chain
 
 from dmapiclient import HTTPError
 from dmutils.email.user_account_email import send_user_account_email
 from dmutils.forms.helpers import get_errors_from_wtform
 from dmutils.flask import timed_render_template as render_template
-from flask import request, redirect, url_for, flash
+from flask import abort, request, redirect, url_for, flash
 from flask_login import current_user
 
 from .. import main
 from ..auth import role_required
 from ..forms import InviteAdminForm, EditAdminUserForm
+from ..helpers.concurrency import fan_out
 from ... import data_api_client
 
 
 INVITATION_SENT_MESSAGE = "An invitation has been sent to {email_address}."
 EMAIL_ADDRESS_UPDATED_MESSAGE = "{email_address} has been updated."
 
+ADMIN_USER_ROLES = (
+    'admin',
+    'admin-ccs-category',
+    'admin-ccs-sourcing',
+    'admin-framework-manager',
+    'admin-ccs-data-controller',
+)
+ADMIN_USERS_PAGE_SIZE = 100
+
+
+def _admin_users_sort_key(user):
+    # We want to sort so all Active users are above all Suspended users, and alphabetical by name within these groups.
+    # In Python False < True (False is zero, True is one) so sorting on "active is False" puts Active users first.
+    return user['active'] is False, user['name']
+
+
+def _find_users(role):
+    return tuple(data_api_client.find_users_iter(role=role))
+
 
 @main.route('/admin-users', methods=['GET'])
 @role_required('admin-manager')
 def manage_admin_users():
     # The API doesn't support filtering users by multiple roles at once, and it's not worth adding that feature
     # just for this one view that (currently, and for the foreseeable future) will be very rarely used.
-    # In future, if we have many many admin users and/or this page is heavily used we should:
-    # (1) Fix the API to allow fetching all relevant user roles with a single call
-    # (2) Stop using the _iter method and properly paginate this page
-
-    support_users = data_api_client.find_users_iter(role='admin')
-    category_users = data_api_client.find_users_iter(role='admin-ccs-category')
-    sourcing_users = data_api_client.find_users_iter(role='admin-ccs-sourcing')
-    framework_manager_users = data_api_client.find_users_iter(role='admin-framework-manager')
-    data_controller_users = data_api_client.find_users_iter(role='admin-ccs-data-controller')
-
-    # We want to sort so all Active users are above all Suspended users, and alphabetical by name within these groups.
-    # In Python False < True (False is zero, True is one) so sorting on "active is False" puts Active users first.
-    admin_users = sorted(
-        list(support_users) + list(category_users) +
-        list(sourcing_users) + list(framework_manager_users) + list(data_controller_users),
-        key=lambda k: (k['active'] is False, k['name'])
-    )
+    # In future, if we have many many admin users and/or this page is heavily used we should fix the API to allow
+    # fetching all relevant user roles, in order, a page at a time with a single call.
+    # Until then we fetch every role's users (concurrently) and sort them all, and pages only limit how many are shown.
+    try:
+        page = int(request.args.get('page', 1))
+    except ValueError:
+        abort(400)
+    if page < 1:
+        abort(400)
+
+    users_by_role = fan_out(*(partial(_find_users, role) for role in ADMIN_USER_ROLES))
+    admin_users = sorted(chain.from_iterable(users_by_role), key=_admin_users_sort_key)
+
+    first_user_index = (page - 1) * ADMIN_USERS_PAGE_SIZE
+    if page > 1 and first_user_index >= len(admin_users):
+        abort(404)
+    has_next_page = len(admin_users) > first_user_index + ADMIN_USERS_PAGE_SIZE
 
     return render_template("view_admin_users.html",
-                           admin_users=admin_users)
+                           admin_users=admin_users[first_user_index:first_user_index + ADMIN_USERS_PAGE_SIZE],
+                           prev_link={'page': page - 1} if page > 1 else None,
+                           next_link={'page': page + 1} if has_next_page else None)
 
 
 @main.route('/admin-users/invite', methods=['GET', 'POST'])
@@ -1,4 +1,4 @@
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 
 from dateutil.parser import parse as parse_date
 from dmutils.documents import degenerate_document_path_and_return_doc_name
@@ -7,10 +7,15 @@ from dmutils.formats import datetimeformat
 from flask import redirect, url_for, abort, request
 
 from .. import main
+from ..helpers.agreements import get_agreement_index
+from ..helpers.pagination import get_nav_args_from_api_response_links
 from ..auth import role_required
 from ... import data_api_client
 
 
+AGREEMENTS_PAGE_SIZE = 100
+
+
 def get_status_labels():
     return OrderedDict((
         ("signed", "Waiting for countersigning"),
@@ -20,12 +25,11 @@ def get_status_labels():
     ))
 
 
-def _get_supplier_frameworks(framework_slug, status=None):
+def _get_supplier_frameworks(framework_slug):
     return [
         supplier_framework for supplier_framework in data_api_client.find_framework_suppliers(
             framework_slug, agreement_returned=True,
             with_declarations=False,
-            **({"statuses": status} if status else {})
         )['supplierFrameworks']
         if supplier_framework['onFramework']
     ]
@@ -41,11 +45,48 @@ def list_agreements(framework_slug):
     if status and status not in status_labels:
         abort(400)
 
-    supplier_frameworks = _get_supplier_frameworks(framework_slug, status=status)
+    try:
+        page = int(request.args.get('page', 1))
+    except ValueError:
+        abort(400)
+    if page < 1:
+        abort(400)
 
-    for supplier_framework in supplier_frameworks:
-        supplier_framework['agreementReturnedAt'] = datetimeformat(
-            parse_date(supplier_framework['agreementReturnedAt']))
+    # we fetch all of them, rather than just those with the requested status, so we can count them by status
+    all_supplier_frameworks = _get_supplier_frameworks(framework_slug)
+    agreement_status_counts = Counter(
+        supplier_framework.get('agreementStatus') for supplier_framework in all_supplier_frameworks
+    )
+    # remembering that a status_labels key might be a comma-separated list of actual API statuses
+    status_counts = {
+        status_key: sum(agreement_status_counts[agreement_status] for agreement_status in status_key.split(","))
+        for status_key in status_labels
+    }
+
+    supplier_frameworks = [
+        supplier_framework for supplier_framework in all_supplier_frameworks
+        if (not status) or supplier_framework.get('agreementStatus') in status.split(",")
+    ]
+
+    first_index = (page - 1) * AGREEMENTS_PAGE_SIZE
+    if page > 1 and first_index >= len(supplier_frameworks):
+        abort(404)
+
+    # only the dates on this page need formatting
+    page_supplier_frameworks = [
+        dict(
+            supplier_framework,
+            agreementReturnedAt=datetimeformat(parse_date(supplier_framework['agreementReturnedAt'])),
+        )
+        for supplier_framework in supplier_frameworks[first_index:first_index + AGREEMENTS_PAGE_SIZE]
+    ]
+
+    # links in the same form as the API gives for its paginated lists
+    links = {}
+    if page > 1:
+        links['prev'] = url_for('.list_agreements', framework_slug=framework_slug, page=page - 1)
+    if first_index + AGREEMENTS_PAGE_SIZE < len(supplier_frameworks):
+        links['next'] = url_for('.list_agreements', framework_slug=framework_slug, page=page + 1)
 
     # Determine which template to use.
     # G-Cloud 7 and earlier frameworks do not have a frameworkAgreementVersion and use an old countersigning flow
@@ -61,11 +102,16 @@ def list_agreements(framework_slug):
     return render_template(
         template,
         framework=framework,
-        supplier_frameworks=supplier_frameworks,
+        supplier_frameworks=page_supplier_frameworks,
+        supplier_framework_count=len(supplier_frameworks),
+        all_supplier_framework_count=len(all_supplier_frameworks),
         degenerate_document_path_and_return_doc_name=lambda x: degenerate_document_path_and_return_doc_name(x),
         status=status,
         status_labels=status_labels,
-        is_e_signature_flow=is_e_signature_flow
+        status_counts=status_counts,
+        is_e_signature_flow=is_e_signature_flow,
+        prev_link=get_nav_args_from_api_response_links(links, 'prev', request.args, ['status']),
+        next_link=get_nav_args_from_api_response_links(links, 'next', request.args, ['status']),
     )
 
 
@@ -80,24 +126,17 @@ def next_agreement(supplier_id, framework_slug):
     # note we are NOT requesting the status-filtered supplier_framework list - we can't be sure our requested supplier
     # will *be* in the filtered set (though it may have been at the time the url was generated) so for this view at
     # least, any status "filtering" we do must be here in python.
-    supplier_frameworks = _get_supplier_frameworks(framework_slug)
-    supplier_frameworks_iter = iter(supplier_frameworks)
+    agreement_index = get_agreement_index(framework_slug, lambda: _get_supplier_frameworks(framework_slug))
 
-    # first advance supplier_frameworks_iter to the requested supplier in the list, disregarding any status filter
+    # find whatever the "next" one (which satisfies any status requirement we have) is, remembering that a
+    # status_labels key might be a comma-separated list of actual API statuses
     try:
-        next(sf for sf in supplier_frameworks_iter if sf.get("supplierId") == supplier_id)
-    except StopIteration:
-        # reached the end of supplier_frameworks_iter without finding an entry for supplier_id. supplier possibly
-        # doesn't exist or doesn't have a signed agreement yet
+        next_supplier_id = agreement_index.next_supplier_id(supplier_id, status.split(",") if status else None)
+    except KeyError:
+        # supplier possibly doesn't exist or doesn't have a signed agreement yet
         abort(404)
 
-    # now find whatever the "next" one (which satisfies any status requirement we have) is, remembering that a
-    # status_labels key might be a comma-separated list of actual API statuses
-    try:
-        next_supplier_framework = next(
-            sf for sf in supplier_frameworks_iter if (not status) or sf.get("agreementStatus") in status.split(",")
-        )
-    except StopIteration:
+    if next_supplier_id is None:
         # this was the last one.
         return redirect(url_for(
             '.list_agreements',
@@ -107,7 +146,7 @@ def next_agreement(supplier_id, framework_slug):
 
     return redirect(url_for(
         '.view_signed_agreement',
-        supplier_id=next_supplier_framework["supplierId"],
-        framework_slug=next_supplier_framework["frameworkSlug"],
+        supplier_id=next_supplier_id,
+        framework_slug=framework_slug,
         next_status=status,
     ))
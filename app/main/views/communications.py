@@ -1,3 +1,4 @@
+from functools import partial
 from pathlib import PurePath
 
 from dmutils import s3  # this style of import so we only have to mock once
@@ -8,6 +9,8 @@ from flask import redirect, url_for, current_app, request, flash, abort
 from .. import main
 from ..auth import role_required
 from ... import data_api_client
+from ..helpers.communications import get_communications, invalidate_communications
+from ..helpers.concurrency import fan_out
 from ..helpers.frameworks import get_framework_or_404
 
 
@@ -20,25 +23,33 @@ def _get_comm_type_root(framework_slug, comm_type):
 _comm_types = ("communication", "clarification",)
 
 
+def _list_comm_type_objs(framework_slug, comm_type):
+    # (each listing gets its own S3 object, as the boto3 resources behind them can't be shared between threads)
+    communications_bucket = s3.S3(current_app.config['DM_COMMUNICATIONS_BUCKET'])
+    comm_type_root = _get_comm_type_root(framework_slug, comm_type)
+    return tuple(
+        {
+            **bucket_item,
+            # annotate on to object dicts their paths relative to comm_type_root
+            "rel_path": PurePath(bucket_item["path"]).relative_to(comm_type_root),
+        } for bucket_item in communications_bucket.list(str(comm_type_root), load_timestamps=True)
+    )
+
+
+def _list_all_comm_type_objs(framework_slug):
+    """:return: a dict of comm_type: seq of s3 object dicts"""
+    return dict(zip(
+        _comm_types,
+        fan_out(*(partial(_list_comm_type_objs, framework_slug, comm_type) for comm_type in _comm_types)),
+    ))
+
+
 @main.route('/communications/<framework_slug>', methods=['GET'])
 @role_required('admin-framework-manager')
 def manage_communications(framework_slug):
-    communications_bucket = s3.S3(current_app.config['DM_COMMUNICATIONS_BUCKET'])
     framework = get_framework_or_404(data_api_client, framework_slug)
 
-    # generate a dict of comm_type: seq of s3 object dicts
-    comm_type_objs = {
-        comm_type: tuple(
-            {
-                **bucket_item,
-                # annotate on to object dicts their paths relative to comm_type_root
-                "rel_path": PurePath(bucket_item["path"]).relative_to(_get_comm_type_root(framework_slug, comm_type)),
-            } for bucket_item in communications_bucket.list(
-                str(_get_comm_type_root(framework_slug, comm_type)),
-                load_timestamps=True,
-            )
-        ) for comm_type in _comm_types
-    }
+    comm_type_objs = get_communications(framework_slug, partial(_list_all_comm_type_objs, framework_slug))
 
     return render_template(
         'manage_communications.html',
@@ -97,6 +108,7 @@ def upload_communication(framework_slug):
             )
             flash('New clarification was uploaded.')
 
+    invalidate_communications(framework_slug)
     return redirect(url_for('.manage_communications', framework_slug=framework_slug))
 
 
@@ -124,6 +136,7 @@ def delete_communication(framework_slug, comm_type, filepath):
             abort(404, f"{filepath} not present in S3 bucket")
 
         communications_bucket.delete_key(str(full_path))
+        invalidate_communications(framework_slug)
 
         flash(f"{comm_type.capitalize()} ‘{filepath}’ was deleted for {framework['name']}.")
         return redirect(url_for('.manage_communications', framework_slug=framework_slug))
@@ -1,78 +1,94 @@
 from datetime import datetime
+from itertools import islice
 
-from flask import Response, abort, current_app, redirect
+from flask import abort, current_app, redirect, stream_with_context
 
 from dmutils import csv_generator, s3
 from dmutils.documents import get_signed_url
 
 from .. import main
+from ..helpers.archived_services import get_archived_service_summaries
+from ..helpers.csv_downloads import csv_download_response
+from ..helpers.frameworks import get_frameworks
 from ..auth import role_required
 from ... import data_api_client
 
 
+DIRECT_AWARD_OUTCOMES_HEADERS = [
+    'ID',
+    'Name',
+    'Submitted at',
+    'Result',
+    'Award service ID',
+    'Award service name',
+    'Award supplier id',
+    'Award supplier name',
+    'Award value',
+    'Awarding organisation name',
+    'Award start date',
+    'Award end date',
+    'User id',
+    'User name',
+    'User email',
+]
+
+# how many projects' archived services to fetch at once - enough to make good use of the concurrent fetching, but
+# few enough that the rows keep coming at a steady rate
+DIRECT_AWARD_OUTCOMES_BATCH_SIZE = 100
+
+
+def _iter_direct_award_outcome_rows(projects):
+    yield DIRECT_AWARD_OUTCOMES_HEADERS
+
+    projects = iter(projects)
+    while True:
+        batch = list(islice(projects, DIRECT_AWARD_OUTCOMES_BATCH_SIZE))
+        if not batch:
+            return
+
+        awarded_projects = [project for project in batch if project['outcome']['result'] == 'awarded']
+        archived_services = get_archived_service_summaries(
+            data_api_client,
+            (project['outcome']['resultOfDirectAward']['archivedService']['id'] for project in awarded_projects),
+        )
+
+        for project in awarded_projects:
+            awardDetails = project['outcome']['award']
+            resultOfDirectAward = project['outcome']['resultOfDirectAward']
+            service = archived_services[resultOfDirectAward['archivedService']['id']]
+
+            user = project['users'][0]
+
+            yield [
+                project['id'],  # id
+                project['name'],  # name
+                project['outcome']['completedAt'],  # 'Submitted at',
+                project['outcome']['result'],  # 'result',
+                resultOfDirectAward['archivedService']['service']['id'],  # 'Award service',
+                service['serviceName'],  # 'Award service name',
+                service['supplierId'],  # 'Award supplier id',
+                service['supplierName'],  # 'Award supplier name',
+                awardDetails['awardValue'],   # 'awardValue',
+                awardDetails['awardingOrganisationName'],  # 'awardingOrganisationName',
+                awardDetails['startDate'],  # 'awardStartDate',
+                awardDetails['endDate'],  # 'awardEndDate',
+                user['id'],  # 'User id',
+                user['name'],  # 'User name',
+                user['emailAddress'],  # 'User email',
+            ]
+
+
 @main.route('/direct-award/outcomes', methods=['GET'])
 @role_required('admin-ccs-category', 'admin-framework-manager', 'admin-ccs-sourcing')
 def download_direct_award_outcomes():
     download_filename = "direct-award-outcomes-{}.csv".format(datetime.utcnow().strftime('%Y-%m-%d-at-%H-%M-%S'))
-    projects = data_api_client.find_direct_award_projects(having_outcome=True, with_users=True).get('projects', [])
-    headers = [
-        'ID',
-        'Name',
-        'Submitted at',
-        'Result',
-        'Award service ID',
-        'Award service name',
-        'Award supplier id',
-        'Award supplier name',
-        'Award value',
-        'Awarding organisation name',
-        'Award start date',
-        'Award end date',
-        'User id',
-        'User name',
-        'User email',
-    ]
-
-    formatted_rows = []
-    formatted_rows.append(headers)   # add header row
-    for project in projects:
-        if project['outcome']['result'] != 'awarded':
-            continue
-
-        awardDetails = project['outcome']['award']
-        resultOfDirectAward = project['outcome']['resultOfDirectAward']
-        service = data_api_client.get_archived_service(
-            archived_service_id=resultOfDirectAward['archivedService']['id']
-        )['services']
-
-        user = project['users'][0]
-
-        row = [
-            project['id'],  # id
-            project['name'],  # name
-            project['outcome']['completedAt'],  # 'Submitted at',
-            project['outcome']['result'],  # 'result',
-            resultOfDirectAward['archivedService']['service']['id'],  # 'Award service',
-            service['serviceName'],  # 'Award service name',
-            service['supplierId'],  # 'Award supplier id',
-            service['supplierName'],  # 'Award supplier name',
-            awardDetails['awardValue'],   # 'awardValue',
-            awardDetails['awardingOrganisationName'],  # 'awardingOrganisationName',
-            awardDetails['startDate'],  # 'awardStartDate',
-            awardDetails['endDate'],  # 'awardEndDate',
-            user['id'],  # 'User id',
-            user['name'],  # 'User name',
-            user['emailAddress'],  # 'User email',
-        ]
-        formatted_rows.append(row)
-
-    return Response(
-        csv_generator.iter_csv(formatted_rows),
-        mimetype='text/csv',
-        headers={
-            "Content-Disposition": "attachment;filename={}".format(download_filename),
-            "Content-Type": "text/csv; header=present"
-        }
+    # the projects are only fetched, a page at a time, as the rows are written, so the header row goes out straight
+    # away and we never hold more than a page of projects in memory
+    projects = data_api_client.find_direct_award_projects_iter(having_outcome=True, with_users=True)
+
+    return csv_download_response(
+        stream_with_context(csv_generator.iter_csv(_iter_direct_award_outcome_rows(projects))),
+        download_filename,
     )
 
 
@@ -82,12 +98,9 @@ def download_dos_outcomes():
     # get the slug for the latest DOS framework iteration
     framework_slug = (
         sorted(
-            filter(
-                lambda fw: (
-                    fw["family"] == "digital-outcomes-and-specialists"
-                    and fw["status"] == "live"
-                ),
-                data_api_client.find_frameworks()["frameworks"]
+            (
+                fw for fw in get_frameworks(data_api_client).in_family("digital-outcomes-and-specialists")
+                if fw["status"] == "live"
             ),
             key=lambda fw: fw["frameworkLiveAtUTC"],
             reverse=True,
@@ -1,30 +1,64 @@
 from dmapiclient.audit import AuditTypes
 from dmutils.flask import timed_render_template as render_template
-from flask import abort, flash, redirect, url_for
+from flask import abort, flash, redirect, request, url_for
 from flask_login import current_user
 
 from .. import main
 from ..auth import role_required
+from ..helpers.archived_services import get_archived_service_summaries
+from ..helpers.audit_events import (
+    clear_audit_event_page_cache,
+    find_audit_events_page,
+    prefetch_audit_events_page,
+)
+from ..helpers.pagination import get_nav_args_from_api_response_links
+from ..helpers.service_update_approvals import approve_service_updates
 from ... import data_api_client
 
 
 APPROVED_SERVICE_EDITS_MESSAGE = "The changes to service {service_id} were approved."
+NO_SERVICE_EDITS_CHOSEN_MESSAGE = "Choose the edited services to approve."
 
 
 @main.route('/services/updates/unapproved', methods=['GET'])
 @role_required('admin-ccs-category')
 def service_update_audits():
-    audit_events_response = data_api_client.find_audit_events(
-        audit_type=AuditTypes.update_service,
-        acknowledged='false',
-        latest_first='false',
-        earliest_for_each_object='true',
+    try:
+        page = int(request.args.get('page', 1))
+    except ValueError:
+        abort(400)
+    if page < 1:
+        abort(400)
+
+    find_audit_events_kwargs = {
+        "audit_type": AuditTypes.update_service,
+        "acknowledged": 'false',
+        "latest_first": 'false',
+        "earliest_for_each_object": 'true',
+    }
+    audit_events_response = find_audit_events_page(data_api_client, page, **find_audit_events_kwargs)
+    links = audit_events_response['links']
+    if links.get('next'):
+        # the next page is usually the next one asked for, once this one has been worked through
+        prefetch_audit_events_page(data_api_client, page + 1, **find_audit_events_kwargs)
+
+    audit_events = audit_events_response['auditEvents']
+    archived_services = get_archived_service_summaries(
+        data_api_client,
+        (audit_event['data']['oldArchivedServiceId'] for audit_event in audit_events),
     )
 
     return render_template(
         "service_updates_unapproved.html",
-        audit_events=audit_events_response['auditEvents'],
-        has_next=bool(audit_events_response['links'].get('next')),
+        service_updates=[
+            {
+                "audit_event": audit_event,
+                "archived_service": archived_services[audit_event['data']['oldArchivedServiceId']],
+            }
+            for audit_event in audit_events
+        ],
+        prev_link=get_nav_args_from_api_response_links(links, 'prev', request.args, []),
+        next_link=get_nav_args_from_api_response_links(links, 'next', request.args, []),
     )
 
 
@@ -44,5 +78,27 @@ def submit_service_update_approval(service_id, audit_id):
         audit_event["id"],
         current_user.email_address
     )
+    clear_audit_event_page_cache()
     flash(APPROVED_SERVICE_EDITS_MESSAGE.format(service_id=service_id))
     return redirect(url_for('.service_update_audits'))
+
+
+@main.route('/services/updates/approve', methods=['POST'])
+@role_required('admin-ccs-category')
+def submit_service_update_approvals():
+    try:
+        audit_event_ids = [int(audit_event_id) for audit_event_id in request.form.getlist('audit_event_id')]
+    except ValueError:
+        abort(400)
+
+    if not audit_event_ids:
+        flash(NO_SERVICE_EDITS_CHOSEN_MESSAGE, 'error')
+        return redirect(url_for('.service_update_audits'))
+
+    results = approve_service_updates(data_api_client, audit_event_ids, current_user.email_address)
+
+    return render_template(
+        "service_updates_approved.html",
+        results=results,
+        failures=[result for result in results if result["error"]],
+    )
@@ -1,6 +1,3 @@
-from collections import OrderedDict
-from itertools import chain, dropwhile, islice
-
 from dmapiclient import HTTPError
 from dmapiclient.audit import AuditTypes
 from dmcontent.formats import format_service_price
@@ -13,8 +10,11 @@ from flask_login import current_user
 
 from .. import main
 from ..auth import role_required
+from ..helpers.audit_events import iter_audit_events
 from ..helpers.diff_tools import html_diff_tables_from_sections_iter
-from ..helpers.frameworks import get_framework_or_404
+from ..helpers.frameworks import get_framework_or_404, get_frameworks
+from ..helpers.service_diffs import iter_service_diffs
+from ..helpers.templates import stream_template
 from ... import content_loader
 from ... import data_api_client
 
@@ -39,7 +39,7 @@ ALL_ADMIN_ROLES = [
 @main.route('', methods=['GET'])
 @role_required(*ALL_ADMIN_ROLES)
 def index():
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = get_frameworks(data_api_client)
     # TODO replace this temporary fix for DOS2 when a better solution has been created.
     frameworks = [
         fw for fw in frameworks if not (fw['status'] == 'coming' or (
@@ -256,50 +256,28 @@ def service_updates(service_id):
 
     supplier = data_api_client.get_supplier(service["supplierId"])["suppliers"]
 
-    common_request_kwargs = {
-        "object_id": service_id,
-        "object_type": "services",
-        "audit_type": AuditTypes.update_service,
-        "acknowledged": "false",
-    }
-
-    all_update_events = latest_update_events = oldest_update_events = None
-    latest_update_events_response = data_api_client.find_audit_events(
-        latest_first="true",
-        **common_request_kwargs
-    )
-    latest_update_events = latest_update_events_response["auditEvents"]
-
-    if latest_update_events_response["links"].get("next"):
-        # we haven't got all update events for this object. fetch the oldest
-        oldest_update_events_response = data_api_client.find_audit_events(
-            latest_first="false",
-            **common_request_kwargs
-        )
-        oldest_update_events = oldest_update_events_response["auditEvents"][::-1]
-
-        # now we check to see if we're able to splice together the full list using these two responses. we'll know this
-        # if we are able to find the last of latest_update_events in oldest_update_events. if we're not able to, we'll
-        # have to leave all_update_events as None to signal that we don't have all the events
-        if latest_update_events[-1]["id"] in (audit_event["id"] for audit_event in oldest_update_events):
-            all_update_events = tuple(audit_event for audit_event in chain(
-                latest_update_events,
-                # being careful here to swallow the actual *matching* event using islice
-                islice(dropwhile(lambda ae: ae["id"] != latest_update_events[-1]["id"], oldest_update_events), 1, None),
-            ))
-    else:
-        all_update_events = oldest_update_events = latest_update_events
+    oldest_update_event = latest_update_event = None
+    number_of_edits = 0
+    users_who_made_edits = set()
+    # oldest first, so that any edits made while we're paging through them are added after the pages we have yet to get
+    # rather than moving events between them
+    for audit_event in iter_audit_events(
+        data_api_client,
+        object_id=service_id,
+        object_type="services",
+        audit_type=AuditTypes.update_service,
+        acknowledged="false",
+        latest_first="false",
+    ):
+        oldest_update_event = oldest_update_event or audit_event
+        latest_update_event = audit_event
+        number_of_edits += 1
+        users_who_made_edits.add(audit_event["user"])
 
-    # so now we should be in the position where, in all cases:
-    # - all_update_events should contain all update events unless this is not possible using two requests, in which
-    #   case it is set to None
-    # - latest_update_events[0] and oldest_update_events[-1] should contain the latest and oldest update events
-    #   respectively
     extra_context = {}
-    if latest_update_events:
-        archived_service_response = data_api_client.get_archived_service(
-            oldest_update_events[-1]["data"]["oldArchivedServiceId"]
-        )
+    if latest_update_event:
+        archived_service_id = oldest_update_event["data"]["oldArchivedServiceId"]
+        archived_service_response = data_api_client.get_archived_service(archived_service_id)
 
         if archived_service_response is None:
             raise ValueError("referenced archived_service_id does not exist?")
@@ -312,28 +290,28 @@ def service_updates(service_id):
             'edit_service_as_admin',
         ).filter(service, inplace_allowed=True).sections
 
-        extra_context["diffs"] = OrderedDict(
-            (question_id, table_html,)
-            for section_slug, question_id, table_html in html_diff_tables_from_sections_iter(
-                sections=sections,
-                revision_1=archived_service,
-                revision_2=service,
-                table_preamble_template="diff_table/_table_preamble.html",
-            )
+        # rendered as the page is, so the top of it can be sent while later questions are still being diffed
+        extra_context["diffs"] = iter_service_diffs(
+            archived_service_id,
+            service["updatedAt"],
+            lambda: (
+                (question_id, table_html,)
+                for section_slug, question_id, table_html in html_diff_tables_from_sections_iter(
+                    sections=sections,
+                    revision_1=archived_service,
+                    revision_2=service,
+                    table_preamble_template="diff_table/_table_preamble.html",
+                )
+            ),
         )
 
-    return render_template(
+    return stream_template(
         "compare_revisions.html",
         service=service,
         supplier=supplier,
-        all_update_events=all_update_events,
-        latest_update_events=latest_update_events,
-        oldest_update_events=oldest_update_events,
-        # below number of users who made edits might not be reliable if over 2 default length pages
-        # (100 edits per page at the time of writing) of unapproved edits per service were made
-        min_number_of_users_who_made_edits=len(frozenset(audit_event["user"] for audit_event in chain(
-            latest_update_events,
-            oldest_update_events,
-        ))),
+        oldest_update_event=oldest_update_event,
+        latest_update_event=latest_update_event,
+        number_of_edits=number_of_edits,
+        number_of_users_who_made_edits=len(users_who_made_edits),
         **extra_context
     )
@@ -1,4 +1,5 @@
 from collections import OrderedDict
+from functools import partial
 from itertools import groupby, chain
 from operator import itemgetter
 
@@ -29,7 +30,11 @@ from ..forms import (
     EditSupplierRegisteredAddressForm,
     EditSupplierRegisteredNameForm
 )
+from ..helpers.agreements import invalidate_agreement_index, update_agreement_status
+from ..helpers.bulk_service_status import get_bulk_service_status_update, start_bulk_service_status_update
+from ..helpers.concurrency import fan_out
 from ..helpers.countries import COUNTRY_TUPLE
+from ..helpers.frameworks import get_frameworks
 from ..helpers.pagination import get_nav_args_from_api_response_links
 from ..helpers.supplier_details import (
     get_supplier_frameworks_visible_for_role,
@@ -80,14 +85,12 @@ def find_suppliers():
         suppliers = suppliers_response['suppliers']
         links = suppliers_response["links"]
 
-    frameworks = data_api_client.find_frameworks()['frameworks']
-    try:
-        oldest_interesting_framework_id = [
-            fw for fw in frameworks if fw['slug'] == OLDEST_INTERESTING_FRAMEWORK_SLUG
-        ][0]['id']
-    except IndexError:
+    frameworks = get_frameworks(data_api_client)
+    oldest_interesting_framework = frameworks.get(OLDEST_INTERESTING_FRAMEWORK_SLUG)
+    if oldest_interesting_framework is None:
         current_app.logger.error(f'No framework found with slug: "{OLDEST_INTERESTING_FRAMEWORK_SLUG}"')
         abort(500)
+    oldest_interesting_framework_id = oldest_interesting_framework['id']
 
     interesting_frameworks = sorted(
         [framework for framework in frameworks if framework['id'] >= oldest_interesting_framework_id
@@ -112,9 +115,13 @@ def find_suppliers():
     "admin", "admin-ccs-category", "admin-ccs-data-controller", "admin-framework-manager", "admin-ccs-sourcing"
 )
 def supplier_details(supplier_id):
-    frameworks = data_api_client.find_frameworks()["frameworks"]
-    supplier = data_api_client.get_supplier(supplier_id)["suppliers"]
-    supplier_frameworks = data_api_client.get_supplier_frameworks(supplier_id)["frameworkInterest"]
+    frameworks, supplier_response, supplier_frameworks_response = fan_out(
+        partial(get_frameworks, data_api_client),
+        partial(data_api_client.get_supplier, supplier_id),
+        partial(data_api_client.get_supplier_frameworks, supplier_id),
+    )
+    supplier = supplier_response["suppliers"]
+    supplier_frameworks = supplier_frameworks_response["frameworkInterest"]
 
     # Get SupplierFrameworks for frameworks the role is interested in, sorted by oldest frameworkLiveAtUTC first
     visible_supplier_frameworks = get_supplier_frameworks_visible_for_role(
@@ -193,7 +200,7 @@ def edit_supplier_registered_name(supplier_id):
 @role_required('admin-ccs-data-controller')
 def edit_supplier_registered_company_number(supplier_id):
     supplier = data_api_client.get_supplier(supplier_id)['suppliers']
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = get_frameworks(data_api_client)
 
     # Take the registered company numbers from the supplier, as we need to know which type it is (CH or other)
     prefill_data = {
@@ -368,11 +375,16 @@ def view_signed_agreement(supplier_id, framework_slug):
     # not properly validating this - all we do is pass it through
     next_status = request.args.get("next_status")
 
-    supplier = data_api_client.get_supplier(supplier_id)['suppliers']
-    framework = data_api_client.get_framework(framework_slug)['frameworks']
+    supplier_response, framework_response, supplier_framework_response = fan_out(
+        partial(data_api_client.get_supplier, supplier_id),
+        partial(data_api_client.get_framework, framework_slug),
+        partial(data_api_client.get_supplier_framework_info, supplier_id, framework_slug),
+    )
+    supplier = supplier_response['suppliers']
+    framework = framework_response['frameworks']
     if not framework.get('frameworkAgreementVersion'):
         abort(404)
-    supplier_framework = data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest']
+    supplier_framework = supplier_framework_response['frameworkInterest']
     if not supplier_framework.get('agreementReturned'):
         abort(404)
 
@@ -428,6 +440,7 @@ def put_signed_agreement_on_hold(agreement_id):
     next_status = request.args.get("next_status")
 
     agreement = data_api_client.put_signed_agreement_on_hold(agreement_id, current_user.email_address)["agreement"]
+    update_agreement_status(agreement["frameworkSlug"], agreement["supplierId"], "on-hold")
 
     flash(AGREEMENT_ON_HOLD_MESSAGE.format(organisation_name=request.form['nameOfOrganisation']))
 
@@ -450,6 +463,7 @@ def approve_agreement_for_countersignature(agreement_id):
         current_user.email_address,
         current_user.id,
     )["agreement"]
+    update_agreement_status(agreement["frameworkSlug"], agreement["supplierId"], "approved")
 
     flash(AGREEMENT_APPROVED_MESSAGE.format(organisation_name=request.form['nameOfOrganisation']))
 
@@ -472,6 +486,7 @@ def unapprove_agreement_for_countersignature(agreement_id):
         current_user.email_address,
         current_user.id,
     )["agreement"]
+    update_agreement_status(agreement["frameworkSlug"], agreement["supplierId"], "signed")
 
     flash(AGREEMENT_APPROVAL_CANCELLED_MESSAGE.format(organisation_name=request.form['nameOfOrganisation']))
 
@@ -513,9 +528,14 @@ def download_agreement_file(supplier_id, framework_slug, document_name):
 @main.route('/suppliers/<int:supplier_id>/countersigned-agreements/<framework_slug>', methods=['GET'])
 @role_required('admin-ccs-sourcing')
 def list_countersigned_agreement_file(supplier_id, framework_slug):
-    supplier = data_api_client.get_supplier(supplier_id)['suppliers']
-    framework = data_api_client.get_framework(framework_slug)['frameworks']
-    supplier_framework = data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest']
+    supplier_response, framework_response, supplier_framework_response = fan_out(
+        partial(data_api_client.get_supplier, supplier_id),
+        partial(data_api_client.get_framework, framework_slug),
+        partial(data_api_client.get_supplier_framework_info, supplier_id, framework_slug),
+    )
+    supplier = supplier_response['suppliers']
+    framework = framework_response['frameworks']
+    supplier_framework = supplier_framework_response['frameworkInterest']
     if not supplier_framework['onFramework'] or supplier_framework['agreementStatus'] in (None, 'draft'):
         abort(404)
     agreements_bucket = s3.S3(current_app.config['DM_AGREEMENTS_BUCKET'])
@@ -585,6 +605,7 @@ def upload_countersigned_agreement_file(supplier_id, framework_slug):
                 object_type='suppliers',
                 object_id=supplier_id,
                 data={'upload_countersigned_agreement': path})
+            invalidate_agreement_index(framework_slug)
 
             flash(UPLOAD_COUNTERSIGNED_AGREEMENT_MESSAGE)
 
@@ -626,6 +647,7 @@ def remove_countersigned_agreement_file(supplier_id, framework_slug):
             object_type='suppliers',
             object_id=supplier_id,
             data={'upload_countersigned_agreement': document})
+        invalidate_agreement_index(framework_slug)
 
     return redirect(url_for(
         '.list_countersigned_agreement_file',
@@ -794,7 +816,7 @@ def find_supplier_services(supplier_id):
     remove_services_for_framework_slug = request.args.get('remove')
     publish_services_for_framework_slug = request.args.get('publish')
 
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = get_frameworks(data_api_client)
     supplier = data_api_client.get_supplier(supplier_id)["suppliers"]
 
     frameworks_services = {
@@ -802,7 +824,7 @@ def find_supplier_services(supplier_id):
         for framework_slug, framework_services in
         groupby(sorted(data_api_client.find_services_iter(
             supplier_id=supplier_id,
-            framework=','.join(f['slug'] for f in frameworks if f['status'] in ['live', 'expired'])
+            framework=','.join(f['slug'] for f in frameworks.with_status('live', 'expired'))
         ), key=itemgetter('frameworkSlug')), key=itemgetter('frameworkSlug'))
     }
 
@@ -814,20 +836,14 @@ def find_supplier_services(supplier_id):
         if not any(i['status'] == 'published' for i in frameworks_services[remove_services_for_framework_slug]):
             abort(400, 'No published services on framework')
 
-        remove_services_for_framework = next(filter(
-            lambda i: i['slug'] == remove_services_for_framework_slug,
-            frameworks
-        ))
+        remove_services_for_framework = frameworks.get(remove_services_for_framework_slug)
     elif publish_services_for_framework_slug:
         if publish_services_for_framework_slug not in frameworks_services:
             abort(400, 'No services for framework')
         if not any(i['status'] == 'disabled' for i in frameworks_services[publish_services_for_framework_slug]):
             abort(400, 'No suspended services on framework')
 
-        publish_services_for_framework = next(filter(
-            lambda i: i['slug'] == publish_services_for_framework_slug,
-            frameworks
-        ))
+        publish_services_for_framework = frameworks.get(publish_services_for_framework_slug)
 
     return render_template(
         'view_supplier_services.html',
@@ -846,10 +862,10 @@ def toggle_supplier_services(supplier_id):
     publish_services = request.args.get('publish')
 
     toggle_action = {
+        'action': 'remove' if remove_services else 'publish',
         'framework_slug': remove_services or publish_services,
         'old_status': 'published' if remove_services else 'disabled',
         'new_status': 'disabled' if remove_services else 'published',
-        'flash_message': SUPPLIER_SERVICES_REMOVED_MESSAGE if remove_services else SUPPLIER_SERVICES_UNSUSPENDED_MESSAGE
     }
     if not toggle_action['framework_slug']:
         abort(400, 'Invalid framework')
@@ -866,24 +882,48 @@ def toggle_supplier_services(supplier_id):
     if not services:
         abort(400, 'No {} services on framework'.format(toggle_action['old_status']))
 
-    for service in services:
-        data_api_client.update_service_status(
-            service['id'],
-            toggle_action['new_status'],
-            current_user.email_address,
-            wait_for_index=False,
+    # large suppliers can have hundreds of services, so the updates are made in the background
+    update_id = start_bulk_service_status_update(
+        data_api_client,
+        services,
+        toggle_action['new_status'],
+        current_user.email_address,
+        action=toggle_action['action'],
+        supplierId=supplier_id,
+        supplierName=services[0]['supplierName'],
+        frameworkName=services[0]['frameworkName'],
+    )
+    return redirect(url_for('.view_supplier_services_status_update', supplier_id=supplier_id, update_id=update_id))
+
+
+@main.route('/suppliers/<int:supplier_id>/services/status-updates/<update_id>', methods=['GET'])
+@role_required('admin-ccs-category')
+def view_supplier_services_status_update(supplier_id, update_id):
+    update = get_bulk_service_status_update(update_id)
+    if update is None or update['supplierId'] != supplier_id:
+        abort(404)
+
+    if update['complete'] and not update['failures']:
+        flash(
+            " ".join((
+                (
+                    SUPPLIER_SERVICES_REMOVED_MESSAGE if update['action'] == 'remove'
+                    else SUPPLIER_SERVICES_UNSUSPENDED_MESSAGE
+                ).format(
+                    supplier_name=update['supplierName'],
+                    framework_name=update['frameworkName'],
+                ),
+                SUPPLIER_SERVICES_DELAYED_INDEX_MESSAGE,
+            ))
         )
+        return redirect(url_for('.find_supplier_services', supplier_id=supplier_id))
 
-    flash(
-        " ".join((
-            toggle_action['flash_message'].format(
-                supplier_name=services[0]['supplierName'],
-                framework_name=services[0]['frameworkName']
-            ),
-            SUPPLIER_SERVICES_DELAYED_INDEX_MESSAGE,
-        ))
+    return render_template(
+        "suppliers/services_status_update.html",
+        update=update,
+        # how often to check on progress, in seconds
+        refresh_interval=None if update['complete'] or update['stalled'] else 5,
     )
-    return redirect(url_for('.find_supplier_services', supplier_id=supplier_id))
 
 
 def _draft_services_annotated_unanswered_counts(framework_slug, draft_services):
@@ -906,7 +946,7 @@ def _draft_services_annotated_unanswered_counts(framework_slug, draft_services):
 @role_required('admin-framework-manager', 'admin-ccs-sourcing')
 def find_supplier_draft_services(supplier_id):
     supplier = data_api_client.get_supplier(supplier_id)["suppliers"]
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = get_frameworks(data_api_client)
 
     if current_user.has_role('admin-ccs-sourcing'):
         visible_framework_statuses = ["pending", "standstill", "live", "expired"]
@@ -916,7 +956,7 @@ def find_supplier_draft_services(supplier_id):
         # No other roles can access this page yet, but we might want to add them later
         visible_framework_statuses = []
 
-    frameworks = (fw for fw in frameworks if fw['status'] in visible_framework_statuses)
+    frameworks = frameworks.with_status(*visible_framework_statuses)
 
     frameworks_draft_services = {
         framework_slug: draft_services
@@ -3,8 +3,11 @@ from datetime import datetime
 from dmutils import s3
 from dmutils.documents import get_signed_url
 from dmutils.flask import timed_render_template as render_template
-from flask import abort, current_app, flash, redirect, request, Response, url_for
+from flask import abort, current_app, flash, redirect, request, url_for
 
+from ..helpers.buyer_reports import get_fresh_buyer_report_url
+from ..helpers.csv_downloads import csv_download_response
+from ..helpers.frameworks import get_frameworks
 from ..helpers.user_downloads import generate_user_csv
 from .. import main
 from ..auth import role_required
@@ -81,7 +84,7 @@ def download_supplier_user_list_report(framework_slug, report_type):
 @main.route('/users/download/suppliers', methods=['GET'])
 @role_required('admin-framework-manager')
 def supplier_user_research_participants_by_framework():
-    frameworks = data_api_client.find_frameworks().get("frameworks")
+    frameworks = get_frameworks(data_api_client)
     frameworks = sorted(
         (fw for fw in frameworks if not (fw['status'] == 'coming' or (
             fw['status'] == 'expired' and fw['family'] != 'digital-outcomes-and-specialists'
@@ -122,34 +125,28 @@ def download_supplier_user_research_report(framework_slug):
 @role_required('admin-framework-manager')
 def download_buyers():
     """Download a list of all buyers"""
+    report_url = get_fresh_buyer_report_url("all")
+    if report_url:
+        return redirect(report_url)
+
     download_filename = "all-buyers-on-{}.csv".format(datetime.utcnow().strftime('%Y-%m-%d-at-%H-%M-%S'))
     users = data_api_client.find_users_iter(role="buyer")
 
-    return Response(
-        generate_user_csv(users),
-        mimetype='text/csv',
-        headers={
-            "Content-Disposition": "attachment;filename={}".format(download_filename),
-            "Content-Type": "text/csv; header=present"
-        }
-    )
+    return csv_download_response(generate_user_csv(users), download_filename)
 
 
 @main.route('/users/download/buyers/user-research', methods=['GET'])
 @role_required('admin-framework-manager')
 def download_buyers_for_user_research():
     """Download a list of buyers who have opted in to user research."""
+    report_url = get_fresh_buyer_report_url("user-research")
+    if report_url:
+        return redirect(report_url)
+
     users = data_api_client.find_users_iter(role="buyer")
     # TODO: add param to API endpoint to filter by userResearchOptedIn
     users = filter(lambda i: i['userResearchOptedIn'], users)
 
     download_filename = "user-research-buyers-on-{}.csv".format(datetime.utcnow().strftime('%Y-%m-%d-at-%H-%M-%S'))
 
-    return Response(
-        generate_user_csv(users),
-        mimetype='text/csv',
-        headers={
-            "Content-Disposition": "attachment;filename={}".format(download_filename),
-            "Content-Type": "text/csv; header=present"
-        }
-    )
+    return csv_download_response(generate_user_csv(users), download_filename)
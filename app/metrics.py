@@ -1,5 +1,6 @@
 from flask import Blueprint
 from dmutils.metrics import DMGDSMetrics
+from gds_metrics.metrics import Counter
 
 
 metrics = Blueprint('metrics', __name__)
@@ -7,3 +8,9 @@ metrics = Blueprint('metrics', __name__)
 gds_metrics = DMGDSMetrics()
 
 metrics.add_url_rule(gds_metrics.metrics_path, 'metrics', gds_metrics.metrics_endpoint)
+
+FRAMEWORK_CACHE_LOOKUPS_TOTAL = Counter(
+    'framework_cache_lookups_total',
+    'Lookups of individual frameworks by slug, by whether they could be answered from the cache',
+    ['result'],
+)
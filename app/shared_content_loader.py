@@ -0,0 +1,282 @@
+"""
+Tools for sharing a single ContentLoader between all the threads of a process.
+
+A ContentLoader's loaded manifests are plain (nested) dicts and lists, which ``ContentLoader.get_manifest`` turns into a
+fresh tree of ``ContentSection``s and ``Question``s on every call. Callers are therefore free to ``.filter(...)`` or
+``.summary(...)`` the manifest they get back with ``inplace_allowed=True`` - only that fresh tree gets modified (each
+``Question`` takes its own shallow copy of its data) - *as long as* nothing reaches into the shared data underneath and
+modifies it. Freezing the loaded data turns any such attempt into a loud ``TypeError`` rather than a silent corruption
+of the content every other thread is looking at.
+
+Manifests are loaded the first time they are asked for rather than all at startup, so that a worker can start serving
+requests without having parsed the content for every framework that has ever existed. Parsing the YAML is by far the
+most expensive part of that, so a snapshot of the already-processed manifests can be built ahead of time (see
+scripts/build-content-snapshot.py) and used in its place, as long as it was built from the same content.
+"""
+from copy import deepcopy
+import copyreg
+import hashlib
+import io
+import os
+import pickle
+import threading
+
+import dmcontent
+from dmcontent.errors import ContentNotFoundError, ContentTemplateError
+from dmcontent.markdown import GOVUKFrontendExtension
+from dmcontent.utils import TemplateField
+from jinja2 import TemplateSyntaxError
+from markdown import Markdown
+
+
+# bump this whenever the structure of snapshots changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+class FrozenDict(dict):
+    """A dict which refuses to be modified in place. Copies of it (``.copy()``, ``dict(...)``) are ordinary dicts."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {deepcopy(k, memo): deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self):
+        # the default dict-subclass pickling would attempt to __setitem__ its contents back in
+        return type(self), (dict(self),)
+
+
+class FrozenList(list):
+    """A list which refuses to be modified in place. Copies of it (``list(...)``, ``[:]``, ``+``) are ordinary lists."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [deepcopy(v, memo) for v in self]
+
+    def __reduce__(self):
+        return type(self), (list(self),)
+
+
+def freeze(value):
+    """Return a deeply read-only equivalent of ``value``, converting any dicts and lists found within it"""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        # anything inside these will already have been frozen on the way in
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def content_version(content_path):
+    """
+    Return a digest of all the files under ``content_path``, along with the version of dmcontent which will be
+    interpreting them, for identifying whether a snapshot was built from the content we have
+    """
+    digest = hashlib.sha256(f"{SNAPSHOT_FORMAT_VERSION}:{dmcontent.__version__}".encode())
+    for dirpath, dirnames, filenames in os.walk(content_path):
+        # os.walk doesn't guarantee any particular order, so we have to impose one
+        dirnames.sort()
+        for filename in sorted(filenames):
+            file_path = os.path.join(dirpath, filename)
+            digest.update(os.path.relpath(file_path, content_path).encode())
+            digest.update(b"\0")
+            with open(file_path, "rb") as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+_thread_local = threading.local()
+
+
+class _LazyTemplateField(TemplateField):
+    """
+    A TemplateField which doesn't compile its template until it is first used. Compiling every template up front would
+    cost us most of the time we save by not parsing the YAML.
+
+    As that happens in whichever thread first renders the field, each thread converts markdown with its own
+    ``Markdown`` instance - a ``Markdown`` keeps state while converting, so TemplateField's shared one can't be used by
+    two threads at once.
+    """
+    def __init__(self, field_value, markdown):
+        self.source = field_value
+        self.markdown = markdown
+
+    @property
+    def markdown_instance(self):
+        if not hasattr(_thread_local, "markdown"):
+            _thread_local.markdown = Markdown(extensions=[GOVUKFrontendExtension()])
+        return _thread_local.markdown
+
+    @property
+    def template(self):
+        # two threads racing to get here first will each compile the same template using their own Markdown instances,
+        # and one of them will be kept
+        if "_template" not in self.__dict__:
+            try:
+                self.__dict__["_template"] = self.make_template(self.source)
+            except TemplateSyntaxError as e:
+                raise ContentTemplateError(e.message)
+        return self.__dict__["_template"]
+
+
+def _reduce_template_field(template_field):
+    # TemplateFields hold compiled jinja templates, which can't be pickled - but can be recompiled from their source
+    return _LazyTemplateField, (template_field.source, template_field.markdown)
+
+
+class _SnapshotPickler(pickle.Pickler):
+    dispatch_table = {
+        **copyreg.dispatch_table,
+        TemplateField: _reduce_template_field,
+        _LazyTemplateField: _reduce_template_field,
+    }
+
+
+def _pickle_manifest(manifest_sections):
+    with io.BytesIO() as f:
+        _SnapshotPickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(manifest_sections)
+        return f.getvalue()
+
+
+class SharedContentLoader:
+    """
+    A thread-safe wrapper around a ``ContentLoader`` which loads the manifests we use the first time they are requested
+    and freezes them once loaded. Anything other than ``get_manifest``/``load_manifest`` is passed straight through to
+    the wrapped ``ContentLoader``.
+    """
+    # the question set each of the manifests we use is built from
+    MANIFEST_QUESTION_SETS = {
+        "edit_service_as_admin": "services",
+        "declaration": "declaration",
+    }
+
+    def __init__(self, content_loader, on_missing_manifest=None):
+        """
+        :param content_loader: the ``ContentLoader`` to load manifests into
+        :param on_missing_manifest: optional callable, passed ``manifest_name, framework_slug`` the first time a
+                                    manifest is found not to exist
+        """
+        self._content_loader = content_loader
+        self._on_missing_manifest = on_missing_manifest
+        self._lock = threading.Lock()
+        self._loaded = set()
+        self._missing = set()
+        # pickled manifests from a snapshot, which are unpickled (and removed from here) as they are first requested
+        self._snapshot_manifests = {}
+
+    def load_manifest(self, framework_slug, manifest):
+        """Ensure ``manifest`` is loaded for ``framework_slug``, raising ``ContentNotFoundError`` if it doesn't exist"""
+        key = (framework_slug, manifest)
+        if key in self._loaded:
+            return
+        if key in self._missing:
+            raise ContentNotFoundError(f"Content not found for {framework_slug} and {manifest}")
+
+        with self._lock:
+            # another thread may have got here first while we were waiting for the lock
+            if key in self._loaded:
+                return
+            if key in self._missing:
+                raise ContentNotFoundError(f"Content not found for {framework_slug} and {manifest}")
+
+            # ContentLoader doesn't give us a public way of getting at the loaded manifest data, so we're having to rely
+            # on its internal structure here
+            framework_manifests = self._content_loader._content[framework_slug]
+
+            pickled_manifest = self._snapshot_manifests.pop(key, None)
+            if pickled_manifest is not None:
+                # manifests were frozen before they were put in the snapshot
+                framework_manifests[manifest] = pickle.loads(pickled_manifest)
+            else:
+                try:
+                    self._content_loader.load_manifest(framework_slug, self.MANIFEST_QUESTION_SETS[manifest], manifest)
+                except ContentNotFoundError:
+                    self._missing.add(key)
+                    if self._on_missing_manifest:
+                        self._on_missing_manifest(manifest, framework_slug)
+                    raise
+
+                framework_manifests[manifest] = freeze(framework_manifests[manifest])
+
+            self._loaded.add(key)
+
+    def get_manifest(self, framework_slug, manifest):
+        if manifest in self.MANIFEST_QUESTION_SETS:
+            self.load_manifest(framework_slug, manifest)
+        return self._content_loader.get_manifest(framework_slug, manifest)
+
+    def warm_up(self, framework_slugs):
+        """Load all the manifests we use for each of ``framework_slugs``, ignoring any that don't exist"""
+        for framework_slug in framework_slugs:
+            for manifest in self.MANIFEST_QUESTION_SETS:
+                try:
+                    self.load_manifest(framework_slug, manifest)
+                except ContentNotFoundError:
+                    pass
+
+    def write_snapshot(self, snapshot_path, framework_slugs):
+        """Load all the manifests we use for each of ``framework_slugs`` and write them to a snapshot file"""
+        self.warm_up(framework_slugs)
+
+        with self._lock:
+            snapshot = {
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "content_version": content_version(self._content_loader.content_path),
+                "manifests": {
+                    (framework_slug, manifest): _pickle_manifest(
+                        self._content_loader._content[framework_slug][manifest]
+                    ) for framework_slug, manifest in self._loaded
+                },
+            }
+
+        # write to a temporary file first so a reader never sees a partially written snapshot
+        tmp_path = f"{snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+
+    def load_snapshot(self, snapshot_path):
+        """
+        Use the manifests in the snapshot at ``snapshot_path`` in preference to loading them from the content's YAML,
+        as long as the snapshot was built from the same content. Returns whether the snapshot was used.
+        """
+        try:
+            with open(snapshot_path, "rb") as f:
+                snapshot = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False
+
+        if not (
+            isinstance(snapshot, dict)
+            and snapshot.get("format_version") == SNAPSHOT_FORMAT_VERSION
+            and snapshot.get("content_version") == content_version(self._content_loader.content_path)
+        ):
+            return False
+
+        with self._lock:
+            self._snapshot_manifests.update(
+                (key, pickled_manifest) for key, pickled_manifest in snapshot["manifests"].items()
+                if key not in self._loaded
+            )
+
+        return True
+
+    def __getattr__(self, name):
+        return getattr(self._content_loader, name)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import jinja2
 from dmutils.status import get_version_label
 from dmutils.asset_fingerprint import AssetFingerprinter
@@ -34,6 +35,45 @@ class Config(object):
     DM_ASSETS_URL = None
     DM_REDIS_SERVICE_NAME = None
 
+    # whether to load the content for currently active frameworks in the background on startup
+    DM_CONTENT_LOADER_WARM_UP = True
+    # precompiled content, built by scripts/build-content-snapshot.py
+    DM_CONTENT_SNAPSHOT_PATH = 'app/content-snapshot.pickle'
+    # the last framework list we got from the API, used to decide which content to warm up before we have a new one
+    DM_FRAMEWORKS_SNAPSHOT_PATH = os.path.join(tempfile.gettempdir(), 'dm-admin-frontend-frameworks.json')
+    # how many seconds to keep the list of frameworks for before fetching it from the API again
+    DM_FRAMEWORKS_CACHE_TTL = 300
+    # how many seconds to keep individual frameworks (looked up by slug) for. this is shorter than the above as it's
+    # used by pages where an out of date framework status would matter more
+    DM_FRAMEWORK_CACHE_TTL = 30
+    # the maximum number of individual frameworks (or the absence of them) to keep at once
+    DM_FRAMEWORK_CACHE_SIZE = 1000
+    # the size of the thread pool shared by all views making independent API calls concurrently
+    DM_API_FAN_OUT_MAX_WORKERS = 16
+    # the maximum number of service status updates made at once when changing the status of all a supplier's services
+    DM_BULK_SERVICE_STATUS_UPDATE_CONCURRENCY = 5
+    # the maximum number of archived services to keep summaries of, and to fetch at once
+    DM_ARCHIVED_SERVICE_CACHE_SIZE = 50000
+    DM_ARCHIVED_SERVICE_FETCH_CONCURRENCY = 8
+    # the maximum number of pages of audit events being fetched ahead of their being needed at once
+    DM_AUDIT_EVENT_PREFETCH_CONCURRENCY = 8
+    # how many seconds to keep a page of audit events fetched ahead of its being asked for. this is kept short as the
+    # pages are kept by page number, so one can be out of date after changes made through another process
+    DM_AUDIT_EVENT_PAGE_CACHE_TTL = 5
+    # the most pages of audit events to go through one after another, in case the API never stops giving a next page
+    DM_AUDIT_EVENT_MAX_PAGES = 1000
+    # the maximum number of edits to services being approved at once when approving a number of them together
+    DM_SERVICE_UPDATE_APPROVAL_CONCURRENCY = 5
+    # how many seconds old the buyer reports saved by `flask generate-buyer-reports` can be before we stop serving them
+    # and build the csv afresh instead
+    DM_BUYER_REPORT_MAX_AGE = 60 * 60
+    # how many seconds to keep the order and agreement statuses of a framework's suppliers for "next agreement" links
+    DM_AGREEMENT_INDEX_CACHE_TTL = 60
+    # how many seconds to keep the listings of a framework's communications and clarifications for
+    DM_COMMUNICATIONS_CACHE_TTL = 60
+    # the number of services' edits to keep the rendered diffs of
+    DM_SERVICE_DIFF_CACHE_SIZE = 200
+
     STATIC_URL_PATH = '/admin/static'
     ASSET_PATH = STATIC_URL_PATH + '/'
     BASE_TEMPLATE_DATA = {
@@ -98,6 +138,16 @@ class Test(Config):
     INVITE_EMAIL_TOKEN_NS = 'SALT'
     DM_NOTIFY_API_KEY = "not_a_real_key-00000000-fake-uuid-0000-000000000000"
 
+    DM_CONTENT_LOADER_WARM_UP = False
+    DM_CONTENT_SNAPSHOT_PATH = None
+    DM_FRAMEWORKS_SNAPSHOT_PATH = None
+    # tests mostly expect the frameworks to be fetched afresh for each request
+    DM_FRAMEWORKS_CACHE_TTL = 0
+    DM_FRAMEWORK_CACHE_TTL = 0
+    DM_AGREEMENT_INDEX_CACHE_TTL = 0
+    DM_AUDIT_EVENT_PAGE_CACHE_TTL = 0
+    DM_COMMUNICATIONS_CACHE_TTL = 0
+
 
 class Development(Config):
     DEBUG = True
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+Compare how long it takes a freshly started worker to load the manifests of every framework in the content directory
+from their YAML with how long it takes to load them from a precompiled snapshot.
+
+Usage:
+    scripts/benchmark-content-snapshot.py [--content-path=<path>] [--repeat=<n>]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dmcontent.content_loader import ContentLoader  # noqa: E402
+
+from app.shared_content_loader import SharedContentLoader  # noqa: E402
+
+
+def time_cold_start(content_path, framework_slugs, snapshot_path=None):
+    start = time.perf_counter()
+
+    content_loader = SharedContentLoader(ContentLoader(content_path))
+    if snapshot_path:
+        assert content_loader.load_snapshot(snapshot_path)
+    content_loader.warm_up(framework_slugs)
+
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--content-path", default="app/content")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    framework_slugs = sorted(os.listdir(os.path.join(args.content_path, "frameworks")))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = os.path.join(tmp_dir, "content-snapshot.pickle")
+        SharedContentLoader(ContentLoader(args.content_path)).write_snapshot(snapshot_path, framework_slugs)
+        print(f"Snapshot of {len(framework_slugs)} frameworks: {os.path.getsize(snapshot_path)} bytes")
+
+        for label, kwargs in (("from YAML", {}), ("from snapshot", {"snapshot_path": snapshot_path})):
+            timings = [
+                time_cold_start(args.content_path, framework_slugs, **kwargs) for _ in range(args.repeat)
+            ]
+            print(f"{label}: median {statistics.median(timings):.3f}s, min {min(timings):.3f}s over {args.repeat} runs")
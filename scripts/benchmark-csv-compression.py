@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Measure how much smaller gzipping makes a buyer csv download, how long the compression takes, and roughly how long the
+download would take over some slow connections with and without it.
+
+Usage:
+    scripts/benchmark-csv-compression.py [--users=<n>]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.main.helpers.csv_downloads import gzip_chunks  # noqa: E402
+from app.main.helpers.user_downloads import generate_user_csv  # noqa: E402
+
+
+FIRST_NAMES = ("Alex", "Sam", "Jo", "Chris", "Priya", "Mohammed", "Olivia", "Tom", "Aisha", "Gareth", "Siobhan")
+LAST_NAMES = ("Smith", "Jones", "Taylor", "Brown", "Khan", "Patel", "Evans", "Murphy", "O'Neill", "Williams")
+DOMAINS = ("digital.cabinet-office.gov.uk", "hmrc.gov.uk", "nhs.net", "justice.gov.uk", "leeds.gov.uk", "mod.gov.uk")
+
+# in megabits per second
+CONNECTIONS = (("0.5Mbps", 0.5), ("2Mbps", 2), ("10Mbps", 10))
+
+
+def synthetic_buyers(number_of_users):
+    rng = random.Random(1234)
+    for i in range(number_of_users):
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            "emailAddress": f"{first_name}.{last_name}{i}@{rng.choice(DOMAINS)}".lower(),
+            "name": f"{first_name} {last_name}",
+        }
+
+
+def transfer_time(size, megabits_per_second):
+    return size * 8 / (megabits_per_second * 1000 * 1000)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000, help="number of buyers in the csv")
+    args = parser.parse_args()
+
+    chunks = list(generate_user_csv(synthetic_buyers(args.users)))
+    size = sum(len(chunk) for chunk in chunks)
+
+    start = time.perf_counter()
+    gzipped_size = sum(len(chunk) for chunk in gzip_chunks(iter(chunks)))
+    compression_time = time.perf_counter() - start
+
+    print(f"{args.users} buyers: {size} bytes, {gzipped_size} bytes gzipped ({gzipped_size / size:.0%})")
+    print(f"compression took {compression_time:.3f}s")
+    for name, megabits_per_second in CONNECTIONS:
+        print(
+            f"at {name}: {transfer_time(size, megabits_per_second):.1f}s, "
+            f"{transfer_time(gzipped_size, megabits_per_second):.1f}s gzipped"
+        )
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Time rendering the diff table for an edit to a large service description, against just generating the table with
+difflib.HtmlDiff and parsing and re-serialising it with lxml, as we used to (without the restyling we used to do in
+between, so the old approach was somewhat slower than this shows).
+
+Usage:
+    scripts/benchmark-diff-tables.py [--lines=<n>] [--edits=<n>] [--repeat=<n>]
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import timeit
+
+from lxml import html
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.main.helpers.diff_tools import _diff_table, _get_value_for_difflib  # noqa: E402
+
+
+WORDS = (
+    "cloud", "hosting", "secure", "platform", "support", "data", "service", "users", "government", "access",
+    "migration", "training", "&", "<managed>", "24/7", "ISO 27001", "we", "provide", "a", "the", "and", "for", "with",
+)
+
+
+def synthetic_description(rng, number_of_lines):
+    return "\n".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 30)))
+        for _ in range(number_of_lines)
+    )
+
+
+def edited(rng, description, number_of_edits):
+    lines = description.splitlines()
+    for _ in range(number_of_edits):
+        position = rng.randrange(len(lines))
+        edit = rng.choice(("insert", "delete", "reword"))
+        if edit == "insert":
+            lines.insert(position, " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 30))))
+        elif edit == "delete":
+            del lines[position]
+        else:
+            words = lines[position].split(" ")
+            words[rng.randrange(len(words))] = rng.choice(WORDS)
+            lines[position] = " ".join(words)
+    return "\n".join(lines)
+
+
+def htmldiff_and_lxml(lines_1, lines_2):
+    return html.tostring(html.fragment_fromstring(difflib.HtmlDiff().make_table(lines_1, lines_2)), encoding="unicode")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=2000, help="number of lines in the service description")
+    parser.add_argument("--edits", type=int, default=50, help="number of lines inserted, deleted or reworded")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1234)
+    description_1 = synthetic_description(rng, args.lines)
+    description_2 = edited(rng, description_1, args.edits)
+    lines_1, lines_2 = _get_value_for_difflib(description_1), _get_value_for_difflib(description_2)
+
+    print(f"{args.lines} lines ({len(description_1)} characters), {args.edits} edits")
+    for name, render in (
+        ("difflib.HtmlDiff + lxml", htmldiff_and_lxml),
+        ("direct render", _diff_table),
+    ):
+        best = min(timeit.repeat(lambda: render(lines_1, lines_2), number=1, repeat=args.repeat))
+        print(f"{name}: {best * 1000:.1f}ms")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Compare fetching the archived services for the direct award outcomes export one at a time (as we used to) with
+fetching them concurrently, both with and without them already being cached, using a stub Data API which takes
+--latency milliseconds to answer each request.
+
+Usage:
+    scripts/benchmark-direct-award-outcomes.py [--projects=<n>] [--services=<n>] [--latency=<ms>]
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dmapiclient import DataAPIClient  # noqa: E402
+from flask import Flask  # noqa: E402
+
+from app.main.helpers.archived_services import ArchivedServiceCache, get_archived_service_summaries  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def make_stub_api_handler(latency):
+    class StubAPIHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            archived_service_id = int(self.path.rsplit("/", 1)[-1])
+            body = json.dumps({"services": {
+                "id": str(archived_service_id),
+                "serviceName": f"Service {archived_service_id}",
+                "supplierId": archived_service_id % 1000,
+                "supplierName": f"Supplier {archived_service_id % 1000}",
+            }}).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubAPIHandler
+
+
+def time_call(label, f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    print(f"{label}: {time.perf_counter() - start:.3f}s")
+    return result
+
+
+def fetch_one_at_a_time(client, archived_service_ids):
+    return {
+        archived_service_id: client.get_archived_service(archived_service_id=archived_service_id)["services"]
+        for archived_service_id in archived_service_ids
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=2000, help="number of awarded projects")
+    parser.add_argument("--services", type=int, default=1500, help="number of distinct archived services awarded")
+    parser.add_argument("--latency", type=float, default=20, help="stub API response time in milliseconds")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub_api_handler(args.latency / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = DataAPIClient(f"http://127.0.0.1:{server.server_port}", "auth-token")
+    archived_service_ids = [random.randint(1, args.services) for _ in range(args.projects)]
+    print(f"{args.projects} projects, {len(set(archived_service_ids))} distinct archived services")
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    ArchivedServiceCache.init_app(app)
+
+    with app.app_context():
+        time_call("one at a time", fetch_one_at_a_time, client, archived_service_ids)
+        time_call("concurrently", get_archived_service_summaries, client, archived_service_ids)
+        time_call("concurrently, cached", get_archived_service_summaries, client, archived_service_ids)
+
+    server.shutdown()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+"""
+Precompile the edit_service_as_admin and declaration manifests of every framework in the content directory into a
+snapshot which the app will load on startup in place of parsing the YAML, as long as the content hasn't changed since.
+
+Should be run as part of the build, once the framework content has been copied into place (see scripts/build.sh).
+
+Usage:
+    scripts/build-content-snapshot.py [--content-path=<path>] [--snapshot-path=<path>]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dmcontent.content_loader import ContentLoader  # noqa: E402
+
+from app.shared_content_loader import SharedContentLoader  # noqa: E402
+from config import Config  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--content-path", default="app/content")
+    parser.add_argument("--snapshot-path", default=Config.DM_CONTENT_SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    framework_slugs = sorted(os.listdir(os.path.join(args.content_path, "frameworks")))
+    SharedContentLoader(ContentLoader(args.content_path)).write_snapshot(args.snapshot_path, framework_slugs)
+
+    print(f"Wrote snapshot of {len(framework_slugs)} frameworks to {args.snapshot_path}", file=sys.stderr)
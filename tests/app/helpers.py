@@ -1,9 +1,12 @@
+from collections import defaultdict
+from datetime import datetime
 from functools import partial
 import mock
 import re
 import os
 
 from dmcontent import ContentLoader
+from dmutils.formats import DATETIME_FORMAT
 from dmutils.user import User
 from flask import json, Blueprint
 from werkzeug.datastructures import MultiDict
@@ -48,8 +51,8 @@ class BaseApplicationTest(object):
         # if we don't make this tweak, the content loader will get re-built for every test, which is incredibly slow.
         # instead we replace the `_make_content_loader_factory` with a variant which injects `injected_content_loader`
         # as the `initial_instance` argument, which we keep as a class attribute. `_make_content_loader_factory` still
-        # executes inside `create_app`, but all the content it asks to be loaded should already be present in the
-        # content_loader it is operating on, so it effectively does nothing.
+        # executes inside `create_app`, but any content loaded on demand by earlier tests will already be present in
+        # the content_loader it is operating on, so it only has to be loaded once per test class.
         # a test that needed a "clean" content loader for some reason would be able to override a test instance's
         # injected_content_loader early in the setup_method process (e.g. with None)
         self.make_content_loader_factory_mock = mock.patch("app._make_content_loader_factory")
@@ -186,3 +189,52 @@ class LoggedInApplicationTest(BaseApplicationTest):
     def _replace_whitespace(self, string, replacement_substring=""):
         # Replace all runs of whitespace with replacement_substring
         return re.sub(r"\s+", replacement_substring, string)
+
+
+class FakeS3:
+    """
+    A local stand-in for `dmutils.s3.S3`, keeping files in memory. Patch `dmutils.s3.S3` with a `FakeS3Buckets` to
+    have every bucket the app uses stored in it.
+    """
+    def __init__(self, bucket_name, files):
+        self.bucket_name = bucket_name
+        self._files = files
+
+    def save(self, path, file_, acl='public-read', timestamp=None, download_filename=None,
+             disposition_type='attachment'):
+        self._files[path] = {
+            "body": file_.read(),
+            "acl": acl,
+            "last_modified": (timestamp or datetime.utcnow()).strftime(DATETIME_FORMAT),
+            "download_filename": download_filename,
+        }
+        return self.get_key(path)
+
+    def path_exists(self, path):
+        return path in self._files
+
+    def get_key(self, path):
+        if path in self._files:
+            filename, ext = os.path.splitext(os.path.basename(path))
+            return {
+                "path": path,
+                "filename": filename,
+                "ext": ext[1:],
+                "size": len(self._files[path]["body"]),
+                "last_modified": self._files[path]["last_modified"],
+            }
+
+    def get_signed_url(self, path, expires_in=30):
+        if path in self._files:
+            return f"https://{self.bucket_name}.s3.example.com/{path}?signature=deadbeef"
+
+    def delete_key(self, path):
+        self._files.pop(path, None)
+
+
+class FakeS3Buckets:
+    def __init__(self):
+        self.buckets = defaultdict(dict)
+
+    def __call__(self, bucket_name, *args, **kwargs):
+        return FakeS3(bucket_name, self.buckets[bucket_name])
@@ -0,0 +1,157 @@
+import threading
+
+import mock
+import pytest
+
+from app.main.helpers.agreements import (
+    AgreementIndex,
+    get_agreement_index,
+    invalidate_agreement_index,
+    update_agreement_status,
+)
+from ...helpers import BaseApplicationTest
+
+
+SUPPLIER_FRAMEWORKS = [
+    {"supplierId": 1, "agreementStatus": "signed"},
+    {"supplierId": 2, "agreementStatus": "on-hold"},
+    {"supplierId": 3, "agreementStatus": "signed"},
+    {"supplierId": 4, "agreementStatus": "approved"},
+    {"supplierId": 5, "agreementStatus": "countersigned"},
+]
+
+
+class TestAgreementIndex:
+    @pytest.mark.parametrize("supplier_id,agreement_statuses,expected_supplier_id", (
+        (1, None, 2),
+        (4, None, 5),
+        (5, None, None),
+        (1, ["signed"], 3),
+        (3, ["signed"], None),
+        (1, ["approved", "countersigned"], 4),
+        (4, ["countersigned", "approved"], 5),
+        (2, ["on-hold"], None),
+        (1, ["not-a-status"], None),
+    ))
+    def test_next_supplier_id(self, supplier_id, agreement_statuses, expected_supplier_id):
+        index = AgreementIndex.from_supplier_frameworks(SUPPLIER_FRAMEWORKS)
+        assert index.next_supplier_id(supplier_id, agreement_statuses) == expected_supplier_id
+
+    def test_next_supplier_id_for_unknown_supplier(self):
+        index = AgreementIndex.from_supplier_frameworks(SUPPLIER_FRAMEWORKS)
+        with pytest.raises(KeyError):
+            index.next_supplier_id(6)
+
+    def test_with_agreement_status(self):
+        index = AgreementIndex.from_supplier_frameworks(SUPPLIER_FRAMEWORKS)
+        updated_index = index.with_agreement_status(2, "signed")
+
+        assert updated_index.next_supplier_id(1, ["signed"]) == 2
+        assert updated_index.next_supplier_id(1, ["on-hold"]) is None
+        assert index.next_supplier_id(1, ["signed"]) == 3
+        assert index.with_agreement_status(6, "signed") is index
+
+
+class TestAgreementIndexCache(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_AGREEMENT_INDEX_CACHE_TTL"] = 60
+        self.fetch_supplier_frameworks = mock.Mock(return_value=SUPPLIER_FRAMEWORKS)
+
+    def test_index_is_cached(self):
+        with self.app.app_context():
+            get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+            index = get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+
+        assert index.next_supplier_id(1) == 2
+        assert self.fetch_supplier_frameworks.call_count == 1
+
+    def test_index_expires(self):
+        self.app.config["DM_AGREEMENT_INDEX_CACHE_TTL"] = 0
+        with self.app.app_context():
+            get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+            get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+
+        assert self.fetch_supplier_frameworks.call_count == 2
+
+    def test_update_agreement_status(self):
+        with self.app.app_context():
+            get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+            update_agreement_status("g-cloud-11", 3, "approved")
+            # (for a framework we have no index for)
+            update_agreement_status("g-cloud-10", 3, "approved")
+
+            index = get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+
+        assert index.next_supplier_id(1, ["signed"]) is None
+        assert index.next_supplier_id(1, ["approved"]) == 3
+        assert self.fetch_supplier_frameworks.call_count == 1
+
+    def test_invalidate(self):
+        with self.app.app_context():
+            get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+            invalidate_agreement_index("g-cloud-11")
+            get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+
+        assert self.fetch_supplier_frameworks.call_count == 2
+
+    def test_concurrent_requests_share_one_fetch(self):
+        fetch_started, release_fetch = threading.Event(), threading.Event()
+
+        def fetch_supplier_frameworks():
+            fetch_started.set()
+            release_fetch.wait(5)
+            return SUPPLIER_FRAMEWORKS
+        self.fetch_supplier_frameworks.side_effect = fetch_supplier_frameworks
+
+        results = []
+
+        def get_index_in_thread():
+            with self.app.app_context():
+                results.append(get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks))
+
+        threads = [threading.Thread(target=get_index_in_thread) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        fetch_started.wait(5)
+        release_fetch.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert self.fetch_supplier_frameworks.call_count == 1
+        assert len(results) == 5
+        assert all(result is results[0] for result in results)
+
+    def test_update_made_while_index_is_built_is_kept(self):
+        fetch_started, release_fetch = threading.Event(), threading.Event()
+
+        def fetch_supplier_frameworks():
+            fetch_started.set()
+            release_fetch.wait(5)
+            return SUPPLIER_FRAMEWORKS
+        self.fetch_supplier_frameworks.side_effect = fetch_supplier_frameworks
+
+        def get_index_in_thread():
+            with self.app.app_context():
+                get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+
+        thread = threading.Thread(target=get_index_in_thread)
+        thread.start()
+        fetch_started.wait(5)
+
+        def update_in_thread():
+            with self.app.app_context():
+                update_agreement_status("g-cloud-11", 3, "countersigned")
+
+        update_thread = threading.Thread(target=update_in_thread)
+        update_thread.start()
+        release_fetch.set()
+        thread.join(5)
+        update_thread.join(5)
+
+        with self.app.app_context():
+            index = get_agreement_index("g-cloud-11", self.fetch_supplier_frameworks)
+
+        assert index.next_supplier_id(1, ["signed"]) is None
+        assert index.next_supplier_id(1, ["countersigned"]) == 3
+        assert self.fetch_supplier_frameworks.call_count == 1
@@ -0,0 +1,74 @@
+import mock
+import pytest
+
+from app.main.helpers.archived_services import ArchivedServiceCache, get_archived_service_summaries
+from ...helpers import BaseApplicationTest
+
+
+def _get_archived_service(archived_service_id):
+    return {
+        "services": {
+            "id": f"service-{archived_service_id}",
+            "serviceName": f"Service {archived_service_id}",
+            "supplierId": 1000 + archived_service_id,
+            "supplierName": f"Supplier {archived_service_id}",
+            "frameworkName": "G-Cloud 10",
+            "serviceDescription": "Far too long to be worth keeping",
+        },
+    }
+
+
+class TestArchivedServiceCache:
+    def test_least_recently_used_summaries_are_dropped(self):
+        cache = ArchivedServiceCache(max_size=2)
+        cache.set(1, {"serviceName": "One"})
+        cache.set(2, {"serviceName": "Two"})
+        assert cache.get(1) == {"serviceName": "One"}
+
+        cache.set(3, {"serviceName": "Three"})
+
+        assert len(cache) == 2
+        assert cache.get(2) is None
+        assert cache.get(1) == {"serviceName": "One"}
+        assert cache.get(3) == {"serviceName": "Three"}
+
+
+class TestGetArchivedServiceSummaries(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.data_api_client = mock.Mock()
+        self.data_api_client.get_archived_service.side_effect = _get_archived_service
+
+    def test_summaries_are_fetched_once(self):
+        with self.app.app_context():
+            assert get_archived_service_summaries(self.data_api_client, (1, 2, 1)) == {
+                1: {"serviceName": "Service 1", "supplierId": 1001, "supplierName": "Supplier 1",
+                    "frameworkName": "G-Cloud 10"},
+                2: {"serviceName": "Service 2", "supplierId": 1002, "supplierName": "Supplier 2",
+                    "frameworkName": "G-Cloud 10"},
+            }
+            assert sorted(
+                call[1]["archived_service_id"] for call in self.data_api_client.get_archived_service.call_args_list
+            ) == [1, 2]
+            self.data_api_client.get_archived_service.reset_mock()
+
+            assert get_archived_service_summaries(self.data_api_client, (2, 3)) == {
+                2: {"serviceName": "Service 2", "supplierId": 1002, "supplierName": "Supplier 2",
+                    "frameworkName": "G-Cloud 10"},
+                3: {"serviceName": "Service 3", "supplierId": 1003, "supplierName": "Supplier 3",
+                    "frameworkName": "G-Cloud 10"},
+            }
+            assert self.data_api_client.get_archived_service.call_args_list == [mock.call(archived_service_id=3)]
+
+    def test_errors_are_raised(self):
+        self.data_api_client.get_archived_service.side_effect = (
+            lambda archived_service_id: _get_archived_service(archived_service_id)["services"]["missing"]
+        )
+        with self.app.app_context():
+            with pytest.raises(KeyError):
+                get_archived_service_summaries(self.data_api_client, (1, 2))
+
+    def test_no_ids(self):
+        with self.app.app_context():
+            assert get_archived_service_summaries(self.data_api_client, ()) == {}
+        assert self.data_api_client.get_archived_service.called is False
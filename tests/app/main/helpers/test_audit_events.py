@@ -0,0 +1,157 @@
+import threading
+
+import mock
+
+from app.main.helpers.audit_events import (
+    clear_audit_event_page_cache,
+    find_audit_events_page,
+    iter_audit_events,
+    prefetch_audit_events_page,
+)
+from ...helpers import BaseApplicationTest
+
+
+class TestIterAuditEvents(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.pages_fetched = []
+        self.page_fetched = threading.Condition()
+
+        self.data_api_client = mock.Mock()
+        self.data_api_client.find_audit_events.side_effect = self._find_audit_events
+
+    def _find_audit_events(self, page, **kwargs):
+        with self.page_fetched:
+            self.pages_fetched.append(page)
+            self.page_fetched.notify_all()
+        return {
+            "auditEvents": [{"id": (page - 1) * 2 + 1}, {"id": (page - 1) * 2 + 2}],
+            "links": {"next": "http://example.com/next"} if page < 3 else {},
+        }
+
+    def test_all_pages_are_iterated_in_order(self):
+        with self.app.app_context():
+            assert [
+                audit_event["id"]
+                for audit_event in iter_audit_events(self.data_api_client, object_type="services", acknowledged="false")
+            ] == [1, 2, 3, 4, 5, 6]
+
+        assert self.data_api_client.find_audit_events.call_args_list == [
+            mock.call(page=page, object_type="services", acknowledged="false") for page in (1, 2, 3)
+        ]
+
+    def test_next_page_is_fetched_while_current_page_is_processed(self):
+        with self.app.app_context():
+            audit_events = iter_audit_events(self.data_api_client)
+            assert next(audit_events) == {"id": 1}
+
+            # this would time out if page 2 wasn't being fetched before we'd finished with page 1
+            with self.page_fetched:
+                assert self.page_fetched.wait_for(lambda: self.pages_fetched == [1, 2], timeout=5)
+
+            assert next(audit_events) == {"id": 2}
+            audit_events.close()
+
+        # only ever one page ahead
+        assert self.pages_fetched == [1, 2]
+
+    def test_single_page(self):
+        self.data_api_client.find_audit_events.side_effect = None
+        self.data_api_client.find_audit_events.return_value = {"auditEvents": [{"id": 1}], "links": {}}
+
+        with self.app.app_context():
+            assert list(iter_audit_events(self.data_api_client)) == [{"id": 1}]
+
+        assert self.data_api_client.find_audit_events.call_args_list == [mock.call(page=1)]
+
+    def test_empty_page_is_the_last(self):
+        self.data_api_client.find_audit_events.side_effect = None
+        self.data_api_client.find_audit_events.return_value = {
+            "auditEvents": [],
+            "links": {"next": "http://example.com/next"},
+        }
+
+        with self.app.app_context():
+            assert list(iter_audit_events(self.data_api_client)) == []
+
+        assert self.data_api_client.find_audit_events.call_args_list == [mock.call(page=1)]
+
+    def test_number_of_pages_is_limited(self):
+        self.app.config["DM_AUDIT_EVENT_MAX_PAGES"] = 2
+
+        with self.app.app_context():
+            assert [audit_event["id"] for audit_event in iter_audit_events(self.data_api_client)] == [1, 2, 3, 4]
+
+        assert self.pages_fetched == [1, 2]
+
+
+class TestAuditEventPages(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_AUDIT_EVENT_PAGE_CACHE_TTL"] = 30
+        # the calls made while being asked for a page, rather than fetching it ahead
+        self.calls_while_asked = []
+
+        self.data_api_client = mock.Mock()
+        self.data_api_client.find_audit_events.side_effect = self._find_audit_events
+
+    def _find_audit_events(self, page, **kwargs):
+        if threading.current_thread() is threading.main_thread():
+            self.calls_while_asked.append(mock.call(page=page, **kwargs))
+        return {"auditEvents": [{"id": page}], "links": {}}
+
+    def test_page_is_fetched_if_it_wasnt_fetched_ahead(self):
+        with self.app.app_context():
+            assert find_audit_events_page(self.data_api_client, 2, acknowledged="false") == {
+                "auditEvents": [{"id": 2}],
+                "links": {},
+            }
+
+        assert self.calls_while_asked == [mock.call(page=2, acknowledged="false")]
+
+    def test_page_fetched_ahead_is_used(self):
+        with self.app.app_context():
+            prefetch_audit_events_page(self.data_api_client, 2, acknowledged="false")
+            # already being fetched
+            prefetch_audit_events_page(self.data_api_client, 2, acknowledged="false")
+
+            assert find_audit_events_page(self.data_api_client, 2, acknowledged="false")["auditEvents"] == [{"id": 2}]
+
+        assert self.calls_while_asked == []
+        assert self.data_api_client.find_audit_events.call_args_list == [mock.call(page=2, acknowledged="false")]
+
+    def test_page_fetched_ahead_with_other_arguments_is_not_used(self):
+        with self.app.app_context():
+            prefetch_audit_events_page(self.data_api_client, 2, acknowledged="true")
+            find_audit_events_page(self.data_api_client, 2, acknowledged="false")
+
+        assert self.calls_while_asked == [mock.call(page=2, acknowledged="false")]
+
+    def test_page_which_failed_to_be_fetched_ahead_is_fetched_again(self):
+        def find_audit_events(page, **kwargs):
+            if threading.current_thread() is not threading.main_thread():
+                raise ValueError("no")
+            return self._find_audit_events(page, **kwargs)
+        self.data_api_client.find_audit_events.side_effect = find_audit_events
+
+        with self.app.app_context():
+            prefetch_audit_events_page(self.data_api_client, 2)
+            assert find_audit_events_page(self.data_api_client, 2)["auditEvents"] == [{"id": 2}]
+
+        assert self.calls_while_asked == [mock.call(page=2)]
+
+    def test_pages_fetched_ahead_expire(self):
+        self.app.config["DM_AUDIT_EVENT_PAGE_CACHE_TTL"] = 0
+        with self.app.app_context():
+            prefetch_audit_events_page(self.data_api_client, 2)
+            find_audit_events_page(self.data_api_client, 2)
+
+        assert self.calls_while_asked == [mock.call(page=2)]
+
+    def test_pages_fetched_ahead_are_forgotten_once_cleared(self):
+        with self.app.app_context():
+            prefetch_audit_events_page(self.data_api_client, 2)
+            clear_audit_event_page_cache()
+            find_audit_events_page(self.data_api_client, 2)
+
+        assert self.calls_while_asked == [mock.call(page=2)]
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+
+import mock
+from dmapiclient import APIError
+
+from app.main.helpers.bulk_service_status import (
+    BULK_SERVICE_STATUS_UPDATE_TIMEOUT,
+    BULK_SERVICE_STATUS_UPDATE_TTL,
+    RedisBulkServiceStatusUpdateStore,
+    get_bulk_service_status_update,
+    start_bulk_service_status_update,
+)
+from ...helpers import BaseApplicationTest, Response
+
+
+SERVICES = [{"id": str(service_id), "serviceName": f"Service {service_id}"} for service_id in range(1, 7)]
+
+
+class TestBulkServiceStatusUpdate(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.data_api_client = mock.Mock()
+
+    def _wait_for_update(self, update_id):
+        for _ in range(500):
+            update = get_bulk_service_status_update(update_id)
+            if update["complete"]:
+                return update
+            time.sleep(0.01)
+        raise AssertionError("update didn't finish")
+
+    def test_updates_all_services(self):
+        with self.app.app_context():
+            update_id = start_bulk_service_status_update(
+                self.data_api_client, SERVICES, "disabled", "user@example.com", supplierId=1234,
+            )
+            update = self._wait_for_update(update_id)
+
+        assert sorted(self.data_api_client.update_service_status.call_args_list) == [
+            mock.call(service["id"], "disabled", "user@example.com", wait_for_index=False) for service in SERVICES
+        ]
+        assert update == {
+            "supplierId": 1234,
+            "newStatus": "disabled",
+            "services": {service["id"]: service["serviceName"] for service in SERVICES},
+            "results": {service["id"]: None for service in SERVICES},
+            "startedAt": mock.ANY,
+            "complete": True,
+            "failures": {},
+            "stalled": False,
+        }
+
+    def test_failures_are_recorded_without_stopping_other_updates(self):
+        def update_service_status(service_id, *args, **kwargs):
+            if service_id == "2":
+                raise APIError(Response(500), "Gateway fell over")
+            if service_id == "4":
+                raise ValueError("Something unexpected")
+
+        self.data_api_client.update_service_status.side_effect = update_service_status
+
+        with self.app.app_context():
+            update = self._wait_for_update(start_bulk_service_status_update(
+                self.data_api_client, SERVICES, "published", "user@example.com",
+            ))
+
+        assert self.data_api_client.update_service_status.call_count == 6
+        assert update["failures"] == {"2": "Gateway fell over", "4": "Unexpected error"}
+
+    def test_concurrency_is_limited(self):
+        in_progress, max_in_progress = [], []
+
+        def update_service_status(*args, **kwargs):
+            in_progress.append(True)
+            max_in_progress.append(len(in_progress))
+            time.sleep(0.02)
+            in_progress.pop()
+
+        self.data_api_client.update_service_status.side_effect = update_service_status
+
+        with self.app.app_context():
+            self._wait_for_update(start_bulk_service_status_update(
+                self.data_api_client, SERVICES, "published", "user@example.com",
+            ))
+
+        assert max(max_in_progress) <= self.app.config["DM_BULK_SERVICE_STATUS_UPDATE_CONCURRENCY"]
+
+    def test_update_which_goes_on_too_long_has_stalled(self):
+        release_updates = threading.Event()
+        self.data_api_client.update_service_status.side_effect = lambda *args, **kwargs: release_updates.wait(5)
+
+        with self.app.app_context():
+            with mock.patch("app.main.helpers.bulk_service_status.time.time") as time_:
+                time_.return_value = 1000
+                update_id = start_bulk_service_status_update(
+                    self.data_api_client, SERVICES, "disabled", "user@example.com",
+                )
+                assert get_bulk_service_status_update(update_id)["stalled"] is False
+
+                time_.return_value = 1000 + BULK_SERVICE_STATUS_UPDATE_TIMEOUT + 1
+                update = get_bulk_service_status_update(update_id)
+
+            release_updates.set()
+            self._wait_for_update(update_id)
+
+        assert update["complete"] is False
+        assert update["stalled"] is True
+
+    def test_unknown_update(self):
+        with self.app.app_context():
+            assert get_bulk_service_status_update("not-an-update") is None
+
+
+class TestRedisBulkServiceStatusUpdateStore:
+    def setup_method(self, method):
+        self.redis = mock.Mock()
+        self.store = RedisBulkServiceStatusUpdateStore(self.redis)
+
+    def test_create(self):
+        self.store.create("abc", {"services": {"1": "Service 1"}})
+
+        assert self.redis.set.call_args_list == [mock.call(
+            "bulk-service-status-update:abc",
+            json.dumps({"services": {"1": "Service 1"}}),
+            ex=BULK_SERVICE_STATUS_UPDATE_TTL,
+        )]
+
+    def test_record_result(self):
+        self.store.record_result("abc", "1", "Oops")
+
+        pipeline = self.redis.pipeline.return_value
+        assert pipeline.hset.call_args_list == [mock.call("bulk-service-status-update:abc:results", "1", '"Oops"')]
+        assert pipeline.expire.call_args_list == [
+            mock.call("bulk-service-status-update:abc:results", BULK_SERVICE_STATUS_UPDATE_TTL),
+        ]
+        assert pipeline.execute.called
+
+    def test_get(self):
+        self.redis.get.return_value = json.dumps({"services": {"1": "Service 1", "2": "Service 2"}}).encode()
+        self.redis.hgetall.return_value = {b"1": b"null", b"2": b'"Oops"'}
+
+        assert self.store.get("abc") == {
+            "services": {"1": "Service 1", "2": "Service 2"},
+            "results": {"1": None, "2": "Oops"},
+        }
+        assert self.redis.get.call_args_list == [mock.call("bulk-service-status-update:abc")]
+        assert self.redis.hgetall.call_args_list == [mock.call("bulk-service-status-update:abc:results")]
+
+    def test_get_unknown_update(self):
+        self.redis.get.return_value = None
+        assert self.store.get("abc") is None
@@ -0,0 +1,76 @@
+from freezegun import freeze_time
+import mock
+import pytest
+
+from app.main.helpers.buyer_reports import generate_buyer_reports, get_fresh_buyer_report_url
+from ...helpers import BaseApplicationTest, FakeS3Buckets
+
+
+BUYERS = [
+    {'id': 1, 'userResearchOptedIn': True, 'emailAddress': 'shania@example.com', 'name': "Shania Twain"},
+    {'id': 2, 'userResearchOptedIn': False, 'emailAddress': 'mariah@example.com', 'name': "Mariah Carey"},
+]
+
+
+class TestBuyerReports(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config['DM_REPORTS_BUCKET'] = 'digitalmarketplace-reports'
+        self.s3.side_effect = self.s3_buckets = FakeS3Buckets()
+
+        self.data_api_client = mock.Mock()
+        self.data_api_client.find_users_iter.side_effect = lambda **kwargs: iter(BUYERS)
+
+    def test_generate_buyer_reports(self):
+        with self.app.app_context(), freeze_time('2019-01-01 12:00:00'):
+            assert generate_buyer_reports(self.data_api_client) == [
+                'buyers/reports/all-buyers.csv',
+                'buyers/reports/user-research-buyers.csv',
+            ]
+
+        reports = self.s3_buckets.buckets['digitalmarketplace-reports']
+        assert reports['buyers/reports/all-buyers.csv'] == {
+            "body": (
+                b"email address,name\r\nmariah@example.com,Mariah Carey\r\nshania@example.com,Shania Twain\r\n"
+            ),
+            "acl": "bucket-owner-full-control",
+            "last_modified": "2019-01-01T12:00:00.000000Z",
+            "download_filename": "all-buyers-on-2019-01-01-at-12-00-00.csv",
+        }
+        assert reports['buyers/reports/user-research-buyers.csv'] == {
+            "body": b"email address,name\r\nshania@example.com,Shania Twain\r\n",
+            "acl": "bucket-owner-full-control",
+            "last_modified": "2019-01-01T12:00:00.000000Z",
+            "download_filename": "user-research-buyers-on-2019-01-01-at-12-00-00.csv",
+        }
+        assert self.data_api_client.find_users_iter.call_args_list == [mock.call(role="buyer")]
+
+    @pytest.mark.parametrize("report_type", ("all", "user-research"))
+    def test_fresh_report_url(self, report_type):
+        with self.app.app_context():
+            with freeze_time('2019-01-01 12:00:00'):
+                generate_buyer_reports(self.data_api_client)
+
+            with freeze_time('2019-01-01 12:59:00'):
+                assert get_fresh_buyer_report_url(report_type) == (
+                    "https://assets.test.digitalmarketplace.service.gov.uk/"
+                    f"buyers/reports/{'all' if report_type == 'all' else 'user-research'}-buyers.csv?signature=deadbeef"
+                )
+
+    def test_no_url_for_stale_report(self):
+        with self.app.app_context():
+            with freeze_time('2019-01-01 12:00:00'):
+                generate_buyer_reports(self.data_api_client)
+
+            with freeze_time('2019-01-01 13:00:01'):
+                assert get_fresh_buyer_report_url("all") is None
+
+    def test_no_url_for_missing_report(self):
+        with self.app.app_context():
+            assert get_fresh_buyer_report_url("all") is None
+
+    def test_no_url_without_reports_bucket(self):
+        self.app.config['DM_REPORTS_BUCKET'] = None
+        with self.app.app_context():
+            assert get_fresh_buyer_report_url("all") is None
+        assert self.s3.called is False
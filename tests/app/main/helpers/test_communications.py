@@ -0,0 +1,57 @@
+import mock
+
+from app.main.helpers.communications import get_communications, invalidate_communications
+from ...helpers import BaseApplicationTest
+
+
+class TestGetCommunications(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_COMMUNICATIONS_CACHE_TTL"] = 60
+        self.list_communications = mock.Mock(side_effect=lambda: {"communication": (), "clarification": ()})
+
+    def test_listings_are_kept_for_each_framework(self):
+        with self.app.app_context():
+            for _ in range(2):
+                assert get_communications("g-cloud-10", self.list_communications) == {
+                    "communication": (),
+                    "clarification": (),
+                }
+                get_communications("g-cloud-11", self.list_communications)
+
+        assert self.list_communications.call_count == 2
+
+    def test_listings_expire(self):
+        self.app.config["DM_COMMUNICATIONS_CACHE_TTL"] = 0
+        with self.app.app_context():
+            get_communications("g-cloud-10", self.list_communications)
+            get_communications("g-cloud-10", self.list_communications)
+
+        assert self.list_communications.call_count == 2
+
+    def test_invalidated_listings_are_forgotten(self):
+        with self.app.app_context():
+            get_communications("g-cloud-10", self.list_communications)
+            get_communications("g-cloud-11", self.list_communications)
+            invalidate_communications("g-cloud-10")
+            # (including for a framework we haven't listed)
+            invalidate_communications("g-cloud-12")
+            get_communications("g-cloud-10", self.list_communications)
+            get_communications("g-cloud-11", self.list_communications)
+
+        assert self.list_communications.call_count == 3
+
+    def test_listings_made_before_being_invalidated_are_not_kept(self):
+        def list_communications():
+            # a file is uploaded while the listings are being made
+            if self.list_communications.call_count == 1:
+                invalidate_communications("g-cloud-10")
+            return {"communication": (), "clarification": ()}
+        self.list_communications.side_effect = list_communications
+
+        with self.app.app_context():
+            get_communications("g-cloud-10", self.list_communications)
+            get_communications("g-cloud-10", self.list_communications)
+            get_communications("g-cloud-10", self.list_communications)
+
+        assert self.list_communications.call_count == 2
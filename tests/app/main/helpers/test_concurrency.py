@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+from flask import current_app, g, request
+
+from app.main.helpers.concurrency import fan_out
+from ...helpers import BaseApplicationTest
+
+
+class TestFanOut(BaseApplicationTest):
+    def test_results_are_in_order(self):
+        with self.app.app_context():
+            assert fan_out(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+
+    def test_calls_are_concurrent(self):
+        # this would time out if the calls were made one after another
+        barrier = threading.Barrier(3, timeout=5)
+        with self.app.app_context():
+            assert fan_out(barrier.wait, barrier.wait, barrier.wait)
+
+    def test_first_exception_in_call_order_is_raised(self):
+        def slow_failure():
+            time.sleep(0.05)
+            raise ValueError("slow")
+
+        def fast_failure():
+            raise KeyError("fast")
+
+        finished = []
+        with self.app.app_context():
+            with pytest.raises(ValueError):
+                fan_out(slow_failure, fast_failure, lambda: time.sleep(0.1) or finished.append(True))
+
+        # all the calls are waited for, even once one has failed
+        assert finished == [True]
+
+    def test_calls_have_request_context(self):
+        with self.app.test_request_context("/admin/suppliers/1234"):
+            g.thing = "value"
+            assert fan_out(
+                lambda: request.path,
+                lambda: current_app.name,
+                lambda: g.thing,
+                lambda: threading.current_thread() is not threading.main_thread(),
+            ) == ["/admin/suppliers/1234", self.app.name, "value", True]
+
+            # the caller's request is still usable afterwards
+            assert request.path == "/admin/suppliers/1234"
+
+    def test_single_call_is_made_directly(self):
+        with self.app.app_context():
+            assert fan_out(lambda: threading.current_thread() is threading.main_thread()) == [True]
@@ -0,0 +1,65 @@
+import gzip
+import zlib
+
+from flask import Flask
+import pytest
+
+from app.main.helpers.csv_downloads import csv_download_response, gzip_chunks
+
+
+CHUNKS = [b"email address,name\r\n"] + [f"user-{i}@example.com,User {i}\r\n".encode() for i in range(1000)]
+
+
+class TestGzipChunks:
+    def test_output_is_gzipped_input(self):
+        assert gzip.decompress(b"".join(gzip_chunks(iter(CHUNKS), flush_size=1024))) == b"".join(CHUNKS)
+
+    def test_output_is_flushed_after_the_first_chunk_and_every_flush_size_bytes(self):
+        consumed = []
+
+        def chunks():
+            for chunk in CHUNKS:
+                consumed.append(chunk)
+                yield chunk
+
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        compressed_chunks = gzip_chunks(chunks(), flush_size=1024)
+
+        assert decompressor.decompress(next(compressed_chunks)) == CHUNKS[0]
+
+        decompressed = CHUNKS[0]
+        for compressed_chunk in compressed_chunks:
+            decompressed += decompressor.decompress(compressed_chunk)
+            assert len(b"".join(consumed)) - len(decompressed) < 1024
+
+        assert decompressed == b"".join(CHUNKS)
+
+    def test_empty_input(self):
+        assert gzip.decompress(b"".join(gzip_chunks(iter([])))) == b""
+
+
+class TestCsvDownloadResponse:
+    @pytest.mark.parametrize("accept_encoding", (None, "identity", "deflate"))
+    def test_uncompressed(self, accept_encoding):
+        app = Flask(__name__)
+        headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+        with app.test_request_context(headers=headers):
+            response = csv_download_response(iter(CHUNKS), "users.csv")
+
+        assert response.headers["Content-Disposition"] == "attachment;filename=users.csv"
+        assert response.headers["Content-Type"] == "text/csv; charset=utf-8"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert "Content-Encoding" not in response.headers
+        assert response.get_data() == b"".join(CHUNKS)
+
+    @pytest.mark.parametrize("accept_encoding", ("gzip", "gzip, deflate, br", "deflate;q=1.0, gzip;q=0.5"))
+    def test_gzipped(self, accept_encoding):
+        app = Flask(__name__)
+        with app.test_request_context(headers={"Accept-Encoding": accept_encoding}):
+            response = csv_download_response(iter(CHUNKS), "users.csv")
+
+        assert response.headers["Content-Disposition"] == "attachment;filename=users.csv"
+        assert response.headers["Content-Type"] == "text/csv; charset=utf-8"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.get_data()) == b"".join(CHUNKS)
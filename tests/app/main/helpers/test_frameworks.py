@@ -0,0 +1,244 @@
+import threading
+
+import mock
+import pytest
+from dmapiclient import APIError, HTTPError
+from dmtestutils.api_model_stubs import FrameworkStub
+from werkzeug.exceptions import NotFound
+
+from app import create_app
+from app.main.helpers.frameworks import Frameworks, get_framework_or_404, get_frameworks, invalidate_frameworks
+from app.metrics import FRAMEWORK_CACHE_LOOKUPS_TOTAL
+from ...helpers import BaseApplicationTest
+
+
+FRAMEWORKS = [
+    FrameworkStub(slug="g-cloud-9", status="live").response(),
+    FrameworkStub(slug="g-cloud-10", status="open").response(),
+    FrameworkStub(slug="digital-outcomes-and-specialists-2", status="expired").response(),
+    FrameworkStub(slug="digital-outcomes-and-specialists-3", status="live").response(),
+]
+
+
+class TestFrameworks:
+    def setup_method(self, method):
+        self.frameworks = Frameworks(FRAMEWORKS)
+
+    def test_iterates_in_original_order(self):
+        assert list(self.frameworks) == FRAMEWORKS
+        assert len(self.frameworks) == 4
+
+    def test_get(self):
+        assert self.frameworks.get("g-cloud-10") is FRAMEWORKS[1]
+        assert self.frameworks.get("g-cloud-4") is None
+
+    def test_in_family(self):
+        assert self.frameworks.in_family("digital-outcomes-and-specialists") == FRAMEWORKS[2:]
+        assert self.frameworks.in_family("digital-widgets") == []
+
+    @pytest.mark.parametrize("statuses, expected_slugs", (
+        (("live",), ["g-cloud-9", "digital-outcomes-and-specialists-3"]),
+        (("expired", "open"), ["g-cloud-10", "digital-outcomes-and-specialists-2"]),
+        (("coming",), []),
+    ))
+    def test_with_status(self, statuses, expected_slugs):
+        assert [fw["slug"] for fw in self.frameworks.with_status(*statuses)] == expected_slugs
+
+    def test_lookups_return_new_lists(self):
+        self.frameworks.with_status("live").clear()
+        self.frameworks.in_family("g-cloud").clear()
+
+        assert len(self.frameworks.with_status("live")) == 2
+        assert len(self.frameworks.in_family("g-cloud")) == 2
+
+
+class TestFrameworkRegistry(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_FRAMEWORKS_CACHE_TTL"] = 300
+        self.client = mock.Mock()
+        self.client.find_frameworks.return_value = {"frameworks": FRAMEWORKS}
+
+    def test_frameworks_are_cached(self):
+        with self.app.app_context():
+            assert list(get_frameworks(self.client)) == FRAMEWORKS
+            assert get_frameworks(self.client) is get_frameworks(self.client)
+
+        assert self.client.find_frameworks.call_count == 1
+
+    def test_frameworks_are_fetched_again_once_expired(self):
+        with self.app.app_context(), mock.patch("app.main.helpers.frameworks.time.monotonic") as monotonic:
+            monotonic.return_value = 1000
+            get_frameworks(self.client)
+            monotonic.return_value = 1299
+            get_frameworks(self.client)
+            assert self.client.find_frameworks.call_count == 1
+
+            monotonic.return_value = 1300
+            get_frameworks(self.client)
+            assert self.client.find_frameworks.call_count == 2
+
+    def test_invalidate(self):
+        with self.app.app_context():
+            get_frameworks(self.client)
+            invalidate_frameworks()
+            get_frameworks(self.client)
+
+        assert self.client.find_frameworks.call_count == 2
+
+    def test_cache_is_per_application(self):
+        with self.app.app_context():
+            get_frameworks(self.client)
+        with create_app("test").app_context():
+            get_frameworks(self.client)
+
+        assert self.client.find_frameworks.call_count == 2
+
+    def test_expired_frameworks_are_used_if_refresh_fails(self):
+        self.app.config["DM_FRAMEWORKS_CACHE_TTL"] = 0
+        with self.app.app_context():
+            frameworks = get_frameworks(self.client)
+            self.client.find_frameworks.side_effect = APIError()
+
+            assert get_frameworks(self.client) is frameworks
+
+    def test_error_is_raised_if_there_are_no_frameworks_to_fall_back_on(self):
+        self.client.find_frameworks.side_effect = APIError()
+        with self.app.app_context():
+            with pytest.raises(APIError):
+                get_frameworks(self.client)
+
+    def test_concurrent_requests_share_one_fetch(self):
+        fetch_started, release_fetch = threading.Event(), threading.Event()
+
+        def find_frameworks():
+            fetch_started.set()
+            release_fetch.wait(5)
+            return {"frameworks": FRAMEWORKS}
+
+        self.client.find_frameworks.side_effect = find_frameworks
+        results = []
+
+        def get_frameworks_in_thread():
+            with self.app.app_context():
+                results.append(get_frameworks(self.client))
+
+        threads = [threading.Thread(target=get_frameworks_in_thread) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        fetch_started.wait(5)
+        release_fetch.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert self.client.find_frameworks.call_count == 1
+        assert len(results) == 5
+        assert all(result is results[0] for result in results)
+
+
+class TestGetFrameworkOr404(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_FRAMEWORK_CACHE_TTL"] = 30
+        self.client = mock.Mock()
+        self.client.get_framework.side_effect = self._get_framework
+
+    @staticmethod
+    def _get_framework(framework_slug):
+        if framework_slug not in ("g-cloud-9", "g-cloud-4"):
+            raise HTTPError(mock.Mock(status_code=404))
+        status = "live" if framework_slug == "g-cloud-9" else "expired"
+        return FrameworkStub(slug=framework_slug, status=status).single_result_response()
+
+    @staticmethod
+    def _lookups(result):
+        return FRAMEWORK_CACHE_LOOKUPS_TOTAL.labels(result=result)._value.get()
+
+    def test_framework_is_cached(self):
+        hits, misses = self._lookups("hit"), self._lookups("miss")
+
+        with self.app.app_context():
+            assert get_framework_or_404(self.client, "g-cloud-9")["slug"] == "g-cloud-9"
+            assert get_framework_or_404(self.client, "g-cloud-9")["slug"] == "g-cloud-9"
+
+        assert self.client.get_framework.call_args_list == [mock.call("g-cloud-9")]
+        assert self._lookups("hit") - hits == 1
+        assert self._lookups("miss") - misses == 1
+
+    def test_cached_framework_status_is_still_checked(self):
+        with self.app.app_context():
+            assert get_framework_or_404(self.client, "g-cloud-4", allowed_statuses=["expired"])["slug"] == "g-cloud-4"
+            with pytest.raises(NotFound):
+                get_framework_or_404(self.client, "g-cloud-4")
+
+        assert self.client.get_framework.call_count == 1
+
+    def test_unknown_framework_is_cached(self):
+        with self.app.app_context():
+            for _ in range(2):
+                with pytest.raises(NotFound):
+                    get_framework_or_404(self.client, "g-cloud-99")
+
+        assert self.client.get_framework.call_args_list == [mock.call("g-cloud-99")]
+
+    def test_other_errors_are_not_cached(self):
+        self.client.get_framework.side_effect = HTTPError(mock.Mock(status_code=503))
+        with self.app.app_context():
+            for _ in range(2):
+                with pytest.raises(HTTPError):
+                    get_framework_or_404(self.client, "g-cloud-9")
+
+        assert self.client.get_framework.call_count == 2
+
+    def test_framework_is_fetched_again_once_expired(self):
+        with self.app.app_context(), mock.patch("app.main.helpers.frameworks.time.monotonic") as monotonic:
+            monotonic.return_value = 1000
+            get_framework_or_404(self.client, "g-cloud-9")
+            monotonic.return_value = 1030
+            get_framework_or_404(self.client, "g-cloud-9")
+
+        assert self.client.get_framework.call_count == 2
+
+    def test_invalidate(self):
+        with self.app.app_context():
+            get_framework_or_404(self.client, "g-cloud-9")
+            with pytest.raises(NotFound):
+                get_framework_or_404(self.client, "not-a-framework")
+            invalidate_frameworks()
+            assert len(self.app.extensions["framework_registry"]) == 0
+
+            get_framework_or_404(self.client, "g-cloud-9")
+            with pytest.raises(NotFound):
+                get_framework_or_404(self.client, "not-a-framework")
+
+        assert self.client.get_framework.call_args_list.count(mock.call("g-cloud-9")) == 2
+        assert self.client.get_framework.call_args_list.count(mock.call("not-a-framework")) == 2
+
+    def test_expired_frameworks_are_dropped(self):
+        with self.app.app_context(), mock.patch("app.main.helpers.frameworks.time.monotonic") as monotonic:
+            monotonic.return_value = 1000
+            for i in range(10):
+                with pytest.raises(NotFound):
+                    get_framework_or_404(self.client, f"not-a-framework-{i}")
+            assert len(self.app.extensions["framework_registry"]) == 10
+
+            monotonic.return_value = 1030
+            get_framework_or_404(self.client, "g-cloud-9")
+            assert len(self.app.extensions["framework_registry"]) == 1
+
+    def test_number_of_frameworks_kept_is_limited(self):
+        self.app.config["DM_FRAMEWORK_CACHE_SIZE"] = 3
+        with self.app.app_context():
+            get_framework_or_404(self.client, "g-cloud-9")
+            for i in range(10):
+                with pytest.raises(NotFound):
+                    get_framework_or_404(self.client, f"not-a-framework-{i}")
+            assert len(self.app.extensions["framework_registry"]) == 3
+
+            # the longest kept has been dropped
+            get_framework_or_404(self.client, "g-cloud-9")
+            with pytest.raises(NotFound):
+                get_framework_or_404(self.client, "not-a-framework-9")
+
+        assert self.client.get_framework.call_args_list.count(mock.call("g-cloud-9")) == 2
+        assert self.client.get_framework.call_args_list.count(mock.call("not-a-framework-9")) == 1
@@ -0,0 +1,59 @@
+import mock
+
+from app.main.helpers.service_diffs import ServiceDiffCache, iter_service_diffs
+from ...helpers import BaseApplicationTest
+
+
+class TestServiceDiffCache:
+    def test_least_recently_used_diffs_are_dropped(self):
+        cache = ServiceDiffCache(max_size=2)
+        cache.set((1, "2019-01-01T00:00:00.000000Z"), (("serviceName", "<table>1</table>"),))
+        cache.set((2, "2019-01-01T00:00:00.000000Z"), (("serviceName", "<table>2</table>"),))
+        assert cache.get((1, "2019-01-01T00:00:00.000000Z")) == (("serviceName", "<table>1</table>"),)
+
+        cache.set((3, "2019-01-01T00:00:00.000000Z"), (("serviceName", "<table>3</table>"),))
+
+        assert len(cache) == 2
+        assert cache.get((2, "2019-01-01T00:00:00.000000Z")) is None
+        assert cache.get((1, "2019-01-01T00:00:00.000000Z")) == (("serviceName", "<table>1</table>"),)
+        assert cache.get((3, "2019-01-01T00:00:00.000000Z")) == (("serviceName", "<table>3</table>"),)
+
+
+class TestIterServiceDiffs(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.render_diffs = mock.Mock(side_effect=lambda: iter((
+            ("serviceName", "<table>name</table>"),
+            ("serviceDescription", "<table>description</table>"),
+        )))
+
+    def test_diffs_are_rendered_once_per_revision_pair(self):
+        with self.app.app_context():
+            for _ in range(2):
+                assert list(iter_service_diffs(123, "2019-01-01T00:00:00.000000Z", self.render_diffs)) == [
+                    ("serviceName", "<table>name</table>"),
+                    ("serviceDescription", "<table>description</table>"),
+                ]
+
+        assert self.render_diffs.call_count == 1
+
+    def test_diffs_are_rendered_again_for_a_new_revision(self):
+        with self.app.app_context():
+            list(iter_service_diffs(123, "2019-01-01T00:00:00.000000Z", self.render_diffs))
+            list(iter_service_diffs(123, "2019-01-02T00:00:00.000000Z", self.render_diffs))
+            list(iter_service_diffs(124, "2019-01-02T00:00:00.000000Z", self.render_diffs))
+
+        assert self.render_diffs.call_count == 3
+
+    def test_diffs_are_rendered_as_they_are_needed(self):
+        with self.app.app_context():
+            diffs = iter_service_diffs(123, "2019-01-01T00:00:00.000000Z", self.render_diffs)
+            assert self.render_diffs.called is False
+
+            assert next(diffs) == ("serviceName", "<table>name</table>")
+            diffs.close()
+
+            # we didn't get all of them, so none were kept
+            list(iter_service_diffs(123, "2019-01-01T00:00:00.000000Z", self.render_diffs))
+
+        assert self.render_diffs.call_count == 2
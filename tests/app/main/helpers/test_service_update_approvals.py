@@ -0,0 +1,151 @@
+import threading
+
+from dmapiclient import HTTPError
+from dmapiclient.audit import AuditTypes
+import mock
+import pytest
+
+from app.main.helpers.service_update_approvals import approve_service_updates
+from ...helpers import BaseApplicationTest
+
+
+class TestApproveServiceUpdates(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.lock = threading.Lock()
+        self.calls = []
+        self.approving = 0
+        self.most_approving = 0
+        # {service id: the id of its latest edit yet to be approved, if it's not the one chosen}
+        self.latest_audit_event_ids = {}
+
+        self.data_api_client = mock.Mock()
+        self.data_api_client.get_audit_event.side_effect = self._get_audit_event
+        self.data_api_client.find_audit_events.side_effect = self._find_audit_events
+        self.data_api_client.acknowledge_service_update_including_previous.side_effect = self._acknowledge
+
+    def _get_audit_event(self, audit_event_id):
+        with self.lock:
+            self.calls.append(("get", audit_event_id))
+        if audit_event_id > 100:
+            raise HTTPError(mock.Mock(status_code=404))
+        return {
+            "auditEvents": {
+                "id": audit_event_id,
+                "type": "update_service",
+                "acknowledged": False,
+                "data": {"serviceId": str(audit_event_id * 10), "supplierName": "Supplier"},
+            },
+        }
+
+    def _find_audit_events(self, object_id, **kwargs):
+        latest_audit_event_id = self.latest_audit_event_ids.get(object_id, int(object_id) // 10)
+        return {
+            "auditEvents": [] if latest_audit_event_id is None else [{
+                "id": latest_audit_event_id,
+                "type": "update_service",
+                "acknowledged": False,
+                "data": {"serviceId": object_id, "supplierName": "Supplier"},
+            }],
+            "links": {},
+        }
+
+    def _acknowledge(self, service_id, audit_event_id, user_email):
+        with self.lock:
+            self.calls.append(("acknowledge", audit_event_id))
+            self.approving += 1
+            self.most_approving = max(self.most_approving, self.approving)
+        threading.Event().wait(0.01)
+        with self.lock:
+            self.approving -= 1
+
+    def test_all_edits_are_checked_before_any_are_approved(self):
+        with self.app.app_context():
+            results = approve_service_updates(self.data_api_client, range(1, 11), "user@example.com")
+
+        assert [result["error"] for result in results] == [None] * 10
+        assert sorted(self.calls[:10]) == [("get", audit_event_id) for audit_event_id in range(1, 11)]
+        assert sorted(self.calls[10:]) == [("acknowledge", audit_event_id) for audit_event_id in range(1, 11)]
+
+    def test_approvals_are_made_a_limited_number_at_a_time(self):
+        with self.app.app_context():
+            approve_service_updates(self.data_api_client, range(1, 31), "user@example.com")
+
+        # (the thread pool is shared by the whole process, so is created with the config of whichever app uses it first)
+        assert 1 < self.most_approving <= self.app.config["DM_SERVICE_UPDATE_APPROVAL_CONCURRENCY"]
+
+    def test_results_are_in_the_order_given(self):
+        with self.app.app_context():
+            results = approve_service_updates(self.data_api_client, (3, 101, 1, 3), "user@example.com")
+
+        assert results == [
+            {"auditEventId": 3, "serviceId": "30", "supplierName": "Supplier", "error": None},
+            {
+                "auditEventId": 101,
+                "serviceId": None,
+                "supplierName": None,
+                "error": "This is not an edit to a service.",
+            },
+            {"auditEventId": 1, "serviceId": "10", "supplierName": "Supplier", "error": None},
+        ]
+        assert sorted(
+            call[0] for call in self.data_api_client.acknowledge_service_update_including_previous.call_args_list
+        ) == [("10", 1, "user@example.com"), ("30", 3, "user@example.com")]
+
+    def test_latest_edits_to_each_service_are_approved(self):
+        # services 10 and 20 have been edited again since the edits chosen
+        self.latest_audit_event_ids = {"10": 90, "20": 95}
+
+        with self.app.app_context():
+            results = approve_service_updates(self.data_api_client, (1, 2, 3), "user@example.com")
+
+        assert [result["error"] for result in results] == [None] * 3
+        assert [result["auditEventId"] for result in results] == [1, 2, 3]
+        assert sorted(
+            call[0] for call in self.data_api_client.acknowledge_service_update_including_previous.call_args_list
+        ) == [("10", 90, "user@example.com"), ("20", 95, "user@example.com"), ("30", 3, "user@example.com")]
+        assert self.data_api_client.find_audit_events.call_args_list[0] == mock.call(
+            object_type="services",
+            object_id="10",
+            audit_type=AuditTypes.update_service,
+            acknowledged="false",
+            latest_first="true",
+        )
+
+    def test_services_with_no_edits_left_to_approve_are_reported(self):
+        self.latest_audit_event_ids = {"10": None}
+
+        with self.app.app_context():
+            results = approve_service_updates(self.data_api_client, (1, 2), "user@example.com")
+
+        assert [result["error"] for result in results] == ["This edit has already been approved.", None]
+        assert [
+            call[0] for call in self.data_api_client.acknowledge_service_update_including_previous.call_args_list
+        ] == [("20", 2, "user@example.com")]
+
+    def test_unexpected_errors_are_reported(self):
+        self.data_api_client.acknowledge_service_update_including_previous.side_effect = ValueError("no")
+
+        with self.app.app_context():
+            results = approve_service_updates(self.data_api_client, (1,), "user@example.com")
+
+        assert results == [
+            {"auditEventId": 1, "serviceId": "10", "supplierName": "Supplier", "error": "Unexpected error"},
+        ]
+
+    def test_errors_checking_edits_are_raised(self):
+        self.data_api_client.get_audit_event.side_effect = HTTPError(mock.Mock(status_code=503))
+
+        with self.app.app_context():
+            with pytest.raises(HTTPError):
+                approve_service_updates(self.data_api_client, (1,), "user@example.com")
+
+        assert self.data_api_client.acknowledge_service_update_including_previous.called is False
+
+    def test_pages_of_edits_fetched_ahead_are_forgotten(self):
+        with self.app.app_context(), mock.patch(
+            "app.main.helpers.service_update_approvals.clear_audit_event_page_cache",
+        ) as clear_audit_event_page_cache:
+            approve_service_updates(self.data_api_client, (1,), "user@example.com")
+
+        assert clear_audit_event_page_cache.called is True
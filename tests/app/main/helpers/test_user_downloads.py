@@ -0,0 +1,73 @@
+import csv
+import random
+import tracemalloc
+
+import mock
+
+from app.main.helpers import user_downloads
+from app.main.helpers.user_downloads import generate_user_csv
+
+
+def _synthetic_users(number_of_users):
+    rng = random.Random(1234)
+    for i in range(number_of_users):
+        yield {"emailAddress": f"user-{i}@example.com", "name": f"User {rng.randrange(number_of_users):06}"}
+
+
+def _read_csv(chunks):
+    return list(csv.reader(b"".join(chunks).decode("utf-8").splitlines()))
+
+
+class TestGenerateUserCsv:
+    USERS = [
+        {"emailAddress": "zoe@example.com", "name": "Zoe"},
+        {"emailAddress": "bob@example.com", "name": "Bob"},
+        {"emailAddress": "amy@example.com", "name": "Amy"},
+        {"emailAddress": "bob2@example.com", "name": "Bob"},
+        {"name": "Ann"},
+    ]
+
+    EXPECTED_ROWS = [
+        ["email address", "name"],
+        ["amy@example.com", "Amy"],
+        ["", "Ann"],
+        ["bob@example.com", "Bob"],
+        ["bob2@example.com", "Bob"],
+        ["zoe@example.com", "Zoe"],
+    ]
+
+    def test_users_are_sorted_by_name(self):
+        assert _read_csv(generate_user_csv(iter(self.USERS))) == self.EXPECTED_ROWS
+
+    def test_users_are_sorted_by_name_in_chunks(self):
+        assert _read_csv(generate_user_csv(iter(self.USERS), sort_chunk_size=2)) == self.EXPECTED_ROWS
+
+    def test_no_users(self):
+        assert _read_csv(generate_user_csv(iter([]), sort_chunk_size=2)) == [["email address", "name"]]
+
+    def test_lots_of_users_are_sorted_in_chunks(self):
+        with mock.patch(
+            "app.main.helpers.user_downloads.TemporaryFile", wraps=user_downloads.TemporaryFile,
+        ) as temporary_file:
+            rows = csv.reader(chunk.decode("utf-8") for chunk in generate_user_csv(_synthetic_users(500000)))
+
+            assert next(rows) == ["email address", "name"]
+            previous_name, row_count = "", 0
+            for row in rows:
+                assert row[1] >= previous_name
+                previous_name, row_count = row[1], row_count + 1
+
+        assert row_count == 500000
+        assert temporary_file.call_count == 500000 / user_downloads.USER_CSV_SORT_CHUNK_SIZE
+
+    def test_memory_used_does_not_grow_with_the_number_of_users(self):
+        tracemalloc.start()
+        try:
+            for _ in generate_user_csv(_synthetic_users(50000), sort_chunk_size=1000):
+                pass
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # sorting them all at once would take over 15MB
+        assert peak_memory < 4 * 1024 * 1024
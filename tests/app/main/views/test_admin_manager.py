@@ -209,6 +209,59 @@ class TestAdminManagerListView(LoggedInApplicationTest):
             "/admin/admin-users/9095/edit",
         ]
 
+    def test_should_find_users_for_each_admin_role(self):
+        self.client.get("/admin/admin-users")
+
+        assert sorted(call[1]["role"] for call in self.data_api_client.find_users_iter.call_args_list) == sorted([
+            "admin",
+            "admin-ccs-category",
+            "admin-ccs-sourcing",
+            "admin-framework-manager",
+            "admin-ccs-data-controller",
+        ])
+
+    @pytest.mark.parametrize("page, expected_ids, expected_prev_page, expected_next_page", (
+        (None, [9089, 9088, 9087, 9092], None, "2"),
+        ("2", [9093, 9096, 9090, 9094], "1", "3"),
+        ("3", [9091, 9095], "2", None),
+    ))
+    def test_should_paginate_users(self, page, expected_ids, expected_prev_page, expected_next_page):
+        self.data_api_client.find_users_iter.side_effect = lambda role: iter(
+            self.SUPPORT_USERS + self.CATEGORY_USERS + self.SOURCING_USERS + self.FRAMEWORK_MANAGER_USERS +
+            self.DATA_CONTROLLER_USERS
+        ) if role == "admin" else iter([])
+
+        with mock.patch("app.main.views.admin_manager.ADMIN_USERS_PAGE_SIZE", 4):
+            response = self.client.get("/admin/admin-users", query_string={"page": page} if page else {})
+        document = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert document.xpath("//td[@class='summary-item-field-with-action']//a/@href") == [
+            f"/admin/admin-users/{user_id}/edit" for user_id in expected_ids
+        ]
+        assert document.xpath(
+            "//a[normalize-space(string())='Previous page']/@href"
+        ) == ([f"/admin/admin-users?page={expected_prev_page}"] if expected_prev_page else [])
+        assert document.xpath(
+            "//a[normalize-space(string())='Next page']/@href"
+        ) == ([f"/admin/admin-users?page={expected_next_page}"] if expected_next_page else [])
+
+    def test_should_404_for_page_after_the_last(self):
+        self.data_api_client.find_users_iter.side_effect = lambda role: iter(
+            self.SUPPORT_USERS + self.CATEGORY_USERS + self.SOURCING_USERS + self.FRAMEWORK_MANAGER_USERS +
+            self.DATA_CONTROLLER_USERS
+        ) if role == "admin" else iter([])
+
+        with mock.patch("app.main.views.admin_manager.ADMIN_USERS_PAGE_SIZE", 4):
+            response = self.client.get("/admin/admin-users", query_string={"page": "4"})
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("page", ("0", "-1", "first"))
+    def test_should_400_for_invalid_page(self, page):
+        response = self.client.get("/admin/admin-users", query_string={"page": page})
+        assert response.status_code == 400
+
     def test_should_have_invite_user_link(self):
         response = self.client.get("/admin/admin-users")
         document = html.fromstring(response.get_data(as_text=True))
@@ -5,6 +5,7 @@ import mock
 import pytest
 from lxml import html
 
+from app.main.helpers.agreements import update_agreement_status
 from app.main.views.agreements import get_status_labels
 from ...helpers import LoggedInApplicationTest
 
@@ -33,6 +34,7 @@ class TestListAgreements(LoggedInApplicationTest):
                     'agreementReturned': True,
                     'agreementReturnedAt': '2015-10-30T01:01:01.000000Z',
                     'agreementPath': 'path/11112-agreement.pdf',
+                    'agreementStatus': 'on-hold',
                     'frameworkSlug': 'g-cloud-8',
                     'onFramework': True
                 },
@@ -42,6 +44,7 @@ class TestListAgreements(LoggedInApplicationTest):
                     'agreementReturned': True,
                     'agreementReturnedAt': '2015-11-01T01:01:01.000000Z',
                     'agreementPath': 'path/11111-agreement.pdf',
+                    'agreementStatus': 'on-hold',
                     'frameworkSlug': 'g-cloud-8',
                     'onFramework': True
                 },
@@ -51,8 +54,19 @@ class TestListAgreements(LoggedInApplicationTest):
                     'agreementReturned': True,
                     'agreementReturnedAt': '2015-11-01T01:01:01.000000Z',
                     'agreementPath': 'path/11111-agreement.pdf',
+                    'agreementStatus': 'signed',
                     'onFramework': False
                 },
+                {
+                    'supplierName': 'My signed supplier',
+                    'supplierId': 11113,
+                    'agreementReturned': True,
+                    'agreementReturnedAt': '2015-11-02T01:01:01.000000Z',
+                    'agreementPath': 'path/11113-agreement.pdf',
+                    'agreementStatus': 'signed',
+                    'frameworkSlug': 'g-cloud-8',
+                    'onFramework': True
+                },
             ],
         }
 
@@ -140,20 +154,29 @@ class TestListAgreements(LoggedInApplicationTest):
                 "My Supplier",
                 "Submitted: Sunday 1 November 2015 at 1:01am GMT",
             ),
+            (
+                "/admin/suppliers/11113/agreements/g-cloud-8",
+                {},
+                "My signed supplier",
+                "Submitted: Monday 2 November 2015 at 1:01am GMT",
+            ),
         )
 
-        assert page.xpath("//*[@class='status-filters']//li[normalize-space(string())='All']")
+        assert page.xpath("//*[@class='status-filters']//li[normalize-space(string())='All (3)']")
 
+        status_counts = {"signed": 1, "on-hold": 2, "approved,countersigned": 0}
         assert tuple(
             (parse_qs(urlparse(a_element.attrib["href"]).query), a_element.xpath("normalize-space(string())"))
             for a_element in page.cssselect('.status-filters a')
         ) == tuple(
-            ({"status": [status_key]}, status_label)
+            ({"status": [status_key]}, f"{status_label} ({status_counts[status_key]})")
             for status_key, status_label in self.status_labels.items()
         )
 
         summary_elem = page.xpath("//p[@class='govuk-body search-summary-border-bottom']")[0]
-        assert summary_elem.xpath("normalize-space(string())") == '2 agreements returned'
+        assert summary_elem.xpath("normalize-space(string())") == '3 agreements returned'
+
+        assert not page.xpath("//a[normalize-space(string())='Previous page' or normalize-space(string())='Next page']")
 
     def test_happy_path_notall_g8(self):
         self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
@@ -173,9 +196,10 @@ class TestListAgreements(LoggedInApplicationTest):
         call_args = self.data_api_client.find_framework_suppliers.call_args
         assert call_args[0] == ("g-cloud-8",)
         # slightly elaborate assertion here to allow for missing kwargs defaulting to None
+        # we fetch all the statuses so we can count them
         assert all(call_args[1].get(key) == value for key, value in (
             ("agreement_returned", True),
-            ("statuses", chosen_status_key),
+            ("statuses", None),
             ("with_declarations", False),
         ))
 
@@ -197,7 +221,7 @@ class TestListAgreements(LoggedInApplicationTest):
         assert any(
             # (don't really want to risk shoving unescaped text into the xpath query, so pulling the elements out and
             # comparing them in python)
-            element.xpath("normalize-space(string())") == self.status_labels[chosen_status_key]
+            element.xpath("normalize-space(string())") == f"{self.status_labels[chosen_status_key]} (2)"
             for element in page.xpath("//*[@class='status-filters']//li")
         )
 
@@ -206,10 +230,10 @@ class TestListAgreements(LoggedInApplicationTest):
             for a_element in page.cssselect('.status-filters a')
         ) == tuple(chain(
             (
-                ({}, "All",),
+                ({}, "All (3)",),
             ),
             (
-                ({"status": [status_key]}, status_label)
+                ({"status": [status_key]}, f"{status_label} ({1 if status_key == 'signed' else 0})")
                 for status_key, status_label in self.status_labels.items() if status_key != chosen_status_key
             ),
         ))
@@ -234,6 +258,7 @@ class TestListAgreements(LoggedInApplicationTest):
                     'supplierId': 11112,
                     'agreementReturned': True,
                     'agreementReturnedAt': '2020-10-30T01:01:01.000000Z',
+                    'agreementStatus': 'signed',
                     'frameworkSlug': 'g-cloud-12',
                     'onFramework': True
                 }
@@ -246,7 +271,7 @@ class TestListAgreements(LoggedInApplicationTest):
         assert response.status_code == 200
 
         assert self.data_api_client.find_framework_suppliers.call_args_list == [
-            mock.call('g-cloud-12', agreement_returned=True, statuses="signed", with_declarations=False)
+            mock.call('g-cloud-12', agreement_returned=True, with_declarations=False)
         ]
         assert page.xpath('//h2[@class="search-result-title"]//a')[0].text.strip() == "My other supplier"
 
@@ -269,6 +294,7 @@ class TestListAgreements(LoggedInApplicationTest):
                     'agreementReturned': True,
                     'agreementReturnedAt': '2020-10-30T01:01:01.000000Z',
                     'countersignedPath': 'path/11112-countersigned-agreement.pdf',
+                    'agreementStatus': 'countersigned',
                     'frameworkSlug': 'g-cloud-12',
                     'onFramework': True
                 }
@@ -281,13 +307,80 @@ class TestListAgreements(LoggedInApplicationTest):
         assert response.status_code == 200
 
         assert self.data_api_client.find_framework_suppliers.call_args_list == [
-            mock.call('g-cloud-12', agreement_returned=True, statuses="approved,countersigned", with_declarations=False)
+            mock.call('g-cloud-12', agreement_returned=True, with_declarations=False)
         ]
         assert page.xpath('//h2[@class="search-result-title"]//a')[0].text.strip() == "My other supplier"
 
         summary_elem = page.xpath("//p[@class='govuk-body search-summary-border-bottom']")[0]
         assert summary_elem.xpath("normalize-space(string())") == '1 agreement countersigned'
 
+    @pytest.mark.parametrize("page_number,expected_supplier_ids,expected_prev_page,expected_next_page", (
+        (1, ["11112", "11111"], None, 2),
+        (2, ["11113"], 1, None),
+    ))
+    def test_list_agreements_is_paginated(
+        self, page_number, expected_supplier_ids, expected_prev_page, expected_next_page,
+    ):
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.find_framework_suppliers.return_value = self.find_framework_suppliers_return_value_g8
+
+        with mock.patch('app.main.views.agreements.AGREEMENTS_PAGE_SIZE', 2):
+            response = self.client.get(f'/admin/agreements/g-cloud-8?page={page_number}')
+        page = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert [
+            self._unpack_search_result(result)[0].split("/")[3] for result in page.cssselect('.search-result')
+        ] == expected_supplier_ids
+
+        summary_elem = page.xpath("//p[@class='govuk-body search-summary-border-bottom']")[0]
+        assert summary_elem.xpath("normalize-space(string())") == '3 agreements returned'
+
+        assert page.xpath(
+            "//a[normalize-space(string())='Previous page']/@href"
+        ) == ([f"/admin/agreements/g-cloud-8?page={expected_prev_page}"] if expected_prev_page else [])
+        assert page.xpath(
+            "//a[normalize-space(string())='Next page']/@href"
+        ) == ([f"/admin/agreements/g-cloud-8?page={expected_next_page}"] if expected_next_page else [])
+
+    def test_list_agreements_pagination_keeps_status(self):
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.find_framework_suppliers.return_value = self.find_framework_suppliers_return_value_g8
+
+        with mock.patch('app.main.views.agreements.AGREEMENTS_PAGE_SIZE', 1):
+            response = self.client.get('/admin/agreements/g-cloud-8?status=on-hold')
+        page = html.fromstring(response.get_data(as_text=True))
+
+        next_href = urlparse(page.xpath("//a[normalize-space(string())='Next page']/@href")[0])
+        assert next_href.path == "/admin/agreements/g-cloud-8"
+        assert parse_qs(next_href.query) == {"page": ["2"], "status": ["on-hold"]}
+
+    def test_list_agreements_only_formats_dates_for_the_current_page(self):
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.find_framework_suppliers.return_value = self.find_framework_suppliers_return_value_g8
+
+        with mock.patch('app.main.views.agreements.AGREEMENTS_PAGE_SIZE', 1):
+            with mock.patch('app.main.views.agreements.datetimeformat', return_value="a date") as datetimeformat:
+                response = self.client.get('/admin/agreements/g-cloud-8?page=2')
+
+        assert response.status_code == 200
+        assert datetimeformat.call_count == 1
+
+    def test_list_agreements_page_after_the_last_raises_404(self):
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.find_framework_suppliers.return_value = self.find_framework_suppliers_return_value_g8
+
+        with mock.patch('app.main.views.agreements.AGREEMENTS_PAGE_SIZE', 2):
+            response = self.client.get('/admin/agreements/g-cloud-8?page=3')
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("page", ("0", "-1", "two"))
+    def test_list_agreements_invalid_page_raises_400(self, page):
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        response = self.client.get(f'/admin/agreements/g-cloud-8?page={page}')
+        assert response.status_code == 400
+
     @pytest.mark.parametrize("role,expected_code", [
         ("admin", 403),
         ("admin-ccs-category", 200),
@@ -455,6 +548,20 @@ class TestNextAgreementRedirect(LoggedInApplicationTest):
         response = self.client.get('/admin/suppliers/151/agreements/g-cloud-8/next?status=bad')
         assert response.status_code == 400
 
+    def test_supplier_frameworks_are_reused_between_requests(self):
+        self.app.config["DM_AGREEMENT_INDEX_CACHE_TTL"] = 60
+
+        res = self.client.get('/admin/suppliers/1234/agreements/g-cloud-8/next?status=signed')
+        assert urlparse(res.location).path == "/admin/suppliers/31415/agreements/g-cloud-8"
+
+        with self.app.app_context():
+            update_agreement_status("g-cloud-8", 31415, "approved")
+
+        res = self.client.get('/admin/suppliers/1234/agreements/g-cloud-8/next?status=signed')
+        assert urlparse(res.location).path == "/admin/agreements/g-cloud-8"
+
+        assert self.data_api_client.find_framework_suppliers.call_count == 1
+
     @pytest.mark.parametrize("role,expected_code", [
         ("admin", 403),
         ("admin-ccs-category", 302),
@@ -64,10 +64,11 @@ class TestManageCommunicationsView(_BaseTestCommunicationsView):
         assert self.data_api_client.mock_calls == [
             mock.call.get_framework(self.framework_slug)
         ]
-        assert self.s3.mock_calls == [
-            mock.call("flop-slop-slap"),
-            mock.call().list('g-things-23/communications/updates/communications', load_timestamps=True),
-            mock.call().list('g-things-23/communications/updates/clarifications', load_timestamps=True),
+        # (listed concurrently, each with its own S3 object)
+        assert self.s3.call_args_list == [mock.call("flop-slop-slap")] * 2
+        assert sorted(self.s3.return_value.list.call_args_list) == [
+            mock.call('g-things-23/communications/updates/clarifications', load_timestamps=True),
+            mock.call('g-things-23/communications/updates/communications', load_timestamps=True),
         ]
 
     @pytest.mark.parametrize("framework_status", ("open", "standstill",))
@@ -180,12 +181,57 @@ class TestManageCommunicationsView(_BaseTestCommunicationsView):
         assert self.data_api_client.mock_calls == [
             mock.call.get_framework(self.framework_slug)
         ]
-        assert self.s3.mock_calls == [
-            mock.call("flop-slop-slap"),
-            mock.call().list('g-things-23/communications/updates/communications', load_timestamps=True),
-            mock.call().list('g-things-23/communications/updates/clarifications', load_timestamps=True),
+        # (listed concurrently, each with its own S3 object)
+        assert self.s3.call_args_list == [mock.call("flop-slop-slap")] * 2
+        assert sorted(self.s3.return_value.list.call_args_list) == [
+            mock.call('g-things-23/communications/updates/clarifications', load_timestamps=True),
+            mock.call('g-things-23/communications/updates/communications', load_timestamps=True),
+        ]
+
+    def test_listings_are_kept(self):
+        self.app.config["DM_COMMUNICATIONS_CACHE_TTL"] = 60
+        self.framework_stub = FrameworkStub(slug=self.framework_slug, status="open")
+        self.s3.return_value.list.side_effect = lambda prefix, *args, **kwargs: [
+            {"path": f"{prefix}/foo.pdf", "last_modified": "2018-01-01T01:01:01.000001Z", "filename": "foo.pdf"},
         ]
 
+        for _ in range(2):
+            response = self.client.get("/admin/communications/{}".format(self.framework_slug))
+            assert response.status_code == 200
+            assert html.fromstring(response.get_data(as_text=True)).xpath(
+                "//a[contains(@href, '/files/')]/@href"
+            ) == [
+                '/admin/communications/g-things-23/files/communication/foo.pdf',
+                '/admin/communications/g-things-23/files/clarification/foo.pdf',
+            ]
+
+        assert self.s3.return_value.list.call_count == 2
+
+    def test_listings_are_forgotten_after_upload(self):
+        self.app.config["DM_COMMUNICATIONS_CACHE_TTL"] = 60
+
+        assert self.client.get("/admin/communications/{}".format(self.framework_slug)).status_code == 200
+        assert self.client.post(
+            "/admin/communications/{}".format(self.framework_slug),
+            data={"communication": (BytesIO(b"doc"), "test-comm.csv")},
+        ).status_code == 302
+        assert self.client.get("/admin/communications/{}".format(self.framework_slug)).status_code == 200
+
+        assert self.s3.return_value.list.call_count == 4
+
+    def test_listings_are_forgotten_after_delete(self):
+        self.app.config["DM_COMMUNICATIONS_CACHE_TTL"] = 60
+        self.s3.return_value.path_exists.return_value = True
+
+        assert self.client.get("/admin/communications/{}".format(self.framework_slug)).status_code == 200
+        assert self.client.post(
+            "/admin/communications/{}/delete/communication/foo.pdf".format(self.framework_slug),
+            data={"confirm": "Delete file"},
+        ).status_code == 302
+        assert self.client.get("/admin/communications/{}".format(self.framework_slug)).status_code == 200
+
+        assert self.s3.return_value.list.call_count == 4
+
 
 class TestUploadCommunicationsView(_BaseTestCommunicationsView):
     def test_post_documents_for_framework(self):
@@ -1,4 +1,5 @@
 import csv
+import gzip
 
 import mock
 import pytest
@@ -111,12 +112,15 @@ class TestDirectAwardView(LoggedInApplicationTest):
             'services': {
                 'supplierId': 266018,
                 'supplierName': 'Somerford Associates Limited',
-                'serviceName': 'testServiceName'
+                'serviceName': 'testServiceName',
+                'frameworkName': 'G-Cloud 10',
             }
         }
 
         self.data_api_client.get_archived_service.return_value = get_archived_service_result
-        self.data_api_client.find_direct_award_projects.return_value = find_direct_award_projects_result
+        self.data_api_client.find_direct_award_projects_iter.return_value = iter(
+            find_direct_award_projects_result["projects"]
+        )
 
         response = self.client.get('/admin/direct-award/outcomes')
         assert response.status_code == 200
@@ -150,6 +154,127 @@ class TestDirectAwardView(LoggedInApplicationTest):
             '123', 'A Buyer', 'buyer@example.com'
         ]
 
+    def test_outcomes_csv_download_fetches_each_archived_service_once(self):
+        self.user_role = 'admin-ccs-sourcing'
+        self.data_api_client.find_direct_award_projects_iter.side_effect = lambda **kwargs: iter([
+            {
+                "id": project_id,
+                "name": f"Project {project_id}",
+                "outcome": {
+                    "award": {
+                        "awardValue": "1234.00",
+                        "awardingOrganisationName": "123321",
+                        "endDate": "2020-12-12",
+                        "startDate": "2002-12-12"
+                    },
+                    "completedAt": "2018-06-19T13:37:59.713497Z",
+                    "result": "awarded",
+                    "resultOfDirectAward": {
+                        "archivedService": {"id": archived_service_id, "service": {"id": "316684326093280"}},
+                    },
+                },
+                "users": [{"emailAddress": "buyer@example.com", "id": 123, "name": "A Buyer"}],
+            } for project_id, archived_service_id in ((1, 266018), (2, 266019), (3, 266018))
+        ])
+        self.data_api_client.get_archived_service.side_effect = lambda archived_service_id: {
+            'services': {
+                'supplierId': 1234,
+                'supplierName': 'Somerford Associates Limited',
+                'serviceName': f'Service {archived_service_id}',
+                'frameworkName': 'G-Cloud 10',
+            },
+        }
+
+        for _ in range(2):
+            response = self.client.get('/admin/direct-award/outcomes')
+            assert response.status_code == 200
+            assert [row[5] for row in csv.reader(response.get_data(as_text=True).splitlines())] == [
+                'Award service name', 'Service 266018', 'Service 266019', 'Service 266018',
+            ]
+
+        assert sorted(
+            call[1]["archived_service_id"] for call in self.data_api_client.get_archived_service.call_args_list
+        ) == [266018, 266019]
+
+    def _awarded_project(self, project_id):
+        return {
+            "id": project_id,
+            "name": f"Project {project_id}",
+            "outcome": {
+                "award": {
+                    "awardValue": "1234.00",
+                    "awardingOrganisationName": "123321",
+                    "endDate": "2020-12-12",
+                    "startDate": "2002-12-12"
+                },
+                "completedAt": "2018-06-19T13:37:59.713497Z",
+                "result": "awarded",
+                "resultOfDirectAward": {
+                    "archivedService": {"id": project_id, "service": {"id": "316684326093280"}},
+                },
+            },
+            "users": [{"emailAddress": "buyer@example.com", "id": 123, "name": "A Buyer"}],
+        }
+
+    def test_outcomes_csv_download_is_streamed(self):
+        self.user_role = 'admin-ccs-sourcing'
+        projects_fetched = []
+
+        def find_direct_award_projects_iter(**kwargs):
+            for project_id in range(1, 6):
+                projects_fetched.append(project_id)
+                yield self._awarded_project(project_id)
+
+        self.data_api_client.find_direct_award_projects_iter.side_effect = find_direct_award_projects_iter
+        self.data_api_client.get_archived_service.side_effect = lambda archived_service_id: {
+            'services': {
+                'supplierId': 1234,
+                'supplierName': 'Somerford Associates Limited',
+                'serviceName': f'Service {archived_service_id}',
+                'frameworkName': 'G-Cloud 10',
+            },
+        }
+
+        with mock.patch('app.main.views.outcomes.DIRECT_AWARD_OUTCOMES_BATCH_SIZE', 2):
+            response = self.client.get('/admin/direct-award/outcomes', buffered=False)
+            chunks = iter(response.response)
+
+            assert next(chunks).startswith(b'ID,Name,')
+            assert projects_fetched == []
+
+            assert next(chunks).startswith(b'1,Project 1,')
+            assert projects_fetched == [1, 2]
+            assert self.data_api_client.get_archived_service.call_count == 2
+
+            assert [row[0] for row in csv.reader(b"".join(chunks).decode().splitlines())] == ['2', '3', '4', '5']
+            assert projects_fetched == [1, 2, 3, 4, 5]
+            response.close()
+
+        assert self.data_api_client.find_direct_award_projects_iter.call_args_list == [
+            mock.call(having_outcome=True, with_users=True),
+        ]
+
+    def test_outcomes_csv_download_is_gzipped_if_accepted(self):
+        self.user_role = 'admin-ccs-sourcing'
+        self.data_api_client.find_direct_award_projects_iter.return_value = iter([self._awarded_project(1)])
+        self.data_api_client.get_archived_service.return_value = {
+            'services': {
+                'supplierId': 1234,
+                'supplierName': 'Somerford Associates Limited',
+                'serviceName': 'Service 1',
+                'frameworkName': 'G-Cloud 10',
+            },
+        }
+
+        response = self.client.get('/admin/direct-award/outcomes', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert [row[:6] for row in csv.reader(gzip.decompress(response.get_data()).decode().splitlines())] == [
+            ['ID', 'Name', 'Submitted at', 'Result', 'Award service ID', 'Award service name'],
+            ['1', 'Project 1', '2018-06-19T13:37:59.713497Z', 'awarded', '316684326093280', 'Service 1'],
+        ]
+
 
 class TestDOSView(LoggedInApplicationTest):
 
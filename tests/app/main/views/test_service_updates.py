@@ -1,4 +1,8 @@
 # -*- coding: utf-8 -*-
+from concurrent.futures import Future
+
+from dmapiclient import HTTPError
+from dmapiclient.audit import AuditTypes
 import mock
 import pytest
 from lxml import html
@@ -18,6 +22,35 @@ class TestServiceUpdates(LoggedInApplicationTest):
         self.data_api_client_patch.stop()
         super().teardown_method(method)
 
+    @staticmethod
+    def _get_archived_service(archived_service_id):
+        return {
+            "services": {
+                "serviceName": f"Service {archived_service_id}",
+                "supplierId": 93518,
+                "supplierName": "Clouded Networks",
+                "frameworkName": "G-Cloud 10",
+            },
+        }
+
+    @staticmethod
+    def _audit_events_response(page, links=None):
+        return {
+            "auditEvents": [
+                {
+                    "id": page * 100 + i,
+                    "data": {
+                        "oldArchivedServiceId": f"{page}0{i}",
+                        "newArchivedServiceId": f"{page}1{i}",
+                        "serviceId": f"59763793159{page}00{i}",
+                        "supplierName": "Clouded Networks",
+                    },
+                    "createdAt": "2012-07-15T18:03:43.061077Z",
+                } for i in range(3)
+            ],
+            "links": links or {},
+        }
+
     @pytest.mark.parametrize("role,expected_code", [
         ("admin", 403),
         ("admin-ccs-category", 200),
@@ -38,9 +71,9 @@ class TestServiceUpdates(LoggedInApplicationTest):
                 ('2017-04-25T14:43:46.061077Z', '597637931594387', u'Making £ Inc', '240701', '240684'),
             ),
             (
-                ('Company name', '1123456789012351', 'Sunday 15 July 2012 at 18:03:43', '/admin/services/1123456789012351/updates'),  # noqa
-                ('Testing Ltd', '1123456789012348', 'Saturday 5 March 2016 at 10:42:16', '/admin/services/1123456789012348/updates'),  # noqa
-                ('Making £ Inc', '597637931594387', 'Tuesday 25 April 2017 at 14:43:46', '/admin/services/597637931594387/updates'),  # noqa
+                ('', 'Company name', 'Service 240697 1123456789012351', 'G-Cloud 10', 'Sunday 15 July 2012 at 18:03:43', '/admin/services/1123456789012351/updates'),  # noqa
+                ('', 'Testing Ltd', 'Service 240699 1123456789012348', 'G-Cloud 10', 'Saturday 5 March 2016 at 10:42:16', '/admin/services/1123456789012348/updates'),  # noqa
+                ('', 'Making £ Inc', 'Service 240701 597637931594387', 'G-Cloud 10', 'Tuesday 25 April 2017 at 14:43:46', '/admin/services/597637931594387/updates'),  # noqa
             ),
             '3 edited services',
         ),
@@ -50,8 +83,8 @@ class TestServiceUpdates(LoggedInApplicationTest):
                 ('2016-03-05T10:42:16.061077Z', '597637931590001', 'Ideal Health', '240699', '240682'),
             ),
             (
-                ('Company name', '597637931590002', 'Sunday 15 July 2012 at 18:03:43', '/admin/services/597637931590002/updates'),  # noqa
-                ('Ideal Health', '597637931590001', 'Saturday 5 March 2016 at 10:42:16', '/admin/services/597637931590001/updates'),  # noqa
+                ('', 'Company name', 'Service 240697 597637931590002', 'G-Cloud 10', 'Sunday 15 July 2012 at 18:03:43', '/admin/services/597637931590002/updates'),  # noqa
+                ('', 'Ideal Health', 'Service 240699 597637931590001', 'G-Cloud 10', 'Saturday 5 March 2016 at 10:42:16', '/admin/services/597637931590001/updates'),  # noqa
             ),
             '2 edited services',
         ),
@@ -65,7 +98,7 @@ class TestServiceUpdates(LoggedInApplicationTest):
                 ('2012-07-15T18:03:43.061077Z', '597637931590002', 'Company name', '240697', '240680'),
             ),
             (
-                ('Company name', '597637931590002', 'Sunday 15 July 2012 at 18:03:43', '/admin/services/597637931590002/updates'),  # noqa
+                ('', 'Company name', 'Service 240697 597637931590002', 'G-Cloud 10', 'Sunday 15 July 2012 at 18:03:43', '/admin/services/597637931590002/updates'),  # noqa
             ),
             '1 edited service',
         ),
@@ -74,6 +107,7 @@ class TestServiceUpdates(LoggedInApplicationTest):
         self.data_api_client.find_audit_events.return_value = {
             "auditEvents": [
                 {
+                    "id": int(old_archived_service_id),
                     "data": {
                         "oldArchivedServiceId": old_archived_service_id,
                         "newArchivedServiceId": new_archived_service_id,
@@ -88,6 +122,8 @@ class TestServiceUpdates(LoggedInApplicationTest):
             "links": {},
         }
 
+        self.data_api_client.get_archived_service.side_effect = self._get_archived_service
+
         response = self.client.get('/admin/services/updates/unapproved')
 
         assert response.status_code == 200
@@ -101,12 +137,145 @@ class TestServiceUpdates(LoggedInApplicationTest):
         ) == expected_table_contents
 
         assert len(document.cssselect(f'p.govuk-body.search-summary:contains("{expected_count}")')) == 1
+        assert document.xpath("//form//input[@name='audit_event_id']/@value") == [
+            old_archived_service_id for _, _, _, old_archived_service_id, _ in audit_events
+        ]
 
         if audit_events != ():
             assert tuple(
                 tuple(th.xpath('normalize-space(string())') for th in tr.xpath('./th'))
                 for tr in document.xpath('//table[@class="summary-item-body"]/thead/tr')
-            ) == (('Supplier', 'Service ID', 'Edited', 'Changes'),)
+            ) == (('Choose', 'Supplier', 'Service', 'Framework', 'Edited', 'Changes'),)
+
+        assert self.data_api_client.find_audit_events.call_args_list == [
+            mock.call(
+                page=1,
+                audit_type=mock.ANY,
+                acknowledged='false',
+                latest_first='false',
+                earliest_for_each_object='true',
+            ),
+        ]
+        assert sorted(
+            call[1]["archived_service_id"] for call in self.data_api_client.get_archived_service.call_args_list
+        ) == sorted(old_archived_service_id for _, _, _, old_archived_service_id, _ in audit_events)
+
+    def test_pagination(self):
+        self.data_api_client.find_audit_events.side_effect = lambda page, **kwargs: self._audit_events_response(
+            page,
+            {
+                "prev": f"http://localhost/audit-events?page={page - 1}",
+                "next": f"http://localhost/audit-events?page={page + 1}",
+            },
+        )
+        self.data_api_client.get_archived_service.side_effect = self._get_archived_service
+
+        response = self.client.get('/admin/services/updates/unapproved?page=2')
+
+        assert response.status_code == 200
+        document = html.fromstring(response.get_data(as_text=True))
+
+        assert [
+            tr.xpath('normalize-space(string(./td[3]))')
+            for tr in document.xpath('//table[@class="summary-item-body"]/tbody/tr')
+        ] == ["Service 200 597637931592000", "Service 201 597637931592001", "Service 202 597637931592002"]
+        assert document.xpath("//a[contains(normalize-space(string()), 'Previous page')]/@href") == [
+            "/admin/services/updates/unapproved?page=1",
+        ]
+        assert document.xpath("//a[contains(normalize-space(string()), 'Next page')]/@href") == [
+            "/admin/services/updates/unapproved?page=3",
+        ]
+
+        # the next page is fetched ahead of its being asked for
+        assert sorted(
+            call[1]["page"] for call in self.data_api_client.find_audit_events.call_args_list
+        ) == [2, 3]
+        assert sorted(
+            call[1]["archived_service_id"] for call in self.data_api_client.get_archived_service.call_args_list
+        ) == ["200", "201", "202"]
+
+    def test_next_page_is_not_fetched_ahead_if_there_isnt_one(self):
+        self.data_api_client.find_audit_events.side_effect = lambda page, **kwargs: self._audit_events_response(
+            page,
+            {"prev": f"http://localhost/audit-events?page={page - 1}"},
+        )
+        self.data_api_client.get_archived_service.side_effect = self._get_archived_service
+
+        response = self.client.get('/admin/services/updates/unapproved?page=2')
+
+        assert response.status_code == 200
+        assert [call[1]["page"] for call in self.data_api_client.find_audit_events.call_args_list] == [2]
+        document = html.fromstring(response.get_data(as_text=True))
+        assert not document.xpath("//a[contains(normalize-space(string()), 'Next page')]")
+
+    def test_page_fetched_ahead_is_used(self):
+        self.app.config["DM_AUDIT_EVENT_PAGE_CACHE_TTL"] = 30
+        self.data_api_client.find_audit_events.side_effect = lambda page, **kwargs: self._audit_events_response(
+            page,
+            {"next": f"http://localhost/audit-events?page={page + 1}"},
+        )
+        self.data_api_client.get_archived_service.side_effect = self._get_archived_service
+
+        assert self.client.get('/admin/services/updates/unapproved').status_code == 200
+        response = self.client.get('/admin/services/updates/unapproved?page=2')
+
+        assert response.status_code == 200
+        assert "Service 200 597637931592000" in html.fromstring(response.get_data(as_text=True)).text_content()
+        # pages 1 and 2 once each, then page 3 fetched ahead
+        assert sorted(
+            call[1]["page"] for call in self.data_api_client.find_audit_events.call_args_list
+        ) == [1, 2, 3]
+
+    def test_pages_fetched_ahead_are_forgotten_once_edits_are_approved(self):
+        self.app.config["DM_AUDIT_EVENT_PAGE_CACHE_TTL"] = 30
+        self.data_api_client.find_audit_events.side_effect = lambda page, **kwargs: self._audit_events_response(
+            page,
+            {"next": f"http://localhost/audit-events?page={page + 1}"},
+        )
+        self.data_api_client.get_archived_service.side_effect = self._get_archived_service
+        self.data_api_client.get_audit_event.return_value = {
+            "auditEvents": {"id": 100, "type": "update_service", "acknowledged": False, "data": {"serviceId": "321"}},
+        }
+
+        assert self.client.get('/admin/services/updates/unapproved').status_code == 200
+        assert self.client.post('/admin/services/321/updates/100/approve').status_code == 302
+        assert self.client.get('/admin/services/updates/unapproved?page=2').status_code == 200
+
+        assert sorted(
+            call[1]["page"] for call in self.data_api_client.find_audit_events.call_args_list
+        ) == [1, 2, 2, 3]
+
+    def test_page_which_failed_to_be_fetched_ahead_is_fetched_again(self):
+        self.app.config["DM_AUDIT_EVENT_PAGE_CACHE_TTL"] = 30
+        failed = Future()
+        failed.set_exception(ValueError("no"))
+        with self.app.app_context():
+            self.app.extensions["audit_event_page_cache"].set(
+                (
+                    2,
+                    tuple(sorted({
+                        "audit_type": AuditTypes.update_service,
+                        "acknowledged": "false",
+                        "latest_first": "false",
+                        "earliest_for_each_object": "true",
+                    }.items())),
+                ),
+                failed,
+            )
+        self.data_api_client.find_audit_events.side_effect = lambda page, **kwargs: self._audit_events_response(page)
+        self.data_api_client.get_archived_service.side_effect = self._get_archived_service
+
+        response = self.client.get('/admin/services/updates/unapproved?page=2')
+
+        assert response.status_code == 200
+        assert [call[1]["page"] for call in self.data_api_client.find_audit_events.call_args_list] == [2]
+
+    @pytest.mark.parametrize("page", ("0", "-1", "two"))
+    def test_invalid_page(self, page):
+        response = self.client.get(f'/admin/services/updates/unapproved?page={page}')
+
+        assert response.status_code == 400
+        assert self.data_api_client.find_audit_events.called is False
 
     def test_acknowledge_audit_event_happy_path(self):
         audit_event = {
@@ -200,3 +369,103 @@ class TestServiceUpdates(LoggedInApplicationTest):
         self.data_api_client.get_audit_event.side_effect = lambda audit_event_id: {123: audit_event}[audit_event_id]
         response = self.client.post('/admin/services/321/updates/123/approve')
         assert response.status_code == 404
+
+
+class TestServiceUpdateApprovals(LoggedInApplicationTest):
+    user_role = 'admin-ccs-category'
+
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.data_api_client_patch = mock.patch('app.main.views.service_updates.data_api_client', autospec=True)
+        self.data_api_client = self.data_api_client_patch.start()
+
+        audit_events = {
+            audit_event_id: {
+                "id": audit_event_id,
+                "type": "update_service",
+                "acknowledged": False,
+                "data": {"serviceId": f"{audit_event_id}000", "supplierName": f"Supplier {audit_event_id}"},
+                "createdAt": "2015-06-17T08:49:22.999Z",
+            }
+            for audit_event_id in (1, 2, 3, 4)
+        }
+        audit_events[2]["acknowledged"] = True
+        audit_events[3]["type"] = "update_supplier"
+
+        def get_audit_event(audit_event_id):
+            if audit_event_id not in audit_events:
+                raise HTTPError(mock.Mock(status_code=404))
+            return {"auditEvents": audit_events[audit_event_id]}
+
+        def find_audit_events(object_id, **kwargs):
+            return {
+                "auditEvents": [
+                    audit_event for audit_event in reversed(list(audit_events.values()))
+                    if audit_event["data"]["serviceId"] == object_id and not audit_event["acknowledged"]
+                ],
+                "links": {},
+            }
+
+        def acknowledge_service_update_including_previous(service_id, audit_event_id, user_email):
+            if audit_event_id == 4:
+                raise HTTPError(mock.Mock(status_code=400), "Service is locked")
+            return {}
+
+        self.data_api_client.get_audit_event.side_effect = get_audit_event
+        self.data_api_client.find_audit_events.side_effect = find_audit_events
+        self.data_api_client.acknowledge_service_update_including_previous.side_effect = (
+            acknowledge_service_update_including_previous
+        )
+
+    def teardown_method(self, method):
+        self.data_api_client_patch.stop()
+        super().teardown_method(method)
+
+    def test_approve_chosen_edits(self):
+        response = self.client.post(
+            '/admin/services/updates/approve',
+            data={"audit_event_id": ["1", "2", "3", "4", "5", "1"]},
+        )
+
+        assert response.status_code == 200
+        document = html.fromstring(response.get_data(as_text=True))
+
+        assert document.xpath("normalize-space(string(//p[@id='approval-summary']))") == (
+            "1 of 5 edits approved, 4 could not be."
+        )
+        assert [
+            tuple(td.xpath('normalize-space(string())') for td in tr.xpath('./td'))
+            for tr in document.xpath('//table[@class="summary-item-body"]/tbody/tr')
+        ] == [
+            ("Supplier 1", "1000", "Approved"),
+            ("Supplier 2", "2000", "This edit has already been approved."),
+            ("Unknown", "Unknown", "This is not an edit to a service."),
+            ("Supplier 4", "4000", "Service is locked"),
+            ("Unknown", "Unknown", "This is not an edit to a service."),
+        ]
+
+        assert sorted(
+            call[0] for call in self.data_api_client.acknowledge_service_update_including_previous.call_args_list
+        ) == [("1000", 1, "test@example.com"), ("4000", 4, "test@example.com")]
+
+    def test_no_edits_chosen(self):
+        response = self.client.post('/admin/services/updates/approve', data={})
+
+        assert response.status_code == 302
+        assert response.location == 'http://localhost/admin/services/updates/unapproved'
+        self.assert_flashes("Choose the edited services to approve.", "error")
+        assert self.data_api_client.get_audit_event.called is False
+
+    def test_invalid_audit_event_id(self):
+        response = self.client.post('/admin/services/updates/approve', data={"audit_event_id": ["1", "one"]})
+
+        assert response.status_code == 400
+        assert self.data_api_client.acknowledge_service_update_including_previous.called is False
+
+    @pytest.mark.parametrize("role_not_allowed", ["admin", "admin-ccs-sourcing", "admin-manager"])
+    def test_forbidden_user_roles(self, role_not_allowed):
+        self.user_role = role_not_allowed
+        response = self.client.post('/admin/services/updates/approve', data={"audit_event_id": ["1"]})
+
+        assert response.status_code == 403
+        assert self.data_api_client.acknowledge_service_update_including_previous.called is False
@@ -1,6 +1,8 @@
 from functools import partial
 from io import BytesIO
 from itertools import chain
+import logging
+from math import ceil
 from urllib.parse import urlsplit
 
 import mock
@@ -1545,6 +1547,7 @@ class TestServiceUpdates(LoggedInApplicationTest):
     ):
         self.user_role = role
         self.data_api_client.get_service.return_value = self._mock_get_service_side_effect("published", "151")
+        self.data_api_client.find_audit_events.return_value = {"auditEvents": [], "links": {}}
         response = self.client.get('/admin/services/31415/updates')
         actual_code = response.status_code
         assert actual_code == expected_code, "Unexpected response {} for role {}".format(actual_code, role)
@@ -1568,6 +1571,7 @@ class TestServiceUpdates(LoggedInApplicationTest):
                 "supplierId": 909090,
                 "supplierName": "Barrington's",
                 "serviceName": "Lemonflavoured soap",
+                "updatedAt": "2012-07-01T09:00:00.000000Z",
             },
         }[service_id]}
 
@@ -1590,19 +1594,19 @@ class TestServiceUpdates(LoggedInApplicationTest):
         }[supplier_id]}
 
     @staticmethod
-    def _mock_find_audit_events_side_effect(find_audit_events_api_response, implicit_page_len, **kwargs):
-        if kwargs.get("page") or kwargs.get("page_len"):
+    def _mock_find_audit_events_side_effect(find_audit_events_api_response, implicit_page_len, page=1, **kwargs):
+        if kwargs.get("page_len"):
             raise NotImplementedError
 
         links = {
             "self": "http://example.com/dummy",
         }
-        if len(find_audit_events_api_response) > implicit_page_len:
+        if len(find_audit_events_api_response) > page * implicit_page_len:
             links["next"] = "http://example.com/dummy_next"
         if kwargs.get("latest_first") == "true":
             find_audit_events_api_response = find_audit_events_api_response[::-1]
         return {
-            "auditEvents": find_audit_events_api_response[:implicit_page_len],
+            "auditEvents": find_audit_events_api_response[(page - 1) * implicit_page_len:page * implicit_page_len],
             "links": links,
         }
 
@@ -1827,7 +1831,8 @@ class TestServiceUpdates(LoggedInApplicationTest):
         (
             (5, expected_message_about_latest_edit_4),
             (3, expected_message_about_latest_edit_4),
-            (2, expected_message_about_latest_edit_4)
+            (2, expected_message_about_latest_edit_4),
+            (1, expected_message_about_latest_edit_4),
         )
     )
 
@@ -1888,15 +1893,19 @@ class TestServiceUpdates(LoggedInApplicationTest):
         assert response.status_code == 200
         doc = html.fromstring(response.get_data(as_text=True))
 
-        assert all(
-            kwargs == {
-                "object_id": "151",
-                "object_type": "services",
-                "audit_type": AuditTypes.update_service,
-                "acknowledged": "false",
-                "latest_first": mock.ANY,
-            } for args, kwargs in self.data_api_client.find_audit_events.call_args_list
-        )
+        # every page of edits should have been fetched, oldest first
+        number_of_pages = max(ceil(len(find_audit_events_api_response) / find_audit_events_page_length), 1)
+        assert self.data_api_client.find_audit_events.call_args_list == [
+            mock.call(
+                object_id="151",
+                object_type="services",
+                audit_type=AuditTypes.update_service,
+                acknowledged="false",
+                latest_first="false",
+                page=page,
+            )
+            for page in range(1, number_of_pages + 1)
+        ]
 
         assert doc.cssselect('.govuk-caption-l')[0].text == "Barrington's"
         assert doc.cssselect('.govuk-heading-l')[0].text == "Lemonflavoured soap"
@@ -2019,3 +2028,134 @@ class TestServiceUpdates(LoggedInApplicationTest):
         doc = html.fromstring(response.get_data(as_text=True))
 
         assert doc.xpath("//p[normalize-space(string())=$expected_text]", expected_text=expected_latest_edit_info)
+
+    def test_diffs_are_only_rendered_once_per_revision(self, html_diff_tables_from_sections_iter):
+        find_audit_events_api_response, old_versions_of_services = self.published_service_multiple_edits[:2]
+        service_response = self._mock_get_service_side_effect("published", "151")
+        self.data_api_client.get_service.return_value = service_response
+        self.data_api_client.find_audit_events.side_effect = partial(
+            self._mock_find_audit_events_side_effect,
+            find_audit_events_api_response,
+            5,
+        )
+        self.data_api_client.get_archived_service.side_effect = partial(
+            self._mock_get_archived_service_side_effect,
+            old_versions_of_services,
+        )
+        self.data_api_client.get_supplier.side_effect = self._mock_get_supplier_side_effect
+        html_diff_tables_from_sections_iter.side_effect = lambda *a, **ka: iter((
+            ("dummy_section", "dummy_question", Markup("<div class='dummy-diff-table'>dummy</div>")),
+        ))
+
+        self.user_role = "admin-ccs-category"
+        for _ in range(2):
+            response = self.client.get('/admin/services/151/updates')
+            assert response.status_code == 200
+            assert html.fromstring(response.get_data(as_text=True)).xpath("//*[@class='dummy-diff-table']")
+
+        assert html_diff_tables_from_sections_iter.call_count == 1
+
+        # the service has since been edited again
+        service_response["services"]["updatedAt"] = "2012-07-02T09:00:00.000000Z"
+        response = self.client.get('/admin/services/151/updates')
+        assert response.status_code == 200
+        assert html.fromstring(response.get_data(as_text=True)).xpath("//*[@class='dummy-diff-table']")
+
+        assert html_diff_tables_from_sections_iter.call_count == 2
+
+    def test_diffs_are_streamed(self, html_diff_tables_from_sections_iter):
+        find_audit_events_api_response, old_versions_of_services = self.published_service_multiple_edits[:2]
+        self.data_api_client.get_service.side_effect = partial(self._mock_get_service_side_effect, "published")
+        self.data_api_client.find_audit_events.side_effect = partial(
+            self._mock_find_audit_events_side_effect,
+            find_audit_events_api_response,
+            5,
+        )
+        self.data_api_client.get_archived_service.side_effect = partial(
+            self._mock_get_archived_service_side_effect,
+            old_versions_of_services,
+        )
+        self.data_api_client.get_supplier.side_effect = self._mock_get_supplier_side_effect
+        questions_diffed = []
+
+        def _html_diff_tables_from_sections_iter(*args, **kwargs):
+            for question_id in ("serviceName", "serviceDescription"):
+                questions_diffed.append(question_id)
+                yield "dummy_section", question_id, Markup(f"<div class='dummy-diff-table'>{question_id}</div>")
+
+        html_diff_tables_from_sections_iter.side_effect = _html_diff_tables_from_sections_iter
+
+        self.user_role = "admin-ccs-category"
+        response = self.client.get('/admin/services/151/updates', buffered=False)
+        chunks = iter(response.response)
+
+        assert response.status_code == 200
+        assert next(chunks)
+        assert questions_diffed == []
+
+        doc = html.fromstring(b"".join(chunks).decode())
+        assert questions_diffed == ["serviceName", "serviceDescription"]
+        assert [div.text for div in doc.xpath("//*[@class='dummy-diff-table']")] == [
+            "serviceName",
+            "serviceDescription",
+        ]
+        assert len(doc.xpath("//h3[normalize-space(string())='Previously approved version']")) == 1
+        response.close()
+
+    def test_flash_messages_are_shown_and_cleared_when_streamed(self, html_diff_tables_from_sections_iter):
+        find_audit_events_api_response, old_versions_of_services = self.published_service_multiple_edits[:2]
+        self.data_api_client.get_service.side_effect = partial(self._mock_get_service_side_effect, "published")
+        self.data_api_client.find_audit_events.side_effect = partial(
+            self._mock_find_audit_events_side_effect,
+            find_audit_events_api_response,
+            5,
+        )
+        self.data_api_client.get_archived_service.side_effect = partial(
+            self._mock_get_archived_service_side_effect,
+            old_versions_of_services,
+        )
+        self.data_api_client.get_supplier.side_effect = self._mock_get_supplier_side_effect
+        html_diff_tables_from_sections_iter.side_effect = lambda *a, **ka: iter(())
+        with self.client.session_transaction() as session:
+            session["_flashes"] = [("message", "Some edits could not be approved.")]
+
+        self.user_role = "admin-ccs-category"
+        response = self.client.get('/admin/services/151/updates')
+
+        assert response.status_code == 200
+        assert "Some edits could not be approved." in response.get_data(as_text=True)
+        self.assert_no_flashes()
+
+    def test_time_spent_streaming_is_logged_once_finished(self, html_diff_tables_from_sections_iter):
+        find_audit_events_api_response, old_versions_of_services = self.published_service_multiple_edits[:2]
+        self.data_api_client.get_service.side_effect = partial(self._mock_get_service_side_effect, "published")
+        self.data_api_client.find_audit_events.side_effect = partial(
+            self._mock_find_audit_events_side_effect,
+            find_audit_events_api_response,
+            5,
+        )
+        self.data_api_client.get_archived_service.side_effect = partial(
+            self._mock_get_archived_service_side_effect,
+            old_versions_of_services,
+        )
+        self.data_api_client.get_supplier.side_effect = self._mock_get_supplier_side_effect
+        html_diff_tables_from_sections_iter.side_effect = lambda *a, **ka: iter(())
+
+        self.user_role = "admin-ccs-category"
+        with mock.patch.object(logging.getLogger("dmutils.timing"), "log") as log, mock.patch(
+            "app.main.helpers.templates.SLOW_RENDER_THRESHOLD", -1,
+        ):
+            response = self.client.get('/admin/services/151/updates', buffered=False)
+            chunks = iter(response.response)
+            assert next(chunks)
+            assert log.called is False
+
+            b"".join(chunks)
+            response.close()
+
+        assert log.call_args_list == [mock.call(
+            logging.DEBUG,
+            "Spent {duration_real}s in render_template",
+            exc_info=False,
+            extra={"duration_real": mock.ANY, "duration_process": mock.ANY},
+        )]
@@ -1,4 +1,5 @@
 from io import BytesIO
+import time
 from urllib.parse import urlparse, parse_qs
 
 import mock
@@ -1238,6 +1239,25 @@ class TestToggleSupplierServicesView(LoggedInApplicationTest):
 
         assert response.status_code == 400
 
+    def _wait_for_status_update(self, status_update_url):
+        # the updates are made in the background, so we have to keep checking until they're done
+        for _ in range(500):
+            response = self.client.get(status_update_url)
+            in_progress = "This page will update automatically" in response.get_data(as_text=True)
+            if response.status_code != 200 or not in_progress:
+                return response
+            time.sleep(0.01)
+        raise AssertionError("status update didn't finish")
+
+    def _toggle_services(self, action, framework):
+        response = self.client.post('/admin/suppliers/1000/services?{}={}'.format(action, framework))
+
+        assert response.status_code == 302
+        status_update_url = urlparse(response.location).path
+        assert status_update_url.startswith('/admin/suppliers/1000/services/status-updates/')
+
+        return self._wait_for_status_update(status_update_url)
+
     @pytest.mark.parametrize('action, initial_status, result_status', [
         ('remove', 'published', 'disabled'), ('publish', 'disabled', 'published')
     ])
@@ -1252,9 +1272,10 @@ class TestToggleSupplierServicesView(LoggedInApplicationTest):
 
         self.data_api_client.find_services_iter.side_effect = lambda *a, **k: iter((service_1, service_2, service_3,))
 
-        response = self.client.post('/admin/suppliers/1000/services?{}={}'.format(action, framework))
+        response = self._toggle_services(action, framework)
 
         assert response.status_code == 302
+        assert response.location == 'http://localhost/admin/suppliers/1000/services'
         assert self.data_api_client.find_services_iter.call_args_list == [
             mock.call(
                 supplier_id=1000,
@@ -1262,7 +1283,8 @@ class TestToggleSupplierServicesView(LoggedInApplicationTest):
                 status=initial_status  # Enabled services should not be included
             )
         ]
-        assert self.data_api_client.update_service_status.call_args_list == [
+        # the updates are made concurrently, so in no particular order
+        assert sorted(self.data_api_client.update_service_status.call_args_list) == [
             mock.call('5687123785023488', result_status, 'test@example.com', wait_for_index=False),
             mock.call('5687123785023489', result_status, 'test@example.com', wait_for_index=False),
             mock.call('5687123785023490', result_status, 'test@example.com', wait_for_index=False),
@@ -1274,7 +1296,7 @@ class TestToggleSupplierServicesView(LoggedInApplicationTest):
     def test_flashes_success_message(self, action, message_action):
         framework = 'g-cloud-8'
 
-        response = self.client.post('/admin/suppliers/1000/services?{}={}'.format(action, framework))
+        response = self._toggle_services(action, framework)
 
         assert response.status_code == 302
 
@@ -1285,6 +1307,88 @@ class TestToggleSupplierServicesView(LoggedInApplicationTest):
         with self.client.session_transaction() as session:
             assert session['_flashes'][0][1] == expected_flash_message
 
+    def test_reports_partial_failure(self):
+        service_1 = self.load_example_listing('services_response')['services'][0]
+        service_2 = {**service_1, 'id': '5687123785023489', 'serviceName': 'Troubled service'}
+        self.data_api_client.find_services_iter.side_effect = lambda *a, **k: iter((service_1, service_2,))
+
+        def update_service_status(service_id, *args, **kwargs):
+            if service_id == service_2['id']:
+                raise APIError(Response(500), "Something went wrong")
+
+        self.data_api_client.update_service_status.side_effect = update_service_status
+
+        response = self._toggle_services('remove', 'g-cloud-8')
+
+        assert response.status_code == 200
+        assert self.data_api_client.update_service_status.call_count == 2
+
+        document = html.fromstring(response.get_data(as_text=True))
+        assert document.xpath("normalize-space(//*[@id='status-update-progress'])") == "2 of 2 services done, 1 failed."
+        assert [
+            [cell.text_content().strip() for cell in row.xpath("./td")]
+            for row in document.cssselect(".summary-item-row")
+        ] == [["Troubled service (5687123785023489)", "Something went wrong"]]
+        assert not document.xpath("//meta[@http-equiv='refresh']")
+
+        with self.client.session_transaction() as session:
+            assert '_flashes' not in session
+
+    def test_status_update_page_refreshes_until_complete(self):
+        with mock.patch("app.main.views.suppliers.get_bulk_service_status_update") as get_bulk_service_status_update:
+            get_bulk_service_status_update.return_value = {
+                "action": "remove",
+                "supplierId": 1000,
+                "supplierName": "PROACTIS Group Ltd",
+                "frameworkName": "G-Cloud 8",
+                "services": {"1": "Service 1", "2": "Service 2", "3": "Service 3"},
+                "results": {"1": None, "2": "Oops"},
+                "complete": False,
+                "failures": {"2": "Oops"},
+                "stalled": False,
+            }
+            response = self.client.get('/admin/suppliers/1000/services/status-updates/abc123')
+
+        assert response.status_code == 200
+        assert get_bulk_service_status_update.call_args_list == [mock.call("abc123")]
+
+        document = html.fromstring(response.get_data(as_text=True))
+        assert document.xpath("normalize-space(//*[@id='status-update-progress'])") == "2 of 3 services done, 1 failed."
+        assert document.xpath("//meta[@http-equiv='refresh']/@content") == ["5"]
+        assert not document.xpath("//*[@id='status-update-stalled']")
+
+    def test_status_update_page_stops_refreshing_once_stalled(self):
+        with mock.patch("app.main.views.suppliers.get_bulk_service_status_update") as get_bulk_service_status_update:
+            get_bulk_service_status_update.return_value = {
+                "action": "remove",
+                "supplierId": 1000,
+                "supplierName": "PROACTIS Group Ltd",
+                "frameworkName": "G-Cloud 8",
+                "services": {"1": "Service 1", "2": "Service 2", "3": "Service 3"},
+                "results": {"1": None},
+                "complete": False,
+                "failures": {},
+                "stalled": True,
+            }
+            response = self.client.get('/admin/suppliers/1000/services/status-updates/abc123')
+
+        assert response.status_code == 200
+
+        document = html.fromstring(response.get_data(as_text=True))
+        assert document.xpath("normalize-space(//*[@id='status-update-progress'])") == "1 of 3 services done."
+        assert document.xpath("//*[@id='status-update-stalled']")
+        assert not document.xpath("//meta[@http-equiv='refresh']")
+
+    def test_404_for_unknown_status_update(self):
+        response = self.client.post('/admin/suppliers/1000/services?remove=g-cloud-8')
+        status_update_id = response.location.rsplit('/', 1)[-1]
+
+        response = self.client.get(f'/admin/suppliers/1000/services/status-updates/{status_update_id}x')
+        assert response.status_code == 404
+        # nor can one supplier's status update be seen as another's
+        response = self.client.get(f'/admin/suppliers/1001/services/status-updates/{status_update_id}')
+        assert response.status_code == 404
+
 
 class TestSupplierDraftServicesView(LoggedInApplicationTest):
     user_role = 'admin-framework-manager'
@@ -2898,6 +3002,12 @@ class TestPutSignedAgreementOnHold(LoggedInApplicationTest):
         assert self.data_api_client.put_signed_agreement_on_hold.call_args_list == []
         assert res.status_code == 403
 
+    @mock.patch('app.main.views.suppliers.update_agreement_status')
+    def test_agreement_status_is_updated_in_agreement_index(self, update_agreement_status):
+        self.client.post("/admin/suppliers/agreements/123/on-hold", data={"nameOfOrganisation": "Test"})
+
+        assert update_agreement_status.call_args_list == [mock.call("g-cloud-99-flake", 4321, "on-hold")]
+
     def test_happy_path(self):
         res = self.client.post(
             "/admin/suppliers/agreements/123/on-hold",
@@ -2953,6 +3063,12 @@ class TestApproveAgreement(LoggedInApplicationTest):
         assert self.data_api_client.approve_agreement_for_countersignature.call_args_list == []
         assert res.status_code == 403
 
+    @mock.patch('app.main.views.suppliers.update_agreement_status')
+    def test_agreement_status_is_updated_in_agreement_index(self, update_agreement_status):
+        self.client.post("/admin/suppliers/agreements/123/approve", data={"nameOfOrganisation": "Test"})
+
+        assert update_agreement_status.call_args_list == [mock.call("g-cloud-99p-world", 4321, "approved")]
+
     def test_happy_path(self):
         res = self.client.post(
             "/admin/suppliers/agreements/123/approve",
@@ -3014,6 +3130,12 @@ class TestUnapproveAgreement(LoggedInApplicationTest):
         assert self.data_api_client.unapprove_agreement_for_countersignature.call_args_list == []
         assert res.status_code == 403
 
+    @mock.patch('app.main.views.suppliers.update_agreement_status')
+    def test_agreement_status_is_updated_in_agreement_index(self, update_agreement_status):
+        self.client.post("/admin/suppliers/agreements/123/unapprove", data={"nameOfOrganisation": "Test"})
+
+        assert update_agreement_status.call_args_list == [mock.call("g-cloud-99p-world", 4321, "signed")]
+
     def test_happy_path(self):
         res = self.client.post(
             "/admin/suppliers/agreements/123/unapprove",
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
+import gzip
+
 import mock
 import pytest
 from lxml import html
 from dmtestutils.api_model_stubs import FrameworkStub
 from freezegun import freeze_time
 
-from ...helpers import LoggedInApplicationTest
+from app.main.helpers.buyer_reports import generate_buyer_reports
+from ...helpers import FakeS3Buckets, LoggedInApplicationTest
 
 
 class TestUsersView(LoggedInApplicationTest):
@@ -402,6 +405,48 @@ class TestUserResearchParticipantsExport(LoggedInApplicationTest):
         assert 'mariah@example.com,Mariah Carey' not in response.get_data(as_text=True)
         self.data_api_client.find_users_iter.assert_called_once_with(role='buyer')
 
+    def test_download_list_of_all_buyers_is_gzipped_if_accepted(self, s3):
+        with freeze_time('2019-01-01'):
+            response = self.client.get('/admin/users/download/buyers', headers={'Accept-Encoding': 'gzip, deflate'})
+
+        assert response.mimetype == 'text/csv'
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.get_data()) == (
+            b'email address,name\r\nmariah@example.com,Mariah Carey\r\nshania@example.com,Shania Twain\r\n'
+        )
+
+    @pytest.mark.parametrize(('url', 'report_path'), (
+        ('/admin/users/download/buyers', 'buyers/reports/all-buyers.csv'),
+        ('/admin/users/download/buyers/user-research', 'buyers/reports/user-research-buyers.csv'),
+    ))
+    def test_download_buyers_redirects_to_fresh_report(self, s3, url, report_path):
+        self.app.config['DM_REPORTS_BUCKET'] = 'digitalmarketplace-reports'
+        self.s3.side_effect = FakeS3Buckets()
+        with self.app.app_context(), freeze_time('2019-01-01 12:00:00'):
+            generate_buyer_reports(self.data_api_client)
+
+        with freeze_time('2019-01-01 12:30:00'):
+            response = self.client.get(url)
+
+        assert response.status_code == 302
+        assert response.location == (
+            f"https://assets.test.digitalmarketplace.service.gov.uk/{report_path}?signature=deadbeef"
+        )
+
+    @pytest.mark.parametrize('url', ('/admin/users/download/buyers', '/admin/users/download/buyers/user-research'))
+    def test_download_buyers_ignores_stale_report(self, s3, url):
+        self.app.config['DM_REPORTS_BUCKET'] = 'digitalmarketplace-reports'
+        self.s3.side_effect = FakeS3Buckets()
+        with self.app.app_context(), freeze_time('2019-01-01 12:00:00'):
+            generate_buyer_reports(self.data_api_client)
+
+        with freeze_time('2019-01-02 12:00:00'):
+            response = self.client.get(url)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/csv'
+        assert 'shania@example.com,Shania Twain' in response.get_data(as_text=True)
+
     @pytest.mark.parametrize(
         ('role', 'status_code'),
         (
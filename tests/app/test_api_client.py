@@ -0,0 +1,86 @@
+import mock
+import pytest
+from dmapiclient import DataAPIClient, HTTPError
+
+from app.api_client import RequestMemoisingDataAPIClient
+from .helpers import BaseApplicationTest
+
+
+class TestRequestMemoisingDataAPIClient(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.request = mock.patch.object(DataAPIClient, "_request").start()
+        self.request.side_effect = lambda method, url, *args, **kwargs: {"url": url, "data": {"count": 1}}
+        self.data_api_client = RequestMemoisingDataAPIClient("http://api", "token")
+
+    def teardown_method(self, method):
+        mock.patch.stopall()
+        super().teardown_method(method)
+
+    @pytest.mark.parametrize("method_name, args", (
+        ("get_framework", ("g-cloud-9",)),
+        ("get_service", ("1234567890",)),
+        ("get_supplier", (1234,)),
+        ("get_supplier_framework_info", (1234, "g-cloud-9")),
+    ))
+    def test_reads_are_made_once_per_request(self, method_name, args):
+        method = getattr(self.data_api_client, method_name)
+
+        with self.app.test_request_context():
+            assert method(*args) == method(*args)
+        assert self.request.call_count == 1
+
+        with self.app.test_request_context():
+            method(*args)
+        assert self.request.call_count == 2
+
+    def test_different_resources_are_read_separately(self):
+        with self.app.test_request_context():
+            self.data_api_client.get_supplier(1234)
+            self.data_api_client.get_supplier(5678)
+            self.data_api_client.get_supplier_framework_info(1234, "g-cloud-9")
+
+        assert self.request.call_count == 3
+
+    def test_callers_get_their_own_copies(self):
+        with self.app.test_request_context():
+            self.data_api_client.get_supplier(1234)["data"]["count"] = 2
+            assert self.data_api_client.get_supplier(1234)["data"]["count"] == 1
+
+    def test_writes_clear_memo(self):
+        with self.app.test_request_context():
+            self.data_api_client.get_supplier(1234)
+            self.data_api_client.update_supplier(1234, {"name": "Trinket"}, "user@example.com")
+            self.data_api_client.get_supplier(1234)
+
+        assert [call[0][:2] for call in self.request.call_args_list] == [
+            ("GET", "/suppliers/1234"),
+            ("POST", "/suppliers/1234"),
+            ("GET", "/suppliers/1234"),
+        ]
+
+    def test_failed_writes_clear_memo(self):
+        with self.app.test_request_context():
+            self.data_api_client.get_supplier(1234)
+            self.request.side_effect = HTTPError(mock.Mock(status_code=500))
+            with pytest.raises(HTTPError):
+                self.data_api_client.update_supplier(1234, {"name": "Trinket"}, "user@example.com")
+            self.request.side_effect = None
+            self.data_api_client.get_supplier(1234)
+
+        assert self.request.call_count == 3
+
+    def test_errors_are_not_memoised(self):
+        self.request.side_effect = HTTPError(mock.Mock(status_code=500))
+        with self.app.test_request_context():
+            for _ in range(2):
+                with pytest.raises(HTTPError):
+                    self.data_api_client.get_framework("g-cloud-9")
+
+        assert self.request.call_count == 2
+
+    def test_reads_outside_a_request_are_not_memoised(self):
+        self.data_api_client.get_framework("g-cloud-9")
+        self.data_api_client.get_framework("g-cloud-9")
+
+        assert self.request.call_count == 2
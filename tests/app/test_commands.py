@@ -0,0 +1,21 @@
+import mock
+
+from .helpers import BaseApplicationTest
+
+
+class TestGenerateBuyerReports(BaseApplicationTest):
+    @mock.patch('app.commands.generate_buyer_reports')
+    def test_generate_buyer_reports(self, generate_buyer_reports):
+        generate_buyer_reports.return_value = [
+            'buyers/reports/all-buyers.csv',
+            'buyers/reports/user-research-buyers.csv',
+        ]
+
+        result = self.app.test_cli_runner().invoke(args=['generate-buyer-reports'])
+
+        assert result.exit_code == 0
+        assert result.output == (
+            "Saved buyers/reports/all-buyers.csv\n"
+            "Saved buyers/reports/user-research-buyers.csv\n"
+        )
+        assert generate_buyer_reports.call_count == 1
@@ -1,11 +1,19 @@
 from collections import OrderedDict
+import difflib
 from itertools import chain
+import random
 
+import mock
 import pytest
 from lxml import html
 
 from app import content_loader
-from app.main.helpers.diff_tools import html_diff_tables_from_sections_iter
+from app.main.helpers.diff_tools import (
+    DIFF_SUMMARY_MAX_CHANGED_LINES,
+    _diff_table,
+    _patience_opcodes,
+    html_diff_tables_from_sections_iter,
+)
 from .helpers import BaseApplicationTest
 
 
@@ -343,3 +351,146 @@ class TestHtmlDiffTablesFromSections(BaseApplicationTest):
         ).filter(service_data_b).sections
 
         assert not tuple(html_diff_tables_from_sections_iter(content_sections, service_data_a, service_data_b))
+
+    def test_table_markup(self):
+        content_sections = content_loader.get_manifest(
+            "g-cloud-9",
+            'edit_service_as_admin',
+        ).filter({"lot": "cloud-support"}).sections
+
+        (diff,) = (
+            table_html for section_slug, question_id, table_html in html_diff_tables_from_sections_iter(
+                content_sections,
+                {"serviceName": "Hot\tpot & <kettle>\nAgenbite of inwit"},
+                {"serviceName": "Hot\tpot & <kettles>"},
+            ) if question_id == "serviceName"
+        )
+
+        assert diff == (
+            '<table>\n'
+            '        <tbody>\n'
+            '            <tr>'
+            '<td class="line-number">1</td><td class="line-content">Hot     pot &amp; &lt;kettle&gt;</td>'
+            '<td class="line-number line-number-addition">1</td>'
+            '<td class="line-content addition">Hot     pot &amp; &lt;kettle<ins>s</ins>&gt;</td>'
+            '</tr>\n'
+            '            <tr>'
+            '<td class="line-number line-number-removal">2</td>'
+            '<td class="line-content removal"><del>Agenbite of inwit</del></td>'
+            '<td class="line-number line-non-existent"></td><td class="line-content line-non-existent"></td>'
+            '</tr>\n'
+            '        </tbody>\n'
+            '    </table>'
+        )
+
+
+class TestDiffTable:
+    def test_rewritten_answers_are_diffed_without_difflib(self):
+        lines_1 = [f"Line {i} of the original description" for i in range(50)]
+        lines_2 = [f"Line {i} of the rewritten description" for i in range(50)]
+
+        with mock.patch.object(difflib, "_mdiff", wraps=difflib._mdiff) as _mdiff:
+            table = html.fragment_fromstring(_diff_table(lines_1, lines_2))
+
+        assert _mdiff.called is False
+        assert len(table.xpath("./tbody/tr")) == 50
+        assert table.xpath("./tbody/tr[2]/td[2]")[0].text_content() == "Line 1 of the original description"
+        assert table.xpath("./tbody/tr[2]/td[4]")[0].text_content() == "Line 1 of the rewritten description"
+        # similar lines are still compared character by character
+        assert table.xpath("./tbody/tr[2]/td[2]")[0].text == "Line 1 of the "
+        assert table.xpath("./tbody/tr[2]/td[4]")[0].text == "Line 1 of the "
+        assert table.xpath("./tbody/tr[2]/td[2]/del")
+        assert table.xpath("./tbody/tr[2]/td[4]/ins")
+
+    def test_very_long_lines_are_diffed_without_difflib(self):
+        line = "word " * 10000
+
+        with mock.patch.object(difflib, "_mdiff", wraps=difflib._mdiff) as _mdiff:
+            table = html.fragment_fromstring(_diff_table([line], [line + "more"]))
+
+        assert _mdiff.called is False
+        assert table.xpath("./tbody/tr/td[2]/del")[0].text == line
+        assert table.xpath("./tbody/tr/td[4]/ins")[0].text == line + "more"
+
+    def test_answers_with_many_small_changes_are_diffed_without_difflib(self):
+        # no one block of changed lines is large, but together they would take difflib many seconds to compare
+        lines_1, lines_2 = [], []
+        for section in range(47):
+            lines_1.append(f"Section {section}")
+            lines_2.append(f"Section {section}")
+            for paragraph in range(20):
+                line = f"Paragraph {paragraph} of section {section}: " + "word " * 190
+                lines_1.append(line)
+                lines_2.append(line.replace("word", "changed", 1))
+
+        with mock.patch.object(difflib, "_mdiff", wraps=difflib._mdiff) as _mdiff:
+            table = html.fragment_fromstring(_diff_table(lines_1, lines_2))
+
+        assert _mdiff.called is False
+        assert len(table.xpath("./tbody/tr")) == 987
+        assert table.xpath("./tbody/tr[1]/td[2]")[0].text_content() == "Section 0"
+        assert table.xpath("./tbody/tr[2]/td[2]/del")[0].text == lines_1[1]
+        assert table.xpath("./tbody/tr[2]/td[4]/ins")[0].text == lines_2[1]
+
+    def test_large_answers_are_summarised(self):
+        lines_1 = [f"Line {i}" for i in range(3000)]
+        lines_2 = lines_1[:100] + ["A new line"] + lines_1[100:2000] + lines_1[2001:]
+
+        table = html.fragment_fromstring(_diff_table(lines_1, lines_2))
+
+        assert [
+            tuple(td.text_content() for td in tr.xpath("./td")) for tr in table.xpath("./tbody/tr")
+        ] == [
+            ("", "97 unchanged lines not shown", "", "97 unchanged lines not shown"),
+            ("98", "Line 97", "98", "Line 97"),
+            ("99", "Line 98", "99", "Line 98"),
+            ("100", "Line 99", "100", "Line 99"),
+            ("", "", "101", "A new line"),
+            ("101", "Line 100", "102", "Line 100"),
+            ("102", "Line 101", "103", "Line 101"),
+            ("103", "Line 102", "104", "Line 102"),
+            ("", "1894 unchanged lines not shown", "", "1894 unchanged lines not shown"),
+            ("1998", "Line 1997", "1999", "Line 1997"),
+            ("1999", "Line 1998", "2000", "Line 1998"),
+            ("2000", "Line 1999", "2001", "Line 1999"),
+            ("2001", "Line 2000", "", ""),
+            ("2002", "Line 2001", "2002", "Line 2001"),
+            ("2003", "Line 2002", "2003", "Line 2002"),
+            ("2004", "Line 2003", "2004", "Line 2003"),
+            ("", "996 unchanged lines not shown", "", "996 unchanged lines not shown"),
+        ]
+
+    def test_summarised_changes_are_limited(self):
+        table = html.fragment_fromstring(_diff_table(
+            [f"Line {i}" for i in range(1500)],
+            [f"Changed line {i}" for i in range(1500)],
+        ))
+
+        rows = table.xpath("./tbody/tr")
+        assert len(rows) == DIFF_SUMMARY_MAX_CHANGED_LINES + 1
+        assert rows[-1].xpath("./td[2]")[0].text == (
+            f"{1500 - DIFF_SUMMARY_MAX_CHANGED_LINES} more changed lines not shown"
+        )
+
+    def test_patience_opcodes(self):
+        rng = random.Random(1234)
+        for _ in range(500):
+            lines_1 = [rng.choice("abcdef") for _ in range(rng.randint(0, 30))]
+            lines_2 = [rng.choice("abcdef") for _ in range(rng.randint(0, 30))]
+
+            # each opcode should follow on from the last, and together they should turn lines_1 into lines_2
+            i = j = 0
+            result = []
+            for tag, i1, i2, j1, j2 in _patience_opcodes(lines_1, lines_2):
+                assert (i1, j1) == (i, j)
+                if tag == "equal":
+                    assert lines_1[i1:i2] == lines_2[j1:j2]
+                else:
+                    assert tag == {(True, True): "replace", (True, False): "delete", (False, True): "insert"}[
+                        (i2 > i1, j2 > j1)
+                    ]
+                result.extend(lines_2[j1:j2])
+                i, j = i2, j2
+
+            assert (i, j) == (len(lines_1), len(lines_2))
+            assert result == lines_2
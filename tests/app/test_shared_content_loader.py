@@ -0,0 +1,290 @@
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import json
+import pickle
+
+import mock
+import pytest
+from dmapiclient import APIError
+from dmcontent import ContentLoader
+from dmcontent.errors import ContentNotFoundError, ContentTemplateError
+from dmcontent.utils import TemplateField
+
+from app import content_loader, create_app, data_api_client, _warm_up_content_loader
+from app.shared_content_loader import FrozenDict, FrozenList, SharedContentLoader, _LazyTemplateField, freeze
+from .helpers import BaseApplicationTest
+
+
+class TestFreeze:
+    def test_freeze_converts_nested_containers(self):
+        frozen = freeze({"a": [1, {"b": [2, 3]}], "c": "d"})
+
+        assert frozen == {"a": [1, {"b": [2, 3]}], "c": "d"}
+        assert isinstance(frozen, FrozenDict)
+        assert isinstance(frozen["a"], FrozenList)
+        assert isinstance(frozen["a"][1], FrozenDict)
+        assert isinstance(frozen["a"][1]["b"], FrozenList)
+
+    def test_freeze_leaves_frozen_values_alone(self):
+        frozen = freeze({"a": [1]})
+        assert freeze(frozen) is frozen
+
+    @pytest.mark.parametrize("mutation", (
+        lambda d: d.__setitem__("a", 2),
+        lambda d: d.__delitem__("a"),
+        lambda d: d.update(b=2),
+        lambda d: d.setdefault("b", 2),
+        lambda d: d.pop("a"),
+        lambda d: d.popitem(),
+        lambda d: d.clear(),
+    ))
+    def test_frozen_dict_is_read_only(self, mutation):
+        frozen = freeze({"a": 1})
+        with pytest.raises(TypeError):
+            mutation(frozen)
+        assert frozen == {"a": 1}
+
+    @pytest.mark.parametrize("mutation", (
+        lambda lst: lst.__setitem__(0, 2),
+        lambda lst: lst.__delitem__(0),
+        lambda lst: lst.append(2),
+        lambda lst: lst.extend([2]),
+        lambda lst: lst.insert(0, 2),
+        lambda lst: lst.pop(),
+        lambda lst: lst.remove(1),
+        lambda lst: lst.sort(),
+        lambda lst: lst.reverse(),
+        lambda lst: lst.clear(),
+    ))
+    def test_frozen_list_is_read_only(self, mutation):
+        frozen = freeze([1])
+        with pytest.raises(TypeError):
+            mutation(frozen)
+        assert frozen == [1]
+
+    def test_copies_are_mutable(self):
+        frozen = freeze({"a": [1, {"b": 2}]})
+
+        for shallow_copy in (frozen.copy(), dict(frozen), copy.copy(frozen)):
+            shallow_copy["c"] = 3
+            assert type(shallow_copy) is dict
+
+        deep_copy = copy.deepcopy(frozen)
+        deep_copy["a"].append(4)
+        deep_copy["a"][1]["b"] = 5
+        assert deep_copy == {"a": [1, {"b": 5}, 4]}
+        assert frozen == {"a": [1, {"b": 2}]}
+
+    def test_pickle_round_trip(self):
+        frozen = freeze({"a": [1, {"b": 2}]})
+        unpickled = pickle.loads(pickle.dumps(frozen))
+
+        assert unpickled == frozen
+        assert isinstance(unpickled, FrozenDict)
+        assert isinstance(unpickled["a"], FrozenList)
+
+
+class TestLazyTemplateField:
+    SOURCES = tuple(
+        f"Question {i} for {{{{ name }}}}\n\n* answer **{i}**\n* answer _{i}_\n\n[{i}](https://example.com/{i})"
+        for i in range(200)
+    )
+
+    def test_renders_as_template_field_does(self):
+        field = _LazyTemplateField(self.SOURCES[0], True)
+        assert field.render({"name": "Bob"}) == TemplateField(self.SOURCES[0], markdown=True).render({"name": "Bob"})
+
+    def test_template_syntax_errors_are_content_template_errors(self):
+        field = _LazyTemplateField("Hello {{ name", False)
+        with pytest.raises(ContentTemplateError):
+            field.render({"name": "Bob"})
+
+    def test_fields_first_rendered_concurrently_render_correctly(self):
+        expected = [TemplateField(source, markdown=True).render({"name": "Bob"}) for source in self.SOURCES]
+
+        fields = [_LazyTemplateField(source, True) for source in self.SOURCES]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert list(executor.map(lambda field: field.render({"name": "Bob"}), fields)) == expected
+
+
+class TestSharedContentLoader:
+    def setup_method(self, method):
+        self.content_loader = ContentLoader("app/content")
+        self.load_manifest = mock.patch.object(
+            self.content_loader,
+            "load_manifest",
+            wraps=self.content_loader.load_manifest,
+        ).start()
+        self.on_missing_manifest = mock.Mock()
+        self.shared_content_loader = SharedContentLoader(
+            self.content_loader,
+            on_missing_manifest=self.on_missing_manifest,
+        )
+
+    def teardown_method(self, method):
+        mock.patch.stopall()
+
+    def test_manifests_are_loaded_on_first_use(self):
+        assert self.load_manifest.called is False
+
+        manifest = self.shared_content_loader.get_manifest("g-cloud-9", "edit_service_as_admin")
+        assert manifest.sections
+        assert self.load_manifest.call_args_list == [
+            mock.call("g-cloud-9", "services", "edit_service_as_admin"),
+        ]
+
+        self.shared_content_loader.get_manifest("g-cloud-9", "edit_service_as_admin")
+        assert self.load_manifest.call_count == 1
+
+    def test_loaded_manifests_are_frozen(self):
+        self.shared_content_loader.get_manifest("g-cloud-9", "declaration")
+        assert isinstance(self.content_loader._content["g-cloud-9"]["declaration"], FrozenList)
+
+    def test_missing_manifests_are_only_looked_for_once(self):
+        for _ in range(2):
+            with pytest.raises(ContentNotFoundError):
+                self.shared_content_loader.get_manifest("g-cloud-4", "edit_service_as_admin")
+
+        assert self.load_manifest.call_count == 1
+        assert self.on_missing_manifest.call_args_list == [mock.call("edit_service_as_admin", "g-cloud-4")]
+
+    def test_warm_up(self):
+        self.shared_content_loader.warm_up(("g-cloud-4", "g-cloud-9",))
+
+        assert self.load_manifest.call_args_list == [
+            mock.call("g-cloud-4", "services", "edit_service_as_admin"),
+            mock.call("g-cloud-4", "declaration", "declaration"),
+            mock.call("g-cloud-9", "services", "edit_service_as_admin"),
+            mock.call("g-cloud-9", "declaration", "declaration"),
+        ]
+        self.load_manifest.reset_mock()
+
+        self.shared_content_loader.get_manifest("g-cloud-9", "edit_service_as_admin")
+        self.shared_content_loader.get_manifest("g-cloud-9", "declaration")
+        assert self.load_manifest.called is False
+
+    def test_snapshot_round_trip(self, tmpdir):
+        snapshot_path = str(tmpdir.join("content-snapshot.pickle"))
+        self.shared_content_loader.write_snapshot(snapshot_path, ("g-cloud-9",))
+
+        fresh_content_loader = ContentLoader("app/content")
+        load_manifest = mock.patch.object(fresh_content_loader, "load_manifest").start()
+        fresh_shared_content_loader = SharedContentLoader(fresh_content_loader)
+
+        assert fresh_shared_content_loader.load_snapshot(snapshot_path) is True
+
+        service_data = {"lot": "cloud-hosting", "serviceName": "Metempsychosis"}
+        for manifest in ("edit_service_as_admin", "declaration",):
+            assert [
+                (section.name, [question.id for question in section.questions])
+                for section in fresh_shared_content_loader.get_manifest("g-cloud-9", manifest).filter(service_data)
+            ] == [
+                (section.name, [question.id for question in section.questions])
+                for section in self.shared_content_loader.get_manifest("g-cloud-9", manifest).filter(service_data)
+            ]
+            assert isinstance(fresh_content_loader._content["g-cloud-9"][manifest], FrozenList)
+
+        assert load_manifest.called is False
+
+    def test_missing_snapshot_is_ignored(self, tmpdir):
+        assert self.shared_content_loader.load_snapshot(str(tmpdir.join("nonexistent.pickle"))) is False
+
+    def test_out_of_date_snapshot_is_ignored(self, tmpdir):
+        snapshot_path = str(tmpdir.join("content-snapshot.pickle"))
+        self.shared_content_loader.write_snapshot(snapshot_path, ("g-cloud-9",))
+
+        fresh_shared_content_loader = SharedContentLoader(ContentLoader("app/content"))
+        with mock.patch("app.shared_content_loader.content_version", return_value="something-else"):
+            assert fresh_shared_content_loader.load_snapshot(snapshot_path) is False
+
+
+class TestApplicationContentLoader(BaseApplicationTest):
+    def test_content_loader_is_shared(self):
+        assert content_loader._get_current_object() is content_loader._get_current_object()
+
+    def test_inplace_filter_does_not_affect_shared_content(self):
+        service_data = {"lot": "cloud-hosting"}
+        original_question_ids = [
+            question.id
+            for section in content_loader.get_manifest("g-cloud-9", "edit_service_as_admin").sections
+            for question in section.questions
+        ]
+
+        filtered = content_loader.get_manifest("g-cloud-9", "edit_service_as_admin").filter(
+            service_data,
+            inplace_allowed=True,
+        ).summary(service_data, inplace_allowed=True)
+        assert len([question for section in filtered.sections for question in section.questions]) < len(
+            original_question_ids
+        )
+
+        assert [
+            question.id
+            for section in content_loader.get_manifest("g-cloud-9", "edit_service_as_admin").sections
+            for question in section.questions
+        ] == original_question_ids
+
+
+class TestFrameworksSnapshot(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.shared_content_loader = mock.Mock(spec=SharedContentLoader)
+
+    def test_app_starts_without_waiting_for_frameworks(self):
+        data_api_client.find_frameworks.reset_mock()
+        create_app("test")
+        assert data_api_client.find_frameworks.called is False
+
+    def test_warm_up_starts_with_snapshot_frameworks_then_adds_new_ones(self, tmpdir):
+        self.app.config["DM_FRAMEWORKS_SNAPSHOT_PATH"] = str(tmpdir.join("frameworks.json"))
+        data_api_client.find_frameworks.return_value = {"frameworks": [
+            {"slug": "g-cloud-9", "status": "live", "name": "G-Cloud 9"},
+            {"slug": "g-cloud-10", "status": "live", "name": "G-Cloud 10"},
+            {"slug": "g-cloud-4", "status": "expired", "name": "G-Cloud 4"},
+        ]}
+
+        _warm_up_content_loader(self.app, self.shared_content_loader, [
+            {"slug": "g-cloud-9", "status": "live"},
+            {"slug": "g-cloud-8", "status": "expired"},
+        ])
+
+        assert self.shared_content_loader.warm_up.call_args_list == [
+            mock.call(["g-cloud-9"]),
+            mock.call(["g-cloud-10"]),
+        ]
+        with open(self.app.config["DM_FRAMEWORKS_SNAPSHOT_PATH"]) as f:
+            assert json.load(f) == [
+                {"slug": "g-cloud-9", "status": "live"},
+                {"slug": "g-cloud-10", "status": "live"},
+                {"slug": "g-cloud-4", "status": "expired"},
+            ]
+
+    def test_warm_up_survives_api_failure(self, tmpdir):
+        self.app.config["DM_FRAMEWORKS_SNAPSHOT_PATH"] = str(tmpdir.join("frameworks.json"))
+        data_api_client.find_frameworks.side_effect = APIError()
+
+        _warm_up_content_loader(self.app, self.shared_content_loader, [{"slug": "g-cloud-9", "status": "live"}])
+
+        assert self.shared_content_loader.warm_up.call_args_list == [mock.call(["g-cloud-9"])]
+        assert not tmpdir.join("frameworks.json").exists()
+
+    def test_snapshot_frameworks_are_given_to_content_loader_factory(self, tmpdir):
+        snapshot_path = tmpdir.join("frameworks.json")
+        snapshot_path.write('[{"slug": "g-cloud-9", "status": "live"}]')
+
+        with mock.patch("config.Test.DM_FRAMEWORKS_SNAPSHOT_PATH", str(snapshot_path)):
+            with mock.patch("app._make_content_loader_factory") as make_content_loader_factory:
+                create_app("test")
+
+        assert make_content_loader_factory.call_args[0][1] == [{"slug": "g-cloud-9", "status": "live"}]
+
+    def test_missing_or_corrupt_snapshot_means_no_frameworks(self, tmpdir):
+        snapshot_path = tmpdir.join("frameworks.json")
+        snapshot_path.write('[{"slug": "g-cloud-9", "sta')
+
+        for path in (snapshot_path, tmpdir.join("nonexistent.json")):
+            with mock.patch("config.Test.DM_FRAMEWORKS_SNAPSHOT_PATH", str(path)):
+                with mock.patch("app._make_content_loader_factory") as make_content_loader_factory:
+                    create_app("test")
+
+            assert make_content_loader_factory.call_args[0][1] == []